@@ -0,0 +1,40 @@
+"""create_price_features_table
+
+Revision ID: a3f1c9d27b40
+Revises: 62267c53d18d
+Create Date: 2026-10-19 09:12:31.204118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c9d27b40'
+down_revision = '62267c53d18d'
+branch_labels = None
+depends_on = None
+
+FEATURE_COLUMNS = [
+    'sma_7', 'sma_21', 'ema_12', 'ema_26', 'price_change', 'price_change_7d',
+    'volatility', 'rsi', 'macd', 'macd_signal', 'bb_middle', 'bb_upper', 'bb_lower',
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'price_features',
+        sa.Column('coin_id', sa.Text, primary_key=True),
+        sa.Column('date', sa.Date, primary_key=True),
+        sa.Column('symbol', sa.Text, nullable=False),
+        sa.Column('price', sa.Float, nullable=False),
+        *[sa.Column(name, sa.Float, nullable=True) for name in FEATURE_COLUMNS],
+    )
+    
+    # Screening reads the latest row of every coin
+    op.create_index('idx_price_features_date', 'price_features', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_price_features_date', 'price_features')
+    op.drop_table('price_features')
@@ -0,0 +1,32 @@
+"""create_data_version_table
+
+Revision ID: c5e8d1a4b9f2
+Revises: a3f1c9d27b40
+Create Date: 2026-10-19 10:02:47.381920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8d1a4b9f2'
+down_revision = 'a3f1c9d27b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One counter per dataset; writers bump it in the same transaction as their
+    # writes, and readers key caches on it
+    data_version = op.create_table(
+        'data_version',
+        sa.Column('name', sa.Text, primary_key=True),
+        sa.Column('version', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.bulk_insert(data_version, [{'name': 'prices', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('data_version')
@@ -0,0 +1,36 @@
+"""create_ingest_stats_table
+
+Revision ID: e2b7f4c81d36
+Revises: c5e8d1a4b9f2
+Create Date: 2026-10-19 11:24:09.518377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7f4c81d36'
+down_revision = 'c5e8d1a4b9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Per-coin totals of `prices`, kept by the ETL in its load transactions so
+    # health checks never scan the table
+    op.create_table(
+        'ingest_stats',
+        sa.Column('coin_id', sa.Text, primary_key=True),
+        sa.Column('row_count', sa.BigInteger, nullable=False, server_default='0'),
+        sa.Column('latest_date', sa.Date, nullable=True),
+        sa.Column('last_run_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.execute("""
+        INSERT INTO ingest_stats (coin_id, row_count, latest_date)
+        SELECT coin_id, COUNT(*), MAX(date) FROM prices GROUP BY coin_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('ingest_stats')
@@ -0,0 +1,96 @@
+# app/agents/async_tools.py
+"""
+Async variants of the agent tools.
+
+Queries go through the asyncpg engine so many tool calls can wait on the
+database at once; CPU-bound work (chart rendering, model fitting) is moved
+to worker threads. Without asyncpg installed every tool falls back to its
+sync implementation on a worker thread, so behaviour is identical.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import pandas as pd
+
+from app.db import ASYNC_DB_AVAILABLE, get_async_engine
+from app.agents import tools
+from app.ml.indicators import daily_closes
+from app.agents.tools import (
+    TOP_MOVERS_DAYS, TOP_MOVERS_SQL, PRICE_HISTORY_SQL, PRICE_FEATURES_SQL, PRICE_SERIES_SQL,
+    _coin_id, _format_top_movers, _render_price_chart, _format_forecast,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _aread_sql(query, params: dict) -> pd.DataFrame:
+    """Run one tool query on the async engine"""
+    if not ASYNC_DB_AVAILABLE:
+        return await asyncio.to_thread(tools._read_sql, query, params)
+    async with get_async_engine().connect() as conn:
+        return await conn.run_sync(lambda sync_conn: pd.read_sql(query, sync_conn, params=params))
+
+
+async def aget_top_movers(period: str = "7d", limit: int = 5) -> str:
+    try:
+        days = TOP_MOVERS_DAYS.get(period, 7)
+        df = await _aread_sql(TOP_MOVERS_SQL, {"days": days, "limit": limit})
+        return _format_top_movers(df, period, limit)
+    except Exception as e:
+        logger.error(f"Error in aget_top_movers: {str(e)}")
+        return f"Error retrieving top movers: {str(e)}"
+
+
+async def aplot_price(coin: str = "bitcoin", days: int = 30) -> str:
+    try:
+        df = await _aread_sql(PRICE_HISTORY_SQL, {"coin_id": _coin_id(coin), "days": days})
+        return await asyncio.to_thread(_render_price_chart, df, coin, days)
+    except Exception as e:
+        logger.error(f"Error in aplot_price: {str(e)}")
+        return f"Error generating price chart: {str(e)}"
+
+
+async def aload_price_features(coin_id: str) -> pd.DataFrame:
+    df = await _aread_sql(PRICE_FEATURES_SQL, {"coin_id": coin_id})
+    if not df.empty:
+        return df
+    return daily_closes(await _aread_sql(PRICE_SERIES_SQL, {"coin_id": coin_id}))
+
+
+async def aforecast_price(coin: str = "bitcoin", days: int = 7) -> str:
+    try:
+        df = await aload_price_features(_coin_id(coin))
+        return await asyncio.to_thread(_format_forecast, df, coin, days)
+    except Exception as e:
+        logger.error(f"Error in aforecast_price: {str(e)}")
+        return f"Error generating forecast: {str(e)}"
+
+
+async def ascreen_market(**kwargs) -> str:
+    return await asyncio.to_thread(tools.screen_market, **kwargs)
+
+
+async def acorrelation_matrix(**kwargs) -> str:
+    return await asyncio.to_thread(tools.correlation_matrix, **kwargs)
+
+
+ASYNC_TOOLS = {
+    "get_top_movers": aget_top_movers,
+    "plot_price": aplot_price,
+    "forecast_price": aforecast_price,
+    "screen_market": ascreen_market,
+    "correlation_matrix": acorrelation_matrix,
+}
+
+
+async def aexecute(call: dict[str, Any]) -> str:
+    """Run one validated tool call"""
+    return await ASYNC_TOOLS[call["function"]](**call.get("parameters", {}))
+
+
+async def aexecute_calls(calls: list[dict[str, Any]]) -> list[str]:
+    """Run independent tool calls concurrently; results keep the input order"""
+    return list(await asyncio.gather(*(aexecute(call) for call in calls)))
@@ -0,0 +1,100 @@
+# app/agents/executor.py
+"""
+Server-side execution of tool calls and multi-tool plans.
+
+The LLM may answer with one call or a `{"plan": [...]}` of several (see
+`schema.validate_plan`). Independent steps run in parallel on a thread
+pool, identical calls run once, and a `for_each` step fans out over the
+coins of its source step as soon as that step finishes. Results come back
+in plan order, so a compound question costs one LLM round-trip.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from app.agents.schema import validate_call, validate_plan
+from app.agents.tools import COIN_SOURCES, TOOL_REGISTRY
+from app.agents.tracing import Trace
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 4
+MAX_FOR_EACH = 10  # coins a single for_each step may fan out to
+
+
+def _key(call: dict[str, Any]) -> str:
+    return json.dumps([call["function"], call.get("parameters", {})], sort_keys=True)
+
+
+def _run(call: dict[str, Any]) -> tuple[str, list[str]]:
+    """Execute one call; returns (markdown, coin ids it lists)"""
+    fn, params = call["function"], call.get("parameters", {})
+    try:
+        if fn in COIN_SOURCES:
+            return COIN_SOURCES[fn](**params)
+        return TOOL_REGISTRY[fn](**params), []
+    except Exception as e:
+        logger.error(f"Error in {fn}: {str(e)}")
+        return f"Error running {fn}: {str(e)}", []
+
+
+def execute_plan(spec: dict[str, Any], max_workers: int = MAX_WORKERS,
+                 query: str | None = None) -> list[dict[str, Any]]:
+    """Run a validated call or plan.
+
+    Returns one `{"function", "parameters", "result"}` entry per executed
+    call, in plan order; duplicate calls appear once. The tool stage is
+    traced as its own agent-log line, tagged with `query` if given.
+    """
+    steps = validate_plan(spec)
+    if steps is None:
+        raise ValueError(f"Invalid tool call or plan: {spec!r}")
+
+    trace = Trace(query=query, route="tools")
+    with trace.stage("tool"):
+        results = _execute(steps, max_workers)
+    trace.emit(tool_calls=[{"function": r["function"], "parameters": r["parameters"]} for r in results])
+    return results
+
+
+def _execute(steps: list[dict[str, Any]], max_workers: int) -> list[dict[str, Any]]:
+    futures: dict[str, Future] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        def submit(call: dict[str, Any]) -> Future:
+            key = _key(call)
+            if key not in futures:
+                futures[key] = pool.submit(_run, call)
+            return futures[key]
+
+        # Independent steps go out at once; fan-out steps wait for their source
+        step_futures = [None if "for_each" in step else submit(step) for step in steps]
+        expanded: dict[int, list[dict[str, Any]]] = {}
+        for i, step in enumerate(steps):
+            if "for_each" not in step:
+                continue
+            _, coins = step_futures[step["for_each"]].result()
+            calls = [
+                {"function": step["function"], "parameters": {**step.get("parameters", {}), "coin": coin}}
+                for coin in coins[:MAX_FOR_EACH]
+            ]
+            expanded[i] = [c for c in calls if validate_call(c)]
+            for call in expanded[i]:
+                submit(call)
+
+        # Walk the plan again so fanned-out calls sit where their step was
+        order, seen = [], set()
+        for i, step in enumerate(steps):
+            for call in expanded.get(i, [step] if "for_each" not in step else []):
+                if _key(call) not in seen:
+                    seen.add(_key(call))
+                    order.append(call)
+
+        return [
+            {"function": call["function"], "parameters": call.get("parameters", {}),
+             "result": futures[_key(call)].result()[0]}
+            for call in order
+        ]
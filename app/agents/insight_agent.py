@@ -1,114 +1,237 @@
-import os
 import json
-import logging
-from typing import Any, Union
+import asyncio
+import time
+import hashlib
+import threading
+from typing import Any, Iterator, Union
 
-from langchain_openai import ChatOpenAI
-from app.context.embedding import get_retriever
-from app.agents.schema import ALLOWED_FUNCTIONS
+from app.context.embedding import built_query_embeddings, get_retriever, get_query_embeddings
+from app.agents.schema import validate_plan
+from app.agents.intent_router import route
+from app.agents.llm_router import AllModelsFailedError, get_router
+from app.agents.response_cache import ResponseCache
+from app.agents.tracing import Trace
+from app.config import (
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTL, RESPONSE_CACHE_SIMILARITY,
+    PROMPT_TOKEN_BUDGET, PROMPT_SNIPPET_MAX_TOKENS, AGENT_LOG_DEBUG,
+)
 from .tools import get_top_movers, plot_price, forecast_price
 from app.prompts.insight_prompt import INSIGHT_PROMPT as SYSTEM_PROMPT
+from app.agents.prompt_builder import BuiltPrompt, build_prompt
 
-# Model fallback configuration
-MODELS = [
-    "gpt-4o-mini",      # Primary choice - fastest and cheapest GPT-4 class
-    "gpt-3.5-turbo",    # Fallback 1 - reliable and fast
-    "gpt-4o",           # Fallback 2 - most capable but slower
-]
-
-def get_llm_with_fallback():
-    """Try models in order until one works"""
-    for model in MODELS:
-        try:
-            llm = ChatOpenAI(model=model, temperature=0, timeout=10)
-            # Test the model with a simple call
-            test_response = llm.invoke("Test")
-            return llm, model
-        except Exception as e:
-            print(f"Model {model} failed: {str(e)}")
-            continue
-    
-    # If all models fail, return the first one and let it error
-    return ChatOpenAI(model=MODELS[0], temperature=0), MODELS[0]
+# Cached answers are only valid for the prompt that produced them
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf8")).hexdigest()[:12]
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache() -> Union[ResponseCache, None]:
+    """Process-wide response cache, or None when disabled"""
+    global _response_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            # Exact-match caching needs no embeddings; only build the client for similarity
+            _response_cache = ResponseCache(
+                ttl=RESPONSE_CACHE_TTL,
+                similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+                embedder=get_query_embeddings() if RESPONSE_CACHE_SIMILARITY else None,
+            )
+        return _response_cache
 
 def _parse_call(raw: str) -> Union[dict[str, Any], None]:
+    """A single tool call or a multi-tool plan, if `raw` is a valid one"""
     try:
         data = json.loads(raw)
-        fn = data["function"]
-        args = data["parameters"]
-        # Validate against allowed functions and their schemas
-        if fn not in ALLOWED_FUNCTIONS:
-            return None
-        schema = ALLOWED_FUNCTIONS[fn]
-        for k, typ in schema.__annotations__.items():
-            if k not in args:
-                raise ValueError(f"Missing parameter '{k}' for function '{fn}'")
-            if typ == int and not isinstance(args[k], int):
-                raise TypeError(f"Parameter '{k}' expected int, got {type(args[k]).__name__}")
-        return data
+        return data if validate_plan(data) else None
     except Exception:
         return None
 
 
-def ask(question: str) -> Union[dict[str, Any], str]:
-    # ─── 1. Logging setup ──────────────────────────────────────────────────────────
-    logger = logging.getLogger("crypto_agent")
-    for h in logger.handlers[:]:
-        logger.removeHandler(h)
-    log_path = os.path.join(os.getcwd(), "agent.log")
-    fh = logging.FileHandler(log_path, encoding="utf8")
-    fh.setFormatter(logging.Formatter("%(message)s"))
-    logger.addHandler(fh)
-    logger.setLevel(logging.INFO)
-
-    # ─── 2. Get LLM with fallback ──────────────────────────────────────────────────
-    llm, model_used = get_llm_with_fallback()
-    logger.info(f"Using model: {model_used}")
-
-    # ─── 3. Retrieve context ───────────────────────────────────────────────────────
-    retriever = get_retriever(k=4)
-    docs = retriever.get_relevant_documents(question)
-    rag_block = "\n\n".join(f"- {d.page_content}" for d in docs)
-
-    # ─── 4. Build & call LLM ──────────────────────────────────────────────────────
-    prompt = (
-        SYSTEM_PROMPT
-        + f"\n\n---\nContext (top {len(docs)} snippets):\n{rag_block}\n\n"
-        + f"User: {question}"
+FALLBACK_REPLY = "Sorry, I'm experiencing technical difficulties. Please try again in a moment."
+
+def _prompt_fields(prompt: BuiltPrompt) -> dict[str, Any]:
+    """Prompt hash and token counts; the full text only in debug mode"""
+    fields = {
+        "prompt_sha256": hashlib.sha256(prompt.text.encode("utf8")).hexdigest()[:16],
+        "prompt_tokens": prompt.token_counts(),
+    }
+    if AGENT_LOG_DEBUG:
+        fields["prompt"] = prompt.text
+    return fields
+
+
+def _fast_path(question: str, trace: Trace) -> Union[dict[str, Any], None]:
+    """Tool call from the deterministic router (no retrieval, no LLM)"""
+    with trace.stage("routing"):
+        call = route(question)
+    if call:
+        trace.emit(route="fast_path", tool_call=call)
+    return call
+
+
+def _cached_answer(question: str, trace: Trace) -> Union[dict[str, Any], str, None]:
+    """Answer from the response cache, if any"""
+    with trace.stage("cache"):
+        cache = get_response_cache()
+        cached = cache.get(question, PROMPT_VERSION) if cache else None
+    if cached is not None:
+        trace.emit(
+            route="cache",
+            cache="hit",
+            response=cached if isinstance(cached, str) else json.dumps(cached),
+            tool_call=cached if isinstance(cached, dict) else None,
+        )
+    return cached
+
+
+def _shortcut(question: str, trace: Trace) -> Union[dict[str, Any], str, None]:
+    """Answer from the deterministic fast path or the response cache, if possible"""
+    call = _fast_path(question, trace)
+    return call if call else _cached_answer(question, trace)
+
+
+def _build_prompt(question: str, trace: Trace) -> tuple[BuiltPrompt, list]:
+    # ─── Retrieve context ─────────────────────────────────────────────────────────
+    with trace.stage("retrieval"):
+        retriever = get_retriever(k=4)
+        docs = retriever.get_relevant_documents(question)
+    with trace.stage("prompt"):
+        prompt = build_prompt(
+            question,
+            [d.page_content for d in docs],
+            budget=PROMPT_TOKEN_BUDGET,
+            snippet_max_tokens=PROMPT_SNIPPET_MAX_TOKENS,
+        )
+    return prompt, docs
+
+
+def _finish(question: str, trace: Trace, prompt: BuiltPrompt, docs: list,
+            resp: str, model_used: str) -> Union[dict[str, Any], str]:
+    """Parse the completion, cache it and emit the trace line"""
+    with trace.stage("parse"):
+        call = _parse_call(resp)
+    cache = get_response_cache()
+    if cache:
+        with trace.stage("cache"):
+            cache.put(question, PROMPT_VERSION, call or resp, time.perf_counter() - trace.started)
+
+    # Only report the embedding cache if retrieval built it; logging must not create a client
+    embeddings = built_query_embeddings()
+    trace.emit(
+        route="llm",
+        cache="miss" if cache else "off",
+        model=model_used,
+        context_count=len(docs),
+        **({"embedding_cache": embeddings.stats()} if embeddings else {}),
+        response_cache=cache.stats() if cache else None,
+        **_prompt_fields(prompt),
+        response=resp,
+        tool_call=call,
     )
-    
+
+    # Dispatch (return spec instead of executing); otherwise the raw answer
+    return call if call else resp
+
+
+def ask(question: str) -> Union[dict[str, Any], str]:
+    trace = Trace(query=question)
+    shortcut = _shortcut(question, trace)
+    if shortcut is not None:
+        return shortcut
+
+    prompt, docs = _build_prompt(question, trace)
     try:
-        resp = llm.invoke(prompt).content.strip()
-    except Exception as e:
-        logger.error(f"LLM call failed with {model_used}: {str(e)}")
-        # Try one more fallback
-        try:
-            fallback_llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-            resp = fallback_llm.invoke(prompt).content.strip()
-            model_used = "gpt-3.5-turbo (emergency fallback)"
-        except Exception as e2:
-            logger.error(f"All models failed: {str(e2)}")
-            return f"Sorry, I'm experiencing technical difficulties. Please try again in a moment."
-    
-    call = _parse_call(resp)
-
-    # ─── 4. Emit JSON‐line ─────────────────────────────────────────────────────────
-    log_entry = {
-        "query": question,
-        "context_count": len(docs),
-        "prompt": prompt,
-        "response": resp,
-        "tool_call": call,
-    }
-    logger.info(json.dumps(log_entry))
+        # Router fails over on error; there is no probe call
+        with trace.stage("llm"):
+            resp, model_used = get_router().invoke(prompt.text)
+    except AllModelsFailedError as e:
+        trace.emit(route="llm", error=f"All models failed: {str(e)}", **_prompt_fields(prompt))
+        return FALLBACK_REPLY
+    return _finish(question, trace, prompt, docs, resp.strip(), model_used)
+
+
+def ask_stream(question: str) -> Iterator[tuple[str, Any]]:
+    """Streaming variant of `ask`.
+
+    Yields ("token", text) while prose arrives and finally ("done", result),
+    where result is what `ask` would return. Completions that open with `{`
+    or a code fence are treated as tool calls and buffered, not streamed.
+    """
+    trace = Trace(query=question)
+    shortcut = _shortcut(question, trace)
+    if shortcut is not None:
+        if isinstance(shortcut, str):
+            yield "token", shortcut
+        yield "done", shortcut
+        return
+
+    prompt, docs = _build_prompt(question, trace)
+    parts, buffering, decided, model_used = [], False, False, None
+    llm_started = time.perf_counter()
+    try:
+        for token, model_used in get_router().stream(prompt.text):
+            if not parts:
+                trace.add("llm_first_token", time.perf_counter() - llm_started)
+            parts.append(token)
+            if decided:
+                if not buffering:
+                    yield "token", token
+                continue
+            head = "".join(parts).lstrip()
+            if head:
+                decided = True
+                buffering = head[0] in "{`"
+                if not buffering:
+                    yield "token", head
+    except AllModelsFailedError as e:
+        trace.emit(route="llm", error=f"All models failed: {str(e)}", **_prompt_fields(prompt))
+        yield "token", FALLBACK_REPLY
+        yield "done", FALLBACK_REPLY
+        return
+    # Includes the time the consumer spent rendering tokens
+    trace.add("llm", time.perf_counter() - llm_started)
+
+    result = _finish(question, trace, prompt, docs, "".join(parts).strip(), model_used)
+    if buffering and isinstance(result, str):
+        # Looked like JSON but was not a valid tool call: show it after all
+        yield "token", result
+    yield "done", result
+
 
-    # Clean up handler
-    logger.removeHandler(fh)
-    fh.close()
+async def aask(question: str) -> Union[dict[str, Any], str]:
+    """Async `ask`.
 
-    # ─── 5. Dispatch (return spec instead of executing) ────────────────────────────
+    Same stages as `ask`: a cache hit returns before any retrieval. The
+    blocking steps run in worker threads and the LLM call is awaited rather
+    than holding a thread, so many questions can be in flight at once.
+    """
+    trace = Trace(query=question)
+    call = _fast_path(question, trace)
     if call:
         return call
+    cached = await asyncio.to_thread(_cached_answer, question, trace)
+    if cached is not None:
+        return cached
+
+    prompt, docs = await asyncio.to_thread(_build_prompt, question, trace)
+
+    try:
+        with trace.stage("llm"):
+            resp, model_used = await get_router().ainvoke(prompt.text)
+    except AllModelsFailedError as e:
+        trace.emit(route="llm", error=f"All models failed: {str(e)}", **_prompt_fields(prompt))
+        return FALLBACK_REPLY
+    return await asyncio.to_thread(_finish, question, trace, prompt, docs, resp.strip(), model_used)
+
+
+async def aask_many(questions: list[str], concurrency: int = 8) -> list[Union[dict[str, Any], str]]:
+    """Answer many questions with at most `concurrency` in flight; keeps order"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: str):
+        async with semaphore:
+            return await aask(question)
 
-    # No function call parsed: return raw assistant response
-    return resp
+    return list(await asyncio.gather(*(one(q) for q in questions)))
@@ -0,0 +1,105 @@
+# app/agents/intent_router.py
+"""
+Deterministic fast path in front of the LLM.
+
+Explicit commands (`plot_price coin=ETH days=5`) and a few common
+phrasings ("top 5 movers 7d", "chart eth 90 days") are turned into tool
+calls locally and validated against `ALLOWED_FUNCTIONS`. Anything the
+rules are not confident about returns None and goes to the LLM as before.
+"""
+import re
+from typing import Any, Literal, Union, get_args, get_origin
+
+from app.agents.schema import ALLOWED_FUNCTIONS, COIN_ALIASES, validate_call
+
+_COMMAND = re.compile(r"^\s*([a-z_]+)((?:\s+[a-z_]+\s*=\s*\S+)*)\s*$", re.IGNORECASE)
+_PAIR = re.compile(r"([a-z_]+)\s*=\s*(\S+)", re.IGNORECASE)
+
+_COIN = "|".join(sorted(COIN_ALIASES, key=len, reverse=True))
+_SPAN = r"(\d+)\s*(d|days?|w|weeks?|m|months?)\b"
+_UNIT_DAYS = {"d": 1, "w": 7, "m": 30}
+_PERIOD_WORDS = {"today": 1, "24h": 1, "day": 1, "week": 7, "weekly": 7, "month": 30, "monthly": 30}
+
+# Explanatory questions mention tools without asking to run them
+_EXPLANATORY = re.compile(r"^\s*(?:why|how|explain|should)\b", re.IGNORECASE)
+# Compound requests need a multi-tool plan, which only the LLM writes
+_COMPOUND = re.compile(r"\b(?:and|then|each|also|plus)\b", re.IGNORECASE)
+_MOVERS = re.compile(r"\b(?:top|biggest|best)\b.*\b(?:movers?|gainers?)\b", re.IGNORECASE)
+_LIMIT = re.compile(r"\btop\s+(\d+)\b", re.IGNORECASE)
+_LIMIT_RANGE = (1, 20)  # as documented for the tools in the prompt
+_CHART = re.compile(rf"\b(?:plot|chart|graph)\b(?:\s+(?:the|me|a))*\s+({_COIN})\b", re.IGNORECASE)
+_FORECAST = re.compile(rf"\b(?:forecast|predict)\b(?:\s+(?:the|me|a))*\s+({_COIN})\b", re.IGNORECASE)
+
+
+def _coerce(value: str, typ) -> Any:
+    """Convert a command-line token to the TypedDict field type"""
+    value = value.strip("\"'")
+    if typ is int:
+        return int(value)
+    if typ is bool:
+        if value.lower() not in ("true", "false"):
+            raise ValueError(value)
+        return value.lower() == "true"
+    if get_origin(typ) is list:
+        return [v.strip() for v in value.split(",") if v.strip()]
+    if get_origin(typ) is Literal and value not in get_args(typ):
+        raise ValueError(value)
+    return value
+
+
+def _parse_command(question: str) -> Union[dict[str, Any], None]:
+    match = _COMMAND.match(question)
+    if not match or match.group(1) not in ALLOWED_FUNCTIONS:
+        return None
+    fn = match.group(1)
+    fields = ALLOWED_FUNCTIONS[fn].__annotations__
+    params = {}
+    for key, value in _PAIR.findall(match.group(2)):
+        if key not in fields:
+            return None
+        try:
+            params[key] = _coerce(value, fields[key])
+        except ValueError:
+            return None
+    return {"function": fn, "parameters": params}
+
+
+def _span_days(question: str) -> Union[int, None]:
+    span = re.search(_SPAN, question, re.IGNORECASE)
+    if span:
+        return int(span.group(1)) * _UNIT_DAYS[span.group(2)[0].lower()]
+    for word, days in _PERIOD_WORDS.items():
+        if re.search(rf"\b{word}\b", question, re.IGNORECASE):
+            return days
+    return None
+
+
+def _parse_phrase(question: str) -> Union[dict[str, Any], None]:
+    if _EXPLANATORY.search(question) or _COMPOUND.search(question):
+        return None
+    if _MOVERS.search(question):
+        days = _span_days(question) or 7
+        period = {1: "1d", 7: "7d", 30: "30d"}.get(days)
+        if period is None:
+            return None
+        limit = _LIMIT.search(question)
+        return {"function": "get_top_movers",
+                "parameters": {"period": period, "limit": int(limit.group(1)) if limit else 5}}
+
+    for pattern, fn, default_days in ((_CHART, "plot_price", 30), (_FORECAST, "forecast_price", 7)):
+        match = pattern.search(question)
+        if match:
+            coin = COIN_ALIASES[match.group(1).lower()]
+            return {"function": fn, "parameters": {"coin": coin, "days": _span_days(question) or default_days}}
+    return None
+
+
+def route(question: str) -> Union[dict[str, Any], None]:
+    """Tool call for `question` if the rules are confident, else None"""
+    if len(question) > 200:
+        return None
+    call = validate_call(_parse_command(question) or _parse_phrase(question))
+    if call and "limit" in call["parameters"]:
+        low, high = _LIMIT_RANGE
+        call["parameters"]["limit"] = min(max(call["parameters"]["limit"], low), high)
+    return call
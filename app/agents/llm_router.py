@@ -0,0 +1,259 @@
+# app/agents/llm_router.py
+"""
+Process-wide LLM router with per-model health tracking.
+
+Clients are created once and kept warm. Health comes from real call
+outcomes: a model that fails `failure_threshold` times in a row is taken
+out of rotation (circuit open) for `cooldown` seconds, then gets a single
+half-open trial call. A failing call fails over to the next model at once,
+so the happy path costs exactly one LLM round-trip.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Model fallback configuration
+MODELS = [
+    "gpt-4o-mini",      # Primary choice - fastest and cheapest GPT-4 class
+    "gpt-3.5-turbo",    # Fallback 1 - reliable and fast
+    "gpt-4o",           # Fallback 2 - most capable but slower
+]
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class AllModelsFailedError(RuntimeError):
+    """Raised when every model in the router failed or is circuit-open"""
+
+
+@dataclass
+class ModelHealth:
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    latency_ewma: float | None = None
+    calls: int = 0
+    failures: int = 0
+    last_error: str | None = None
+
+
+def _openai_client(model: str):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model, temperature=0, timeout=10, max_retries=1)
+
+
+class _Attempt:
+    """Context manager for one call to one model; records its outcome on exit.
+
+    A failure is recorded and swallowed so `ModelRouter._attempts` can fail
+    over, unless the attempt was committed (streaming past the first
+    token), in which case it propagates. Interrupts (KeyboardInterrupt,
+    task cancellation) are not the model's fault: they only free its
+    half-open trial slot.
+    """
+
+    def __init__(self, router: ModelRouter, model: str, release_rest: Callable[[], None]):
+        self.router = router
+        self.model = model
+        self.error: Exception | None = None
+        self.committed = False
+        self._release_rest = release_rest
+        self._start = router.clock()
+
+    def commit(self) -> None:
+        """No failover from here on; other models' trial slots are handed back"""
+        self.committed = True
+        self._release_rest()
+
+    def __enter__(self) -> "_Attempt":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is None or isinstance(exc, GeneratorExit):
+            # GeneratorExit: the consumer stopped reading; the model answered fine
+            self.router.record_success(self.model, self.router.clock() - self._start)
+            return False
+        if not isinstance(exc, Exception):
+            self.router._release([self.model])
+            return False
+        logger.warning(f"Model {self.model} failed: {exc}")
+        self.router.record_failure(self.model, exc)
+        self.error = exc
+        return not self.committed
+
+
+class ModelRouter:
+    def __init__(self, models: list[str] = MODELS, client_factory: Callable = _openai_client,
+                 failure_threshold: int = 3, cooldown: float = 30.0, ewma_alpha: float = 0.2,
+                 clock: Callable[[], float] = time.monotonic):
+        self.models = list(models)
+        self.client_factory = client_factory
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.clock = clock
+        self.health = {m: ModelHealth() for m in self.models}
+        self._clients: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def client(self, model: str):
+        """Warm client for `model`, created on first use"""
+        with self._lock:
+            if model not in self._clients:
+                self._clients[model] = self.client_factory(model)
+            return self._clients[model]
+
+    def _acquire(self) -> list[str]:
+        """Models to try, in priority order; claims half-open trial slots"""
+        now = self.clock()
+        chosen = []
+        with self._lock:
+            for model in self.models:
+                h = self.health[model]
+                if h.state == OPEN and now - h.opened_at >= self.cooldown:
+                    h.state = HALF_OPEN
+                if h.state == CLOSED:
+                    chosen.append(model)
+                elif h.state == HALF_OPEN and not h.trial_in_flight:
+                    h.trial_in_flight = True
+                    chosen.append(model)
+        return chosen
+
+    def _release(self, models: list[str]) -> None:
+        with self._lock:
+            for model in models:
+                self.health[model].trial_in_flight = False
+
+    def record_success(self, model: str, latency: float) -> None:
+        with self._lock:
+            h = self.health[model]
+            h.calls += 1
+            h.consecutive_failures = 0
+            h.state = CLOSED
+            h.trial_in_flight = False
+            a = self.ewma_alpha
+            h.latency_ewma = latency if h.latency_ewma is None else a * latency + (1 - a) * h.latency_ewma
+
+    def record_failure(self, model: str, error: Exception) -> None:
+        with self._lock:
+            h = self.health[model]
+            h.calls += 1
+            h.failures += 1
+            h.consecutive_failures += 1
+            h.last_error = str(error)
+            h.trial_in_flight = False
+            if h.state == HALF_OPEN or h.consecutive_failures >= self.failure_threshold:
+                h.state = OPEN
+                h.opened_at = self.clock()
+
+    def _attempts(self) -> Iterator[_Attempt]:
+        """One attempt per model to try, in priority order, until one succeeds.
+
+        Every caller runs the same loop::
+
+            for attempt in self._attempts():
+                with attempt:
+                    result = ...  # call self.client(attempt.model)
+                    return result
+
+        Returning from inside `with attempt` records the success. An
+        exception is recorded against that model and the next one is tried; when none is left AllModelsFailedError
+        is raised. Leaving the loop hands back half-open trial slots that
+        were claimed but not used.
+        """
+        candidates = self._acquire()
+        if not candidates:
+            raise AllModelsFailedError("All models are circuit-open")
+        errors, tried = [], 0
+
+        def release_rest() -> None:
+            nonlocal tried
+            self._release(candidates[tried:])
+            tried = len(candidates)
+
+        try:
+            for model in candidates:
+                tried += 1
+                attempt = _Attempt(self, model, release_rest)
+                yield attempt
+                if attempt.error is None:
+                    return
+                errors.append(f"{model}: {attempt.error}")
+        finally:
+            release_rest()
+        raise AllModelsFailedError("; ".join(errors))
+
+    def invoke(self, prompt: str) -> tuple[str, str]:
+        """Complete `prompt` on the first healthy model; returns (text, model)"""
+        for attempt in self._attempts():
+            with attempt:
+                message = self.client(attempt.model).invoke(prompt)
+                return message.content, attempt.model
+
+    async def ainvoke(self, prompt: str) -> tuple[str, str]:
+        """Async `invoke`: same failover and health tracking, no thread held"""
+        for attempt in self._attempts():
+            with attempt:
+                message = await self.client(attempt.model).ainvoke(prompt)
+                return message.content, attempt.model
+
+    def stream(self, prompt: str) -> Iterator[tuple[str, str]]:
+        """Stream `prompt` as (token, model) pairs.
+
+        Failover happens until the first token arrives. After that the
+        answer is committed to one model: a mid-stream error is recorded
+        against that model like any failed call, and the provider's
+        exception is re-raised unchanged (the consumer already has part of
+        the answer, so no other model is tried). A consumer that stops
+        reading early counts as a success.
+        """
+        for attempt in self._attempts():
+            with attempt:
+                chunks = iter(self.client(attempt.model).stream(prompt))
+                first = next(chunks, None)
+                attempt.commit()
+                if first is not None:
+                    yield first.content, attempt.model
+                for chunk in chunks:
+                    yield chunk.content, attempt.model
+                return
+
+    def stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                m: {
+                    "state": h.state,
+                    "latency_ewma_ms": None if h.latency_ewma is None else h.latency_ewma * 1000,
+                    "calls": h.calls,
+                    "failures": h.failures,
+                    "last_error": h.last_error,
+                }
+                for m, h in self.health.items()
+            }
+
+
+_router: ModelRouter | None = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """The process-wide router (created on first use)"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
+
+
+def set_router(router: ModelRouter | None) -> None:
+    """Swap the process-wide router, e.g. for a fake backend in tests"""
+    global _router
+    with _router_lock:
+        _router = router
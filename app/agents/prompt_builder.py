@@ -0,0 +1,164 @@
+# app/agents/prompt_builder.py
+"""
+Token-budgeted prompt assembly.
+
+Layout: STATIC_PREFIX (system prompt + tool schema, byte-identical on every
+request so provider-side prompt caching applies), then retrieved context,
+then the question. Context is deduplicated and filled in relevance order
+(the retriever's order) until the budget is spent; the snippet that
+crosses the budget is truncated, the rest are dropped.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+
+from app.prompts.insight_prompt import INSIGHT_PROMPT
+
+logger = logging.getLogger(__name__)
+
+STATIC_PREFIX = INSIGHT_PROMPT + "\n\n---\n"
+ENCODING = "cl100k_base"
+MIN_SNIPPET_TOKENS = 16  # a shorter tail adds noise, not context
+
+_CHARS_PER_TOKEN = 4
+_encoder = None
+_encoder_failed = False
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """tiktoken encoder, or None when tiktoken or its BPE file is unavailable"""
+    global _encoder, _encoder_failed
+    with _encoder_lock:
+        if _encoder is None and not _encoder_failed:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding(ENCODING)
+            except Exception as e:
+                # BPE files are downloaded on first use; offline we estimate
+                logger.warning(f"tiktoken unavailable ({e}); estimating token counts")
+                _encoder_failed = True
+        return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken, else about 4 characters per token"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` to at most `max_tokens` tokens"""
+    encoder = _get_encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text)
+        return text if len(tokens) <= max_tokens else encoder.decode(tokens[:max_tokens])
+    limit = max_tokens * _CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    # Prefer ending on a word boundary
+    return cut[:cut.rfind(" ")] if " " in cut[limit // 2:] else cut
+
+
+def _normalise(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def dedupe_snippets(snippets: list[str]) -> list[str]:
+    """Drop empty snippets, repeats, and snippets contained in a more relevant one"""
+    kept, seen = [], []
+    for snippet in snippets:
+        norm = _normalise(snippet)
+        if norm and not any(norm in other for other in seen):
+            kept.append(snippet)
+            seen.append(norm)
+    return kept
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    prefix_tokens: int
+    context_tokens: int
+    question_tokens: int
+    snippets_used: int
+    snippets_dropped: int
+    truncated: bool
+    budget: int
+    snippets: list[str] = field(default_factory=list, repr=False)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prefix_tokens + self.context_tokens + self.question_tokens
+
+    def token_counts(self) -> dict:
+        """Per-request counts for the agent log"""
+        return {
+            "prefix": self.prefix_tokens,
+            "context": self.context_tokens,
+            "question": self.question_tokens,
+            "total": self.total_tokens,
+            "budget": self.budget,
+            "snippets_used": self.snippets_used,
+            "snippets_dropped": self.snippets_dropped,
+            "truncated": self.truncated,
+        }
+
+
+_prefix_tokens = None
+
+
+def prefix_tokens() -> int:
+    global _prefix_tokens
+    if _prefix_tokens is None:
+        _prefix_tokens = count_tokens(STATIC_PREFIX)
+    return _prefix_tokens
+
+
+def build_prompt(question: str, snippets: list[str], budget: int,
+                 snippet_max_tokens: int | None = None) -> BuiltPrompt:
+    """Assemble the prompt for `question` within `budget` tokens.
+
+    `snippets` are in relevance order. The prefix and question are never
+    cut; only context competes for what is left of the budget, and no
+    single snippet may exceed `snippet_max_tokens`.
+    """
+    tail = f"\n\nUser: {question}"
+    question_part = count_tokens(tail)
+    header_reserve = count_tokens("Context (top 99 snippets):\n")
+    remaining = budget - prefix_tokens() - question_part - header_reserve
+
+    candidates = dedupe_snippets(snippets)
+    used, truncated = [], False
+    for snippet in candidates:
+        line = f"- {snippet}"
+        cost = count_tokens(line) + 1  # joining blank line
+        cap = min(remaining, snippet_max_tokens or remaining)
+        if cost > cap:
+            if cap < MIN_SNIPPET_TOKENS:
+                break
+            line = truncate_tokens(line, cap - 1)
+            cost = count_tokens(line) + 1
+            truncated = True
+        used.append(line)
+        remaining -= cost
+
+    header = f"Context (top {len(used)} snippets):\n"
+    context = header + "\n\n".join(used)
+    return BuiltPrompt(
+        text=STATIC_PREFIX + context + tail,
+        prefix_tokens=prefix_tokens(),
+        context_tokens=count_tokens(context),
+        question_tokens=question_part,
+        snippets_used=len(used),
+        snippets_dropped=len(snippets) - len(used),
+        truncated=truncated,
+        budget=budget,
+        snippets=used,
+    )
@@ -0,0 +1,120 @@
+# app/agents/response_cache.py
+"""
+Response cache for the insight agent.
+
+Entries are keyed by the normalised question plus the prompt version, so
+editing the system prompt invalidates them. With a similarity threshold
+set, a miss on the exact key falls back to the nearest cached question by
+embedding cosine similarity. The store is a SQLite file in WAL mode, so
+every Streamlit worker process shares entries and counters.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.context.embedding import CACHE_DIR, normalise_query
+
+
+class ResponseCache:
+    def __init__(self, path: Path = CACHE_DIR / "responses.sqlite3", ttl: int = 3600,
+                 similarity_threshold: float | None = None, embedder=None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY, prompt_version TEXT, question TEXT,
+                    response TEXT, embedding BLOB, latency REAL, created_at REAL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, value REAL)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_stats VALUES (?, 0)",
+                [("hits",), ("similar_hits",), ("misses",), ("saved_latency",)],
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must stay on the thread that opened them
+        if getattr(self._local, "conn", None) is None:
+            self._local.conn = sqlite3.connect(str(self.path), timeout=5)
+        return self._local.conn
+
+    @staticmethod
+    def _key(question: str, prompt_version: str) -> str:
+        return hashlib.sha256(f"{prompt_version}\x00{normalise_query(question)}".encode("utf8")).hexdigest()
+
+    def _bump(self, conn, **deltas) -> None:
+        conn.executemany(
+            "UPDATE cache_stats SET value = value + ? WHERE name = ?",
+            [(v, k) for k, v in deltas.items()],
+        )
+
+    def get(self, question: str, prompt_version: str) -> Any | None:
+        """Cached response for `question`, or None on a miss"""
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT response, latency FROM responses WHERE key = ? AND created_at > ?",
+                (self._key(question, prompt_version), now - self.ttl),
+            ).fetchone()
+            if row:
+                self._bump(conn, hits=1, saved_latency=row[1])
+                return json.loads(row[0])
+
+        if self.similarity_threshold and self.embedder is not None:
+            hit = self._nearest(question, prompt_version, now)
+            if hit:
+                with conn:
+                    self._bump(conn, similar_hits=1, saved_latency=hit[1])
+                return json.loads(hit[0])
+
+        with conn:
+            self._bump(conn, misses=1)
+        return None
+
+    def _nearest(self, question: str, prompt_version: str, now: float):
+        rows = self._conn().execute(
+            "SELECT response, latency, embedding FROM responses "
+            "WHERE prompt_version = ? AND created_at > ? AND embedding IS NOT NULL",
+            (prompt_version, now - self.ttl),
+        ).fetchall()
+        if not rows:
+            return None
+        matrix = np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+        query = np.asarray(self.embedder.embed_query(question), dtype=np.float32)
+        scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+        best = int(np.argmax(scores))
+        return rows[best][:2] if scores[best] >= self.similarity_threshold else None
+
+    def put(self, question: str, prompt_version: str, response: Any, latency: float) -> None:
+        """Store a parsed tool call or text answer with the latency it cost"""
+        embedding = None
+        if self.similarity_threshold and self.embedder is not None:
+            embedding = np.asarray(self.embedder.embed_query(question), dtype=np.float32).tobytes()
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._key(question, prompt_version), prompt_version, normalise_query(question),
+                 json.dumps(response), embedding, latency, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+
+    def stats(self) -> dict:
+        stats = dict(self._conn().execute("SELECT name, value FROM cache_stats").fetchall())
+        lookups = stats["hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["similar_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -1,4 +1,4 @@
-from typing import TypedDict, Literal, List
+from typing import Any, TypedDict, Literal, List, Union, get_args, get_origin
 
 class TopMoversArgs(TypedDict):
     period: Literal["1d", "7d", "30d"]
@@ -12,9 +12,86 @@ class ForecastArgs(TypedDict):
     coin: str             # coin name, e.g. bitcoin
     days: int             # days ahead to forecast
 
+class ScreenMarketArgs(TypedDict, total=False):
+    filters: List[str]    # conditions, e.g. ["rsi < 30", "macd_trend == bullish"]
+    sort_by: str          # snapshot column to rank by, e.g. rsi
+    descending: bool      # sort direction
+    limit: int            # how many coins to return
+
+class CorrelationArgs(TypedDict, total=False):
+    coins: List[str]      # coin names; omit for the whole universe
+    days: int             # look-back window in days
+
 # Master registry (could expand later)
 ALLOWED_FUNCTIONS: dict[str, type] = {
     "get_top_movers": TopMoversArgs,
     "plot_price": PricePlotArgs,
     "forecast_price": ForecastArgs,
+    "screen_market": ScreenMarketArgs,
+    "correlation_matrix": CorrelationArgs,
+}
+
+# Common coin names and tickers mapped to our database coin_ids
+COIN_ALIASES = {
+    "bitcoin": "bitcoin",
+    "btc": "bitcoin",
+    "ethereum": "ethereum",
+    "eth": "ethereum",
+    "solana": "solana",
+    "sol": "solana",
 }
+
+def validate_call(data: Any) -> Union[dict[str, Any], None]:
+    """Return `data` if it is a well-formed call of an allowed function, else None"""
+    try:
+        fn = data["function"]
+        args = data["parameters"]
+        # Validate against allowed functions and their schemas
+        if fn not in ALLOWED_FUNCTIONS:
+            return None
+        schema = ALLOWED_FUNCTIONS[fn]
+        for k, typ in schema.__annotations__.items():
+            if k not in args:
+                if k not in schema.__required_keys__:
+                    continue
+                raise ValueError(f"Missing parameter '{k}' for function '{fn}'")
+            if typ == int and not isinstance(args[k], int):
+                raise TypeError(f"Parameter '{k}' expected int, got {type(args[k]).__name__}")
+            if get_origin(typ) is Literal and args[k] not in get_args(typ):
+                raise ValueError(f"Parameter '{k}' must be one of {get_args(typ)}")
+        return data
+    except Exception:
+        return None
+
+# Tools whose results name coins a later plan step can iterate over
+COIN_LIST_FUNCTIONS = ("get_top_movers", "screen_market")
+MAX_PLAN_STEPS = 8
+
+def validate_plan(data: Any) -> Union[list[dict[str, Any]], None]:
+    """Steps of a single call or a `{"plan": [...]}` multi-tool plan, else None.
+
+    A step may carry `"for_each": i` to run once per coin returned by an
+    earlier `COIN_LIST_FUNCTIONS` step i, with `coin` filled in per run.
+    Every step must validate, otherwise the whole plan is rejected.
+    """
+    try:
+        steps = data["plan"] if isinstance(data, dict) and "plan" in data else [data]
+        if not isinstance(steps, list) or not 0 < len(steps) <= MAX_PLAN_STEPS:
+            return None
+        for i, step in enumerate(steps):
+            call = step
+            if "for_each" in step:
+                source = step["for_each"]
+                if not isinstance(source, int) or not 0 <= source < i:
+                    return None
+                if steps[source]["function"] not in COIN_LIST_FUNCTIONS or "for_each" in steps[source]:
+                    return None
+                schema = ALLOWED_FUNCTIONS.get(step["function"])
+                if schema is None or "coin" not in schema.__annotations__:
+                    return None
+                call = {**step, "parameters": {**step.get("parameters", {}), "coin": "bitcoin"}}
+            if validate_call(call) is None:
+                return None
+        return steps
+    except Exception:
+        return None
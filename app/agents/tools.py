@@ -7,12 +7,23 @@ from __future__ import annotations
 import io
 import base64
 import logging
-import matplotlib.pyplot as plt
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
 import pandas as pd
-from sqlalchemy import text
-from langchain.tools import Tool
+import numpy as np
+from sqlalchemy import bindparam, text
 
-from app.db import engine
+from app.db import engine, get_data_watermark
+from app.agents.schema import COIN_ALIASES
+from app.ml.indicators import (
+    WARMUP_DAYS, SNAPSHOT_COLUMNS, daily_close_matrix, daily_closes, latest_snapshot, snapshot_from_features,
+    apply_filters,
+)
+from app.ml.correlation import correlation_report as _build_correlation_report
+
+if TYPE_CHECKING:
+    from langchain.tools import Tool
 
 # Import ML forecasting with fallback
 try:
@@ -25,183 +36,359 @@ except ImportError:
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+def _coin_id(coin: str) -> str:
+    return COIN_ALIASES.get(coin.lower(), coin.lower())
+
 def _fig_to_markdown(fig) -> str:
+    import matplotlib.pyplot as plt
     buf = io.BytesIO()
     fig.savefig(buf, format="png", bbox_inches="tight")
     plt.close(fig)
     data = base64.b64encode(buf.getvalue()).decode("utf8")
     return f"![plot](data:image/png;base64,{data})"
 
-def get_top_movers(period: str = "7d", limit: int = 5) -> str:
+def _read_sql(query, params: dict) -> pd.DataFrame:
+    """Run one tool query on the shared engine"""
+    return pd.read_sql(query, engine, params=params)
+
+TOP_MOVERS_DAYS = {"1d": 1, "7d": 7, "30d": 30}
+
+# Fixed: renamed 'window' to 'price_data' to avoid reserved keyword conflict
+# Also fixed INTERVAL syntax to work with parameter binding
+TOP_MOVERS_SQL = text(
+    """
+    WITH price_data AS (
+        SELECT
+          coin_id,
+          symbol,
+          date,
+          price,
+          FIRST_VALUE(price) OVER (PARTITION BY coin_id ORDER BY date) AS price_start
+        FROM prices
+        WHERE date >= CURRENT_DATE - INTERVAL '1 day' * :days
+    )
+    SELECT
+      symbol,
+      ROUND(100 * (MAX(price) - MIN(price_start)) / MIN(price_start), 2) AS pct_change
+    FROM price_data
+    GROUP BY symbol
+    ORDER BY pct_change DESC
+    LIMIT :limit
+    """
+)
+
+PRICE_HISTORY_SQL = text(
+    """
+    SELECT date, price
+    FROM prices
+    WHERE coin_id = :coin_id
+      AND date >= CURRENT_DATE - INTERVAL '1 day' * :days
+    ORDER BY date
+    """
+)
+
+PRICE_FEATURES_SQL = text(
+    """
+    SELECT *
+    FROM price_features
+    WHERE coin_id = :coin_id
+    ORDER BY date
+    """
+)
+
+PRICE_SERIES_SQL = text(
+    """
+    SELECT coin_id, symbol, date, price
+    FROM prices
+    WHERE coin_id = :coin_id
+    ORDER BY date, id
+    """
+)
+
+def _format_top_movers(df: pd.DataFrame, period: str, limit: int) -> str:
+    if df.empty:
+        logger.warning("No data returned from get_top_movers query")
+        return "No data yet – run the ETL loader first."
+    
+    table_md = df.to_markdown(index=False)
+    logger.info(f"Successfully retrieved {len(df)} top movers")
+    return f"Top {limit} movers over the last {period}:\n\n{table_md}"
+
+def top_movers_with_coins(period: str = "7d", limit: int = 5) -> tuple[str, list[str]]:
+    """`get_top_movers` plus the coin ids it lists"""
     try:
-        days_map = {"1d": 1, "7d": 7, "30d": 30}
-        days = days_map.get(period, 7)
-        
-        # Fixed: renamed 'window' to 'price_data' to avoid reserved keyword conflict
-        # Also fixed INTERVAL syntax to work with parameter binding
-        query = text(
-            """
-            WITH price_data AS (
-                SELECT
-                  coin_id,
-                  symbol,
-                  date,
-                  price,
-                  FIRST_VALUE(price) OVER (PARTITION BY coin_id ORDER BY date) AS price_start
-                FROM prices
-                WHERE date >= CURRENT_DATE - INTERVAL '1 day' * :days
-            )
-            SELECT
-              symbol,
-              ROUND(100 * (MAX(price) - MIN(price_start)) / MIN(price_start), 2) AS pct_change
-            FROM price_data
-            GROUP BY symbol
-            ORDER BY pct_change DESC
-            LIMIT :limit
-            """
-        )
-        
+        days = TOP_MOVERS_DAYS.get(period, 7)
         logger.info(f"Executing get_top_movers query for period={period}, limit={limit}")
-        df = pd.read_sql(query, engine, params={"days": days, "limit": limit})
-        
-        if df.empty:
-            logger.warning("No data returned from get_top_movers query")
-            return "No data yet – run the ETL loader first."
-        
-        table_md = df.to_markdown(index=False)
-        logger.info(f"Successfully retrieved {len(df)} top movers")
-        return f"Top {limit} movers over the last {period}:\n\n{table_md}"
+        df = _read_sql(TOP_MOVERS_SQL, {"days": days, "limit": limit})
+        # The ETL stores symbol as coin_id.upper()
+        return _format_top_movers(df, period, limit), [s.lower() for s in df.get("symbol", [])]
         
     except Exception as e:
         logger.error(f"Error in get_top_movers: {str(e)}")
-        return f"Error retrieving top movers: {str(e)}"
+        return f"Error retrieving top movers: {str(e)}", []
 
+def get_top_movers(period: str = "7d", limit: int = 5) -> str:
+    return top_movers_with_coins(period, limit)[0]
 
 
-def plot_price(coin: str = "bitcoin", days: int = 30) -> str:
-    try:
-        # Map common coin names to our database coin_ids
-        coin_map = {
-            "bitcoin": "bitcoin",
-            "btc": "bitcoin", 
-            "ethereum": "ethereum",
-            "eth": "ethereum",
-            "solana": "solana",
-            "sol": "solana"
-        }
-        
-        coin_id = coin_map.get(coin.lower(), coin.lower())
-        
-        # Fixed INTERVAL syntax to work with parameter binding
-        query = text(
-            """
-            SELECT date, price
-            FROM prices
-            WHERE coin_id = :coin_id
-              AND date >= CURRENT_DATE - INTERVAL '1 day' * :days
-            ORDER BY date
-            """
-        )
-        
-        logger.info(f"Executing plot_price query for coin={coin} (mapped to {coin_id}), days={days}")
-        df = pd.read_sql(query, engine, params={"coin_id": coin_id, "days": days})
-        
-        if df.empty:
-            logger.warning(f"No price data found for {coin}")
-            return f"No price data found for {coin}."
-        
+
+_PLOT_LOCK = threading.Lock()
+
+def _render_price_chart(df: pd.DataFrame, coin: str, days: int) -> str:
+    if df.empty:
+        logger.warning(f"No price data found for {coin}")
+        return f"No price data found for {coin}."
+    
+    import matplotlib.pyplot as plt  # loaded on the first chart, not at import
+    # pyplot keeps global figure state; charts may render on worker threads
+    with _PLOT_LOCK:
         fig, ax = plt.subplots()
         ax.plot(df["date"], df["price"], marker="o")
         ax.set_title(f"{coin.upper()} price – last {days} days")
         ax.set_xlabel("Date")
         ax.set_ylabel("USD")
         fig.autofmt_xdate()
-        
         result = _fig_to_markdown(fig)
-        logger.info(f"Successfully generated price chart for {coin} with {len(df)} data points")
-        return result
+    
+    logger.info(f"Successfully generated price chart for {coin} with {len(df)} data points")
+    return result
+
+def plot_price(coin: str = "bitcoin", days: int = 30) -> str:
+    try:
+        coin_id = _coin_id(coin)
+        logger.info(f"Executing plot_price query for coin={coin} (mapped to {coin_id}), days={days}")
+        df = _read_sql(PRICE_HISTORY_SQL, {"coin_id": coin_id, "days": days})
+        return _render_price_chart(df, coin, days)
         
     except Exception as e:
         logger.error(f"Error in plot_price: {str(e)}")
         return f"Error generating price chart: {str(e)}"
 
+def load_price_features(coin_id: str) -> pd.DataFrame:
+    """Daily closes with precomputed indicators for one coin.
+
+    Reads `price_features` (one indexed query); falls back to raw prices
+    when the ETL has not built features for this coin yet. Raw prices can
+    hold several intraday points per date, so the fallback keeps each day's
+    close: both sources give the forecaster one row per day.
+    """
+    df = _read_sql(PRICE_FEATURES_SQL, {"coin_id": coin_id})
+    if not df.empty:
+        return df
+    return daily_closes(_read_sql(PRICE_SERIES_SQL, {"coin_id": coin_id}))
+
+def _format_forecast(df: pd.DataFrame, coin: str, days: int) -> str:
+    if df.empty:
+        logger.warning(f"No price data found for {coin}")
+        return f"No price data found for {coin}."
+    
+    if len(df) < 30:
+        return f"Insufficient data for forecasting {coin}. Need at least 30 days of data."
+    
+    # Generate ML insights and forecasts
+    insights = get_ml_insights(df, coin.upper())
+    
+    # Format the results
+    result = f"🔮 **ML Price Forecast for {coin.upper()}**\n\n"
+    
+    if 'price_forecast' in insights:
+        forecast_data = insights['price_forecast']
+        forecasts = forecast_data['forecasts']
+        
+        result += f"**📈 {days}-Day Price Predictions:**\n"
+        current_price = df['price'].iloc[-1]
+        
+        bands = forecast_data.get('intervals', {}).get('bands', {})
+        lower, upper = bands.get('p05', []), bands.get('p95', [])
+        
+        for i, pred_price in enumerate(forecasts[:days], 1):
+            change_pct = ((pred_price - current_price) / current_price) * 100
+            direction = "📈" if change_pct > 0 else "📉"
+            result += f"Day {i}: ${pred_price:.2f} ({direction} {change_pct:+.1f}%)"
+            if i <= min(len(lower), len(upper)):
+                result += f" — 90% range ${lower[i-1]:.2f}–${upper[i-1]:.2f}"
+            result += "\n"
+    
+    if 'trend_analysis' in insights:
+        trend = insights['trend_analysis']
+        result += f"\n**📊 Technical Analysis:**\n"
+        result += f"• Trend: {trend.get('trend_direction', 'N/A').title()}\n"
+        result += f"• 30-day change: {trend.get('price_change_30d', 0):.1f}%\n"
+        result += f"• RSI: {trend.get('rsi', 0):.1f} ({trend.get('rsi_signal', 'N/A')})\n"
+        result += f"• Support: ${trend.get('support_level', 0):.2f}\n"
+        result += f"• Resistance: ${trend.get('resistance_level', 0):.2f}\n"
+    
+    if 'model_performance' in insights:
+        perf = insights['model_performance']
+        result += f"\n**🎯 Model Accuracy:**\n"
+        for model_name, metrics in perf.items():
+            result += f"• {model_name.replace('_', ' ').title()}: MAE ${metrics['mae']:.2f}\n"
+    
+    result += f"\n*⚠️ Disclaimer: This is a machine learning prediction based on historical data. Cryptocurrency markets are highly volatile and unpredictable. Not financial advice.*"
+    
+    logger.info(f"Successfully generated ML forecast for {coin}")
+    return result
+
 def forecast_price(coin: str = "bitcoin", days: int = 7) -> str:
     try:
-        # Map common coin names to our database coin_ids
-        coin_map = {
-            "bitcoin": "bitcoin",
-            "btc": "bitcoin", 
-            "ethereum": "ethereum",
-            "eth": "ethereum",
-            "solana": "solana",
-            "sol": "solana"
-        }
-        
-        coin_id = coin_map.get(coin.lower(), coin.lower())
-        
-        # Get historical data for ML training
+        coin_id = _coin_id(coin)
+        logger.info(f"Executing forecast_price query for coin={coin} (mapped to {coin_id}), days={days}")
+        return _format_forecast(load_price_features(coin_id), coin, days)
+        
+    except Exception as e:
+        logger.error(f"Error in forecast_price: {str(e)}")
+        return f"Error generating forecast: {str(e)}"
+
+def screen_market_with_coins(filters: list[str] | None = None, sort_by: str = "rsi",
+                             descending: bool = False, limit: int = 10) -> tuple[str, list[str]]:
+    """`screen_market` plus the coin ids it lists"""
+    try:
+        if sort_by not in SNAPSHOT_COLUMNS:
+            return f"Cannot sort by '{sort_by}'. Choose one of: {', '.join(SNAPSHOT_COLUMNS)}", []
+        
+        # Latest precomputed feature row per coin, straight off the primary key
         query = text(
             """
-            SELECT date, price
-            FROM prices
-            WHERE coin_id = :coin_id
-            ORDER BY date
+            SELECT DISTINCT ON (coin_id) *
+            FROM price_features
+            ORDER BY coin_id, date DESC
             """
         )
         
-        logger.info(f"Executing forecast_price query for coin={coin} (mapped to {coin_id}), days={days}")
-        df = pd.read_sql(query, engine, params={"coin_id": coin_id})
+        logger.info(f"Executing screen_market query for filters={filters}, sort_by={sort_by}")
+        df = pd.read_sql(query, engine)
         
-        if df.empty:
-            logger.warning(f"No price data found for {coin}")
-            return f"No price data found for {coin}."
+        if not df.empty:
+            snapshot = snapshot_from_features(df)
+        else:
+            # No feature table yet: compute for the whole universe from raw prices
+            query = text(
+                """
+                SELECT DISTINCT ON (coin_id, date) coin_id, symbol, date, price
+                FROM prices
+                WHERE date >= CURRENT_DATE - INTERVAL '1 day' * :days
+                ORDER BY coin_id, date, id DESC
+                """
+            )
+            df = pd.read_sql(query, engine, params={"days": WARMUP_DAYS})
+            
+            if df.empty:
+                logger.warning("No data returned from screen_market query")
+                return "No data yet – run the ETL loader first.", []
+            
+            snapshot = latest_snapshot(daily_close_matrix(df))
         
-        if len(df) < 30:
-            return f"Insufficient data for forecasting {coin}. Need at least 30 days of data."
+        try:
+            matches = apply_filters(snapshot, filters or [])
+        except ValueError as e:
+            return f"Invalid screening criteria: {e}. Available fields: {', '.join(SNAPSHOT_COLUMNS)}", []
         
-        # Generate ML insights and forecasts
-        insights = get_ml_insights(df, coin.upper())
+        if matches.empty:
+            return f"No coins match: {' and '.join(filters or [])}", []
         
-        # Format the results
-        result = f"🔮 **ML Price Forecast for {coin.upper()}**\n\n"
+        matches = matches.sort_values(sort_by, ascending=not descending).head(limit)
+        symbols = df.groupby("coin_id")["symbol"].last()
+        table = matches.assign(symbol=symbols.reindex(matches.index)).reset_index()
+        table = table[["symbol", "price", "change_7d", "rsi", "macd_trend", "sma_cross", "bb_position"]].round(2)
         
-        if 'price_forecast' in insights:
-            forecast_data = insights['price_forecast']
-            forecasts = forecast_data['forecasts']
-            
-            result += f"**📈 {days}-Day Price Predictions:**\n"
-            current_price = df['price'].iloc[-1]
-            
-            for i, pred_price in enumerate(forecasts[:days], 1):
-                change_pct = ((pred_price - current_price) / current_price) * 100
-                direction = "📈" if change_pct > 0 else "📉"
-                result += f"Day {i}: ${pred_price:.2f} ({direction} {change_pct:+.1f}%)\n"
-        
-        if 'trend_analysis' in insights:
-            trend = insights['trend_analysis']
-            result += f"\n**📊 Technical Analysis:**\n"
-            result += f"• Trend: {trend.get('trend_direction', 'N/A').title()}\n"
-            result += f"• 30-day change: {trend.get('price_change_30d', 0):.1f}%\n"
-            result += f"• RSI: {trend.get('rsi', 0):.1f} ({trend.get('rsi_signal', 'N/A')})\n"
-            result += f"• Support: ${trend.get('support_level', 0):.2f}\n"
-            result += f"• Resistance: ${trend.get('resistance_level', 0):.2f}\n"
-        
-        if 'model_performance' in insights:
-            perf = insights['model_performance']
-            result += f"\n**🎯 Model Accuracy:**\n"
-            for model_name, metrics in perf.items():
-                result += f"• {model_name.replace('_', ' ').title()}: MAE ${metrics['mae']:.2f}\n"
-        
-        result += f"\n*⚠️ Disclaimer: This is a machine learning prediction based on historical data. Cryptocurrency markets are highly volatile and unpredictable. Not financial advice.*"
-        
-        logger.info(f"Successfully generated ML forecast for {coin}")
+        logger.info(f"Successfully screened {len(snapshot)} coins, {len(matches)} shown")
+        criteria = " and ".join(filters) if filters else "no filters"
+        return f"Screened {len(snapshot)} coins ({criteria}), sorted by {sort_by}:\n\n{table.to_markdown(index=False)}", list(matches.index)
+        
+    except Exception as e:
+        logger.error(f"Error in screen_market: {str(e)}")
+        return f"Error screening market: {str(e)}", []
+
+def screen_market(filters: list[str] | None = None, sort_by: str = "rsi",
+                  descending: bool = False, limit: int = 10) -> str:
+    return screen_market_with_coins(filters, sort_by, descending, limit)[0]
+
+# Correlation reports keyed by (days, coins, data watermark); a 500×500 matrix
+# is computed once per data load instead of on every Streamlit rerun
+_CORRELATION_CACHE: OrderedDict = OrderedDict()
+_CORRELATION_CACHE_SIZE = 16
+_correlation_lock = threading.Lock()
+
+def correlation_report(days: int = 90, coins: list[str] | None = None) -> dict:
+    """Cached correlation / volatility / beta report for the given window"""
+    coin_ids = tuple(sorted({_coin_id(c) for c in coins})) if coins else ()
+    key = (days, coin_ids, get_data_watermark())
+    with _correlation_lock:
+        if key in _CORRELATION_CACHE:
+            _CORRELATION_CACHE.move_to_end(key)
+            return _CORRELATION_CACHE[key]
+    
+    coin_filter = "AND coin_id IN :coins" if coin_ids else ""
+    query = text(
+        f"""
+        SELECT DISTINCT ON (coin_id, date) coin_id, date, price
+        FROM prices
+        WHERE date >= CURRENT_DATE - INTERVAL '1 day' * :days
+          {coin_filter}
+        ORDER BY coin_id, date, id DESC
+        """
+    )
+    params = {"days": days}
+    if coin_ids:
+        query = query.bindparams(bindparam("coins", expanding=True))
+        params["coins"] = list(coin_ids)
+    
+    logger.info(f"Building correlation report for days={days}, coins={coin_ids or 'all'}")
+    df = pd.read_sql(query, engine, params=params)
+    report = _build_correlation_report(daily_close_matrix(df)) if not df.empty else {}
+    
+    with _correlation_lock:
+        _CORRELATION_CACHE[key] = report
+        while len(_CORRELATION_CACHE) > _CORRELATION_CACHE_SIZE:
+            _CORRELATION_CACHE.popitem(last=False)
+    return report
+
+def correlation_matrix(coins: list[str] | None = None, days: int = 90) -> str:
+    try:
+        report = correlation_report(days=days, coins=coins)
+        if not report:
+            return "No data yet – run the ETL loader first."
+        
+        corr = report["correlation"]
+        stats = report["stats"].round(3).reset_index()
+        result = (
+            f"Correlation of daily log returns over the last {days} days "
+            f"({report['observations']} observations):\n\n"
+        )
+        if len(corr) <= 10:
+            result += corr.round(2).to_markdown() + "\n\n"
+        else:
+            # Too wide to show: list the most correlated pairs instead
+            upper = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack()
+            pairs = upper.sort_values(ascending=False).head(10).round(2)
+            pairs.index = [f"{a} / {b}" for a, b in pairs.index]
+            result += pairs.rename("correlation").to_markdown() + "\n\n"
+        result += f"Volatility (annualised) and beta vs {report['benchmark']}:\n\n{stats.to_markdown(index=False)}"
+        
+        logger.info(f"Successfully built correlation matrix for {len(corr)} coins")
         return result
         
     except Exception as e:
-        logger.error(f"Error in forecast_price: {str(e)}")
-        return f"Error generating forecast: {str(e)}"
+        logger.error(f"Error in correlation_matrix: {str(e)}")
+        return f"Error computing correlation matrix: {str(e)}"
+
+# Dispatch table for validated tool calls (see `app/agents/executor.py`)
+TOOL_REGISTRY = {
+    "get_top_movers": get_top_movers,
+    "plot_price": plot_price,
+    "forecast_price": forecast_price,
+    "screen_market": screen_market,
+    "correlation_matrix": correlation_matrix,
+}
+
+# Variants returning (markdown, coin_ids) for plan steps that iterate coins
+COIN_SOURCES = {
+    "get_top_movers": top_movers_with_coins,
+    "screen_market": screen_market_with_coins,
+}
 
 def sql_tool() -> list[Tool]:
+    from langchain.tools import Tool
     tools = [
         Tool.from_function(
             name="get_top_movers",
@@ -218,5 +405,15 @@ def sql_tool() -> list[Tool]:
             func=forecast_price,
             description="Generate ML-based price forecasts for a cryptocurrency.",
         ),
+        Tool.from_function(
+            name="screen_market",
+            func=screen_market,
+            description="Screen all coins by RSI, SMA crossover, MACD and Bollinger position.",
+        ),
+        Tool.from_function(
+            name="correlation_matrix",
+            func=correlation_matrix,
+            description="Correlation, volatility and beta vs BTC across coins over a window.",
+        ),
     ]
     return tools
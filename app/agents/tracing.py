@@ -0,0 +1,183 @@
+# app/agents/tracing.py
+"""
+Structured JSONL trace log for the agent.
+
+Requests hand finished entries to a bounded queue and return immediately.
+One background thread drains whatever has queued up, writes it as a single
+batch to a file it keeps open, and rotates the file by size (optionally
+gzip-compressing old files). A full queue drops entries rather than
+blocking a request.
+"""
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from app.config import (
+    AGENT_LOG_PATH, AGENT_LOG_MAX_BYTES, AGENT_LOG_BACKUPS, AGENT_LOG_COMPRESS,
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class TraceLogger:
+    def __init__(self, path: str | Path, max_bytes: int = 10_000_000, backup_count: int = 5,
+                 compress: bool = False, max_queue: int = 10_000, batch_size: int = 512):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="trace-logger", daemon=True)
+        self._thread.start()
+
+    def log(self, entry: dict[str, Any]) -> None:
+        """Queue one entry; never blocks the caller"""
+        try:
+            self._queue.put_nowait(json.dumps(entry, default=str))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is on disk"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [item for item in batch if isinstance(item, str)]
+            try:
+                if lines:
+                    self._write(lines)
+            except Exception as e:
+                logger.error(f"Trace log write failed: {e}")
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if _STOP in batch:
+                if self._file:
+                    self._file.close()
+                return
+
+    def _write(self, lines: list[str]) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf8")
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+        self.written += len(lines)
+        self.batches += 1
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _backup(self, i: int) -> Path:
+        return self.path.with_name(f"{self.path.name}.{i}" + (".gz" if self.compress else ""))
+
+    def _rotate(self) -> None:
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            self.path.unlink()
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            if self._backup(i).exists():
+                os.replace(self._backup(i), self._backup(i + 1))
+        if self.compress:
+            with open(self.path, "rb") as src, gzip.open(self._backup(1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            self.path.unlink()
+        else:
+            os.replace(self.path, self._backup(1))
+
+    def stats(self) -> dict:
+        return {"written": self.written, "dropped": self.dropped, "batches": self.batches,
+                "queued": self._queue.qsize()}
+
+
+class Trace:
+    """Fields and per-stage timings for one request, emitted as one line"""
+
+    def __init__(self, **fields):
+        self.fields = fields
+        self.timings: dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = self.timings.get(name, 0.0) + seconds * 1000
+
+    def emit(self, **fields) -> None:
+        get_trace_logger().log({
+            **self.fields,
+            **fields,
+            "timings_ms": {k: round(v, 2) for k, v in self.timings.items()},
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+        })
+
+
+_trace_logger: TraceLogger | None = None
+_trace_logger_lock = threading.Lock()
+
+
+def get_trace_logger() -> TraceLogger:
+    """Process-wide trace logger for AGENT_LOG_PATH (relative to the cwd)"""
+    global _trace_logger
+    path = Path(os.path.abspath(AGENT_LOG_PATH))
+    with _trace_logger_lock:
+        if _trace_logger is None or _trace_logger.path != path:
+            if _trace_logger is not None:
+                _trace_logger.close()
+            _trace_logger = TraceLogger(path, AGENT_LOG_MAX_BYTES, AGENT_LOG_BACKUPS, AGENT_LOG_COMPRESS)
+        return _trace_logger
+
+
+def flush_trace_log(timeout: float = 5.0) -> bool:
+    """Block until queued trace lines are written (tests, shutdown)"""
+    with _trace_logger_lock:
+        current = _trace_logger
+    return current.flush(timeout) if current else True
+
+
+@atexit.register
+def _close_trace_log() -> None:
+    with _trace_logger_lock:
+        if _trace_logger is not None:
+            _trace_logger.close()
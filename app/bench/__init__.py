@@ -0,0 +1 @@
+# Benchmark harnesses and local fake backends
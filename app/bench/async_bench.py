@@ -0,0 +1,115 @@
+# app/bench/async_bench.py
+"""
+Sync vs async agent pipeline on fake backends.
+
+Each question goes through retrieval, one LLM call and one tool query.
+The sync path is `ask` plus the tool, one question after another; the
+async path is `aask_many` plus `aexecute_calls`. Both see the same
+injected latencies, so any speed-up comes from overlapping waits.
+
+    python -m app.bench.async_bench --questions 32 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+import pandas as pd
+
+from app.agents import async_tools, insight_agent, tools
+from app.agents.llm_router import ModelRouter, set_router
+from app.bench.fakes import FakeChatModel, FakeDatabase
+
+TOOL_REPLY = json.dumps({"function": "get_top_movers", "parameters": {"period": "7d", "limit": 3}})
+
+
+class FakeRetriever:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def get_relevant_documents(self, question):
+        time.sleep(self.latency)
+        return []
+
+
+def _movers_frame(query, params) -> pd.DataFrame:
+    return pd.DataFrame({"symbol": ["BTC", "ETH", "SOL"], "pct_change": [4.2, 3.1, 1.5]}).head(params.get("limit", 3))
+
+
+def _patched(llm: FakeChatModel, db: FakeDatabase, retrieval_latency: float) -> ExitStack:
+    stack = ExitStack()
+    set_router(ModelRouter(models=["fake"], client_factory=lambda model: llm))
+    stack.callback(set_router, None)
+    stack.enter_context(mock.patch.object(insight_agent, "get_retriever",
+                                          lambda k=4: FakeRetriever(retrieval_latency)))
+    stack.enter_context(mock.patch.object(insight_agent, "get_response_cache", lambda: None))
+    stack.enter_context(mock.patch.object(tools, "_read_sql", db.read))
+    stack.enter_context(mock.patch.object(async_tools, "_aread_sql", db.aread))
+    return stack
+
+
+def _run_sync(questions: list[str]) -> list[str]:
+    results = []
+    for question in questions:
+        call = insight_agent.ask(question)
+        results.append(tools.TOOL_REGISTRY[call["function"]](**call["parameters"]) if isinstance(call, dict) else call)
+    return results
+
+
+async def _run_async(questions: list[str], concurrency: int) -> list[str]:
+    answers = await insight_agent.aask_many(questions, concurrency=concurrency)
+    calls = [a for a in answers if isinstance(a, dict)]
+    outputs = iter(await async_tools.aexecute_calls(calls))
+    return [next(outputs) if isinstance(a, dict) else a for a in answers]
+
+
+def run(n_questions: int = 32, concurrency: int = 8, llm_latency: float = 0.2,
+        retrieval_latency: float = 0.03, db_latency: float = 0.02) -> dict:
+    """Time both paths on identical fake backends; returns a summary dict"""
+    questions = [f"Which coins moved most this week? (run {i})" for i in range(n_questions)]
+    llm = FakeChatModel(TOOL_REPLY, latency=llm_latency)
+    db = FakeDatabase(_movers_frame, latency=db_latency)
+
+    with _patched(llm, db, retrieval_latency):
+        t0 = time.perf_counter()
+        sync_results = _run_sync(questions)
+        sync_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        async_results = asyncio.run(_run_async(questions, concurrency))
+        async_seconds = time.perf_counter() - t0
+
+    return {
+        "questions": n_questions,
+        "concurrency": concurrency,
+        "sync_seconds": sync_seconds,
+        "async_seconds": async_seconds,
+        "sync_req_per_sec": n_questions / sync_seconds,
+        "async_req_per_sec": n_questions / async_seconds,
+        "speedup": sync_seconds / async_seconds,
+        "results_match": sync_results == async_results,
+        "llm_calls": llm.calls,
+        "db_calls": db.calls,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async agent pipeline on fake backends")
+    parser.add_argument("--questions", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--retrieval-latency", type=float, default=0.03, help="seconds per retrieval")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="seconds per tool query")
+    args = parser.parse_args(argv)
+
+    stats = run(args.questions, args.concurrency, args.llm_latency, args.retrieval_latency, args.db_latency)
+    print(f"sync : {stats['sync_seconds']:.2f}s ({stats['sync_req_per_sec']:.1f} req/s)")
+    print(f"async: {stats['async_seconds']:.2f}s ({stats['async_req_per_sec']:.1f} req/s, "
+          f"concurrency {stats['concurrency']})")
+    print(f"speed-up x{stats['speedup']:.1f}, results match: {stats['results_match']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# app/bench/fakes.py
+"""
+Local stand-ins for the OpenAI chat and embedding backends and the database.
+
+They mimic the slice of the `ChatOpenAI` / `OpenAIEmbeddings` interfaces
+the agent uses (`invoke(prompt).content`, `ainvoke`, `embed_query`,
+`embed_documents`) and the tools' query helpers, with optional injected
+latency and failures, so routing, caching and benchmarks run without
+network access.
+"""
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+
+@dataclass
+class FakeMessage:
+    content: str
+
+
+class FakeChatModel:
+    """Chat model that answers from a function of the prompt.
+
+    `reply` may be a fixed string or a callable `prompt -> str`; `fail`
+    may be an exception (raised on every call) or a callable returning
+    one (or None) per call.
+    """
+
+    def __init__(self, reply: str | Callable[[str], str] = "ok", latency: float = 0.0,
+                 fail: Exception | Callable[[], Exception | None] | None = None):
+        self.reply = reply
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str) -> str:
+        error = self.fail() if callable(self.fail) else self.fail
+        if error is not None:
+            raise error
+        return self.reply(prompt) if callable(self.reply) else self.reply
+
+    def _respond(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(prompt)
+
+    def invoke(self, prompt: str) -> FakeMessage:
+        return FakeMessage(self._respond(prompt))
+
+    async def ainvoke(self, prompt: str) -> FakeMessage:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return FakeMessage(self._answer(prompt))
+
+    def stream(self, prompt: str, token_latency: float = 0.0):
+        """Yield the reply word by word, like a streamed completion"""
+        for token in re.findall(r"\S+\s*|\s+", self._respond(prompt)):
+            if token_latency:
+                time.sleep(token_latency)
+            yield FakeMessage(token)
+
+
+class FakeEmbeddings:
+    """Deterministic embeddings: a unit vector seeded by the text's hash"""
+
+    def __init__(self, dim: int = 64, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self.texts_embedded = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf8")).digest()[:8], "little")
+        v = np.random.default_rng(seed).normal(size=self.dim)
+        return (v / np.linalg.norm(v)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeDatabase:
+    """Tool-query backend: `reply(query, params) -> DataFrame` after a delay.
+
+    `read` matches `tools._read_sql` and `aread` matches
+    `async_tools._aread_sql`, so either can be monkeypatched in.
+    """
+
+    def __init__(self, reply: Callable, latency: float = 0.0):
+        self.reply = reply
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def read(self, query, params: dict):
+        self._count()
+        if self.latency:
+            time.sleep(self.latency)
+        return self.reply(query, params)
+
+    async def aread(self, query, params: dict):
+        self._count()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.reply(query, params)
@@ -0,0 +1,264 @@
+# app/bench/harness.py
+"""
+Offline agent benchmark.
+
+Runs the eval cases concurrently through the real pipeline (intent router,
+retrieval, prompt builder, LLM router, plan executor, tools on Postgres)
+with the LLM and embeddings replayed from recordings. Retrieval is the
+app's own `get_retriever` (hybrid BM25 and the VECTOR_BACKEND vector
+search) over an index that `build_index` writes to a temporary directory
+from the replayed embeddings. Reports per-stage p50/p95 latency from the
+trace log, end-to-end latency, requests/sec and tool-call accuracy.
+
+A scripted fixture (see `scripted_recordings`) is committed, so the bench
+runs out of the box; `--record` replaces it with live answers.
+
+    python manage.py bench                # replay app/bench/fixtures/recordings.json
+    python manage.py bench --record       # needs OPENAI_API_KEY
+    python manage.py bench --scripted     # rewrite the scripted fixture
+    python manage.py bench --seed         # replace the bench coins' prices with a seeded random walk
+    python manage.py bench --concurrency 8 --repeat 3 --llm-latency 0.6 --vector-backend numpy
+"""
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from app.agents import insight_agent, tracing
+from app.agents.executor import execute_plan
+from app.agents.llm_router import MODELS, ModelRouter, _openai_client, set_router
+from app.agents.schema import COIN_ALIASES
+from app.bench.recordings import (
+    FIXTURE_PATH, Recordings, RecordingChatModel, RecordingEmbeddings, ReplayEmbeddings, replay_chat_model,
+    scripted_recordings,
+)
+from app.context import embedding
+from app.context.bm25 import retrieval_routes
+from app.context.embedding import CachedQueryEmbeddings
+from app.context.vector_cache import CachedEmbeddings, VectorCache
+
+EVAL_CASES_PATH = Path(__file__).parent / "eval_cases.json"
+SEED_COINS = {"bitcoin": 60_000.0, "ethereum": 3_000.0, "solana": 150.0}
+
+
+def load_cases(path: Path = EVAL_CASES_PATH) -> list[dict]:
+    return json.loads(Path(path).read_text(encoding="utf8"))
+
+
+def seed_prices(days: int = 120, seed: int = 42, engine=None) -> int:
+    """Replace the SEED_COINS' prices with a reproducible daily random walk.
+
+    Their rows in `prices` and `price_features` are rewritten (these are
+    the coins the app loads); other coins are left alone. Returns the rows
+    inserted.
+    """
+    from app.db import bump_data_watermark, engine as default_engine, ensure_schema, refresh_ingest_stats
+    from app.etl.build_features import update_features
+
+    if engine is None:
+        ensure_schema()
+    rng = np.random.default_rng(seed)
+    dates = [date.today() - timedelta(days=days - 1 - i) for i in range(days)]
+    rows = []
+    for coin_id, start in SEED_COINS.items():
+        prices = start * np.exp(np.cumsum(rng.normal(0, 0.03, size=days)))
+        rows += [{"coin_id": coin_id, "symbol": coin_id.upper(), "date": d, "price": float(p)}
+                 for d, p in zip(dates, prices)]
+
+    coins = list(SEED_COINS)
+    with (engine or default_engine).begin() as conn:
+        for table in ("price_features", "prices"):
+            conn.execute(text(f"DELETE FROM {table} WHERE coin_id IN :coins")
+                         .bindparams(bindparam("coins", expanding=True)), {"coins": coins})
+        conn.execute(
+            text("INSERT INTO prices (coin_id, symbol, date, price) VALUES (:coin_id, :symbol, :date, :price)"),
+            rows,
+        )
+        update_features(coins, conn)
+        refresh_ingest_stats(conn, coins)
+        bump_data_watermark(conn)
+    return len(rows)
+
+
+def _normalise_params(params: dict) -> dict:
+    params = dict(params)
+    if isinstance(params.get("coin"), str):
+        params["coin"] = COIN_ALIASES.get(params["coin"].lower(), params["coin"].lower())
+    return params
+
+
+def is_correct(case: dict, answer) -> bool:
+    """Does the agent's answer call the expected tool(s) with the expected params?"""
+    expected = case.get("expected_tool")
+    if expected is None:
+        return isinstance(answer, str)
+    if not isinstance(answer, dict):
+        return False
+    steps = answer.get("plan", [answer])
+    if isinstance(expected, list):
+        return [s["function"] for s in steps] == expected
+    params = _normalise_params(steps[0].get("parameters", {}))
+    wanted = _normalise_params(case.get("expected_params", {}))
+    return len(steps) == 1 and steps[0]["function"] == expected and all(
+        params.get(k) == v for k, v in wanted.items()
+    )
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0, "p50": None, "p95": None}
+    return {"n": len(values), "p50": float(np.percentile(values, 50)), "p95": float(np.percentile(values, 95))}
+
+
+def index_texts() -> list[str]:
+    """Chunk texts `build_index` embeds for the app's sources"""
+    return [chunk for source, text in embedding._source_files().items()
+            for _, chunk in embedding.split_source(source, text)]
+
+
+def write_scripted_fixture(path: Path = FIXTURE_PATH, cases: list[dict] | None = None) -> Recordings:
+    """(Re)write a fixture of scripted answers and vectors; needs no network"""
+    recordings = scripted_recordings(cases or load_cases(), index_texts())
+    recordings.save(path)
+    return recordings
+
+
+@contextmanager
+def bench_retrieval(embeddings, index_dir: Path, vector_backend: str | None = None):
+    """Serve the app's `get_retriever` from an index built in `index_dir`.
+
+    `build_index` writes the Chroma, numpy and BM25 indexes there from
+    `embeddings`; the embedding module's singletons are pointed at that
+    index and embedder (with the app's cache layers) until exit, so no
+    OpenAI client is created and the app's own index is untouched.
+    """
+    cached = CachedEmbeddings(embeddings, "bench", VectorCache(Path(index_dir) / "vectors"))
+    query_embeddings = CachedQueryEmbeddings(cached, model_name="bench", path=None)
+    patches = {
+        "CHROMA_DIR": Path(index_dir), "_embed_model": embeddings, "_embeddings": cached,
+        "_query_embeddings": query_embeddings, "_store": None, "_numpy_index": None, "_bm25": None,
+    }
+    if vector_backend:
+        patches["VECTOR_BACKEND"] = vector_backend
+    with mock.patch.multiple(embedding, **patches):
+        embedding.build_index(persist_dir=Path(index_dir), embeddings=cached)
+        yield query_embeddings
+
+
+def _backends(recordings: Recordings, record: bool, llm_latency: float, embed_latency: float):
+    if record:
+        from app.context.embedding import get_embed_model
+        embeddings = RecordingEmbeddings(get_embed_model(), recordings)
+        router = ModelRouter(
+            models=MODELS[:1],
+            client_factory=lambda model: RecordingChatModel(_openai_client(model), model, recordings),
+        )
+    else:
+        embeddings = ReplayEmbeddings(recordings, latency=embed_latency)
+        chat = replay_chat_model(recordings, latency=llm_latency)
+        router = ModelRouter(models=["replay"], client_factory=lambda model: chat)
+    return embeddings, router
+
+
+def _run_case(case: dict) -> dict:
+    t0 = time.perf_counter()
+    answer = insight_agent.ask(case["query"])
+    if isinstance(answer, dict):
+        execute_plan(answer, query=case["query"])
+    return {
+        "query": case["query"],
+        "correct": is_correct(case, answer),
+        "seconds": time.perf_counter() - t0,
+        "answer": answer,
+    }
+
+
+def run(cases: list[dict] | None = None, concurrency: int = 8, repeat: int = 1,
+        llm_latency: float = 0.5, embed_latency: float = 0.05, record: bool = False,
+        fixture: Path = FIXTURE_PATH, vector_backend: str | None = None) -> dict:
+    """Run the eval cases; returns the benchmark report"""
+    cases = cases or load_cases()
+    if record:
+        recordings = Recordings(meta={"recorded_at": date.today().isoformat(), "model": MODELS[0]})
+    else:
+        if not Path(fixture).exists():
+            raise FileNotFoundError(f"No recordings at {fixture}; run `python manage.py bench --record` once")
+        recordings = Recordings.load(fixture)
+
+    embeddings, router = _backends(recordings, record, llm_latency, embed_latency)
+    work_dir = Path(tempfile.mkdtemp(prefix="agent-bench-"))
+    log_path = work_dir / "trace.jsonl"
+
+    with ExitStack() as stack:
+        t0 = time.perf_counter()
+        stack.enter_context(bench_retrieval(embeddings, work_dir / "index", vector_backend))
+        index_seconds = time.perf_counter() - t0
+        routes_before = retrieval_routes()
+        set_router(router)
+        stack.callback(set_router, None)
+        stack.enter_context(mock.patch.object(tracing, "AGENT_LOG_PATH", str(log_path)))
+        # Cache hits would measure the cache, not the agent
+        stack.enter_context(mock.patch.object(insight_agent, "get_response_cache", lambda: None))
+
+        work = [case for _ in range(repeat) for case in cases]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(_run_case, work))
+        elapsed = time.perf_counter() - t0
+        tracing.flush_trace_log()
+        routes = {k: v - routes_before.get(k, 0) for k, v in retrieval_routes().items()}
+        retrieval = {"vector_backend": embedding.VECTOR_BACKEND, "hybrid": embedding.RETRIEVAL_HYBRID,
+                     "routes": routes, "index_seconds": index_seconds}
+
+    stages: dict[str, list[float]] = {}
+    for line in log_path.read_text(encoding="utf8").splitlines():
+        for stage, ms in json.loads(line).get("timings_ms", {}).items():
+            stages.setdefault(stage, []).append(ms)
+
+    if record:
+        recordings.save(fixture)
+
+    correct = sum(r["correct"] for r in results[:len(cases)])
+    return {
+        "cases": len(cases),
+        "requests": len(results),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "req_per_sec": len(results) / elapsed,
+        "accuracy": correct / len(cases),
+        "failed_cases": [r["query"] for r in results[:len(cases)] if not r["correct"]],
+        "end_to_end_ms": _percentiles([r["seconds"] * 1000 for r in results]),
+        "stages_ms": {stage: _percentiles(v) for stage, v in sorted(stages.items())},
+        "retrieval": retrieval,
+        "missing_recordings": dict(recordings.misses),
+        "trace_log": str(log_path),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"{report['requests']} requests ({report['cases']} cases) at concurrency {report['concurrency']} "
+        f"in {report['seconds']:.2f}s → {report['req_per_sec']:.1f} req/s",
+        f"tool-call accuracy: {report['accuracy']:.0%}",
+        f"retrieval: {report['retrieval']['vector_backend']}"
+        f"{' + BM25' if report['retrieval']['hybrid'] else ''} {report['retrieval']['routes']}, "
+        f"index built in {report['retrieval']['index_seconds']:.2f}s",
+    ]
+    rows = {"end_to_end": report["end_to_end_ms"], **report["stages_ms"]}
+    table = pd.DataFrame(rows).T[["n", "p50", "p95"]].round(1)
+    lines += ["", table.to_markdown()]
+    if report["failed_cases"]:
+        lines += ["", "failed: " + "; ".join(report["failed_cases"])]
+    if any(report["missing_recordings"].values()):
+        lines += [f"missing recordings: {report['missing_recordings']} (re-run with --record)"]
+    return "\n".join(lines)
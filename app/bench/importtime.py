@@ -0,0 +1,121 @@
+# app/bench/importtime.py
+"""
+Cold-start report from `python -X importtime`.
+
+Each entry point is imported in a fresh interpreter; the importtime trace
+is parsed into the total, the slowest third-party packages, and any heavy
+package that should only load on first use. `--check` exits non-zero when
+an entry point is over its budget or imports a lazy package eagerly.
+
+    python -m app.bench.importtime
+    python -m app.bench.importtime app.agents.insight_agent --top 20 --check
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+# Entry points and their cold-import budgets (milliseconds, best of a few runs)
+IMPORT_BUDGETS_MS = {
+    "app.agents.insight_agent": 1500,  # Streamlit chat page
+    "app.agents.executor": 1500,
+    "manage": 600,                     # `python manage.py migrate`
+}
+# Loaded on first use only; importing an entry point must not pull these in
+LAZY_PACKAGES = (
+    "langchain", "langchain_core", "langchain_openai", "langchain_community", "openai",
+    "chromadb", "matplotlib", "sklearn", "alembic", "tiktoken",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse(stderr: str) -> list[dict]:
+    """importtime lines as {module, self_ms, cumulative_ms, depth}"""
+    entries = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            entries.append({
+                "module": m.group(4),
+                "self_ms": int(m.group(1)) / 1000,
+                "cumulative_ms": int(m.group(2)) / 1000,
+                "depth": len(m.group(3)) // 2,
+            })
+    return entries
+
+
+def measure(module: str, runs: int = 3) -> list[dict]:
+    """importtime entries of the fastest of `runs` fresh imports of `module`"""
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True,
+        )
+        entries = parse(proc.stderr)
+        if best is None or _total(entries, module) < _total(best, module):
+            best = entries
+    return best
+
+
+def _total(entries: list[dict], module: str) -> float:
+    return next((e["cumulative_ms"] for e in reversed(entries) if e["module"] == module), 0.0)
+
+
+def report(module: str, runs: int = 3, top: int = 10) -> dict:
+    entries = measure(module, runs)
+    by_package: dict[str, float] = defaultdict(float)
+    for e in entries:
+        by_package[e["module"].split(".")[0]] += e["self_ms"]
+    loaded = {e["module"].split(".")[0] for e in entries}
+    total = _total(entries, module)
+    budget = IMPORT_BUDGETS_MS.get(module)
+    return {
+        "module": module,
+        "total_ms": total,
+        "budget_ms": budget,
+        "modules": len(entries),
+        "slowest_packages": sorted(by_package.items(), key=lambda kv: -kv[1])[:top],
+        "eager_lazy_packages": sorted(loaded & set(LAZY_PACKAGES)),
+        "over_budget": budget is not None and total > budget,
+    }
+
+
+def format_report(r: dict) -> str:
+    budget = f" / budget {r['budget_ms']} ms" if r["budget_ms"] else ""
+    lines = [f"{r['module']}: {r['total_ms']:.0f} ms{budget}, {r['modules']} modules"]
+    lines += [f"  {name:24} {ms:8.1f} ms" for name, ms in r["slowest_packages"]]
+    if r["eager_lazy_packages"]:
+        lines.append("  imported eagerly (should be lazy): " + ", ".join(r["eager_lazy_packages"]))
+    if r["over_budget"]:
+        lines.append("  OVER BUDGET")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time report for the app's entry points")
+    parser.add_argument("modules", nargs="*", default=list(IMPORT_BUDGETS_MS))
+    parser.add_argument("--runs", type=int, default=3, help="fresh imports per module; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a budget or lazy-import violation")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        r = report(module, args.runs, args.top)
+        print(format_report(r))
+        failed |= r["over_budget"] or bool(r["eager_lazy_packages"])
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
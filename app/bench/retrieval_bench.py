@@ -0,0 +1,99 @@
+# app/bench/retrieval_bench.py
+"""
+Top-k latency: Chroma vs the in-process numpy index.
+
+Builds one index with `build_index()` over the repo's RAG sources plus
+synthetic padding chunks, then times both backends on the same query
+vectors. Query embedding is excluded (it is identical for both), so the
+numbers are the search itself: langchain + Chroma client + its store
+versus one matrix-vector product. The numpy search is exact, so it also
+gives Chroma's (approximate, HNSW) recall@k.
+
+    python -m app.bench.retrieval_bench --chunks 500 --queries 200
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain.vectorstores import Chroma
+
+from app.bench.fakes import FakeEmbeddings
+from app.context.embedding import INDEX_ROOTS, REPO_ROOT, build_index
+from app.context.numpy_index import NumpyVectorIndex
+
+
+def _corpus(base: Path, chunks: int) -> list[str]:
+    """Copy the RAG sources under `base` and pad with synthetic chunk-sized files"""
+    roots = []
+    for root in INDEX_ROOTS:
+        src = REPO_ROOT / root
+        for p in [src] if src.is_file() else sorted(src.rglob("*")):
+            if p.is_file():
+                dst = base / p.relative_to(REPO_ROOT)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                dst.write_bytes(p.read_bytes())
+        roots.append(root)
+    (base / "padding").mkdir()
+    for i in range(chunks):
+        (base / "padding" / f"{i}.txt").write_text(f"Synthetic note {i}: " + "market context " * 25)
+    return roots + ["padding"]
+
+
+def _percentiles(seconds: list[float]) -> dict:
+    ms = np.array(seconds) * 1000
+    return {"p50": float(np.percentile(ms, 50)), "p95": float(np.percentile(ms, 95))}
+
+
+def run(chunks: int = 500, queries: int = 200, k: int = 4, dim: int = 1536) -> dict:
+    embeddings = FakeEmbeddings(dim=dim)
+    base = Path(tempfile.mkdtemp(prefix="retrieval-bench-"))
+    roots = _corpus(base / "src", chunks)
+    stats = build_index(roots=roots, base=base / "src", persist_dir=base / "index", embeddings=embeddings)
+
+    chroma = Chroma(embedding_function=embeddings, persist_directory=str(base / "index"))
+    index = NumpyVectorIndex(base / "index")
+    vectors = [embeddings.embed_query(f"question {i}") for i in range(queries)]
+
+    timings = {"chroma": [], "numpy": []}
+    found = 0
+    for vector in vectors:
+        t0 = time.perf_counter()
+        chroma_docs = chroma.similarity_search_by_vector(vector, k=k)
+        timings["chroma"].append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        numpy_docs = [index.document(row) for row, _ in index.search(vector, k)]
+        timings["numpy"].append(time.perf_counter() - t0)
+        found += len({d.page_content for d in chroma_docs} & {d.page_content for d in numpy_docs})
+
+    summary = {name: _percentiles(t) for name, t in timings.items()}
+    return {
+        "chunks": len(index),
+        "files": stats["files"],
+        "queries": queries,
+        "k": k,
+        **summary,
+        "speedup_p50": summary["chroma"]["p50"] / summary["numpy"]["p50"],
+        "chroma_recall": found / (queries * k),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare Chroma and numpy top-k latency")
+    parser.add_argument("--chunks", type=int, default=500, help="synthetic chunks added to the RAG sources")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--dim", type=int, default=1536, help="embedding width (text-embedding-3-small: 1536)")
+    args = parser.parse_args(argv)
+
+    stats = run(args.chunks, args.queries, args.k, args.dim)
+    print(f"{stats['chunks']} chunks, {stats['queries']} queries, k={stats['k']}")
+    for name in ("chroma", "numpy"):
+        print(f"{name:6}: p50 {stats[name]['p50']:.3f} ms, p95 {stats[name]['p95']:.3f} ms")
+    print(f"speed-up x{stats['speedup_p50']:.0f} at p50; Chroma recall@{stats['k']} vs exact: {stats['chroma_recall']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
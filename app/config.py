@@ -12,3 +12,39 @@ SQL_ECHO     = os.environ.get("SQL_ECHO", "false").lower() in ("1", "true")
 if os.environ.get("ENVIRONMENT") == "local":
     # Replace 'db' with 'localhost' for local development
     POSTGRES_URL = POSTGRES_URL.replace("@db:", "@localhost:")
+
+# Agent response cache (shared by all Streamlit workers through SQLite)
+RESPONSE_CACHE_ENABLED    = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true")
+RESPONSE_CACHE_TTL        = int(os.environ.get("RESPONSE_CACHE_TTL", "3600"))  # seconds
+# Cosine similarity above which a differently-worded question reuses an answer; empty disables
+RESPONSE_CACHE_SIMILARITY = float(os.environ.get("RESPONSE_CACHE_SIMILARITY") or 0) or None
+
+# Prompt size: system prompt + retrieved context + question, in tokens
+PROMPT_TOKEN_BUDGET        = int(os.environ.get("PROMPT_TOKEN_BUDGET", "2500"))
+PROMPT_SNIPPET_MAX_TOKENS  = int(os.environ.get("PROMPT_SNIPPET_MAX_TOKENS", "400"))
+
+# Agent trace log (JSONL, written by a background thread)
+AGENT_LOG_PATH      = os.environ.get("AGENT_LOG_PATH", "agent.log")  # relative to the working directory
+AGENT_LOG_MAX_BYTES = int(os.environ.get("AGENT_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+AGENT_LOG_BACKUPS   = int(os.environ.get("AGENT_LOG_BACKUPS", "5"))
+AGENT_LOG_COMPRESS  = os.environ.get("AGENT_LOG_COMPRESS", "false").lower() in ("1", "true")
+# Log full prompts instead of their hash
+AGENT_LOG_DEBUG     = os.environ.get("AGENT_LOG_DEBUG", "false").lower() in ("1", "true")
+
+# Health check: a coin whose latest price is older than this many days is reported stale
+FRESHNESS_WARN_DAYS = int(os.environ.get("FRESHNESS_WARN_DAYS", "2"))
+
+# Background ML forecasts (analytics page): worker threads, finished jobs kept, poll interval
+FORECAST_WORKERS       = int(os.environ.get("FORECAST_WORKERS", "2"))
+FORECAST_JOBS_KEPT     = int(os.environ.get("FORECAST_JOBS_KEPT", "32"))
+FORECAST_POLL_SECONDS  = float(os.environ.get("FORECAST_POLL_SECONDS", "0.5"))
+
+# Executed tool results kept per chat session (mostly base64 PNG charts)
+CHAT_RESULTS_MAX_BYTES = int(os.environ.get("CHAT_RESULTS_MAX_BYTES", str(16 * 1024 * 1024)))
+CHAT_RESULT_MAX_BYTES  = int(os.environ.get("CHAT_RESULT_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Retrieval backend: "chroma", or "numpy" for the in-process matrix exported by build_index
+VECTOR_BACKEND      = os.environ.get("VECTOR_BACKEND", "chroma").lower()
+# BM25 first; skip the query embedding when every lexical hit scores at least this
+RETRIEVAL_HYBRID    = os.environ.get("RETRIEVAL_HYBRID", "true").lower() in ("1", "true")
+BM25_MIN_SCORE      = float(os.environ.get("BM25_MIN_SCORE", "4.0"))
@@ -0,0 +1,146 @@
+# app/context/bm25.py
+"""
+BM25 inverted index over the RAG chunks, and a hybrid retriever.
+
+`build_index()` writes `bm25.json` next to the vector index: for every
+term, the precomputed BM25 weight of each chunk containing it, so a query
+is a handful of dict lookups. Identifiers are kept whole (`plot_price`)
+and also split into their parts (`plot`, `price`).
+
+`HybridRetriever` asks BM25 first. When every lexical hit scores at least
+`min_score` (typically a question naming a tool or parameter), those hits
+are returned and the question is never embedded; otherwise lexical and
+vector rankings are merged with reciprocal rank fusion.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+BM25_NAME = "bm25.json"
+K1, B = 1.2, 0.75
+RRF_K = 60
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "me", "of", "on", "or", "show", "that", "the", "this", "to", "what", "which", "with", "you",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in re.findall(r"[a-z0-9_]+", text.lower()):
+        parts = [p for p in token.split("_") if p]
+        tokens += [token] if len(parts) <= 1 else [token, *parts]
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, postings: dict[str, dict[str, float]], documents: list[str], metadatas: list[dict]):
+        self.postings = postings
+        self.documents = documents
+        self.metadatas = metadatas
+
+    @classmethod
+    def build(cls, documents: list[str], metadatas: list[dict]) -> "BM25Index":
+        counts = [Counter(tokenize(doc)) for doc in documents]
+        lengths = [sum(c.values()) for c in counts]
+        avg_len = sum(lengths) / len(lengths) if lengths else 0.0
+        df = Counter(term for c in counts for term in c)
+        n = len(documents)
+        postings: dict[str, dict[str, float]] = {}
+        for row, (c, length) in enumerate(zip(counts, lengths)):
+            norm = K1 * (1 - B + B * length / avg_len)
+            for term, tf in c.items():
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                # str keys: the index round-trips through JSON
+                postings.setdefault(term, {})[str(row)] = idf * tf * (K1 + 1) / (tf + norm)
+        return cls(postings, documents, metadatas)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        data = json.loads((Path(path) / BM25_NAME).read_text(encoding="utf8"))
+        return cls(data["postings"], data["documents"], data["metadatas"])
+
+    def save(self, path: Path) -> None:
+        tmp = Path(path) / (BM25_NAME + ".tmp")
+        tmp.write_text(json.dumps({"postings": self.postings, "documents": self.documents,
+                                   "metadatas": self.metadatas}), encoding="utf8")
+        os.replace(tmp, Path(path) / BM25_NAME)
+
+    def search(self, query: str, k: int = 4) -> list[tuple[int, float]]:
+        """(row, score) of the k best-scoring chunks, best first"""
+        scores: Counter = Counter()
+        for term in set(tokenize(query)):
+            for row, weight in self.postings.get(term, {}).items():
+                scores[int(row)] += weight
+        return scores.most_common(k)
+
+    def document(self, row: int) -> Document:
+        from langchain_core.documents import Document
+        return Document(page_content=self.documents[row], metadata=self.metadatas[row])
+
+
+def is_decisive(hits: list[tuple[int, float]], min_score: float) -> bool:
+    """Are the lexical hits strong enough to skip vector search?"""
+    return bool(hits) and min(score for _, score in hits) >= min_score
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.metadata.get("sha256") or doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int) -> list[Document]:
+    scores: Counter = Counter()
+    docs: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] += 1 / (RRF_K + rank + 1)
+    return [docs[key] for key, _ in scores.most_common(k)]
+
+
+@dataclass
+class HybridRetriever:
+    """BM25 first; the vector retriever only when lexical scores are not decisive"""
+
+    bm25: Any
+    vector: Any
+    k: int = 4
+    min_score: float = 4.0
+
+    def get_relevant_documents(self, query: str) -> list[Document]:
+        hits = self.bm25.search(query, self.k)
+        lexical = [self.bm25.document(row) for row, _ in hits]
+        if is_decisive(hits, self.min_score):
+            _count("lexical")
+            return lexical
+        _count("fused")
+        return reciprocal_rank_fusion([lexical, self.vector.get_relevant_documents(query)], self.k)
+
+    invoke = get_relevant_documents
+
+
+_routes: Counter = Counter()
+_routes_lock = threading.Lock()
+
+
+def _count(route: str) -> None:
+    with _routes_lock:
+        _routes[route] += 1
+
+
+def retrieval_routes() -> dict:
+    """How many hybrid retrievals returned lexical hits alone vs fused results"""
+    with _routes_lock:
+        return dict(_routes)
@@ -1,43 +1,335 @@
 # app/context/embedding.py
+"""
+RAG context: embeddings, the Chroma / numpy / BM25 indexes and retrievers.
+
+langchain, langchain_openai and Chroma are imported on first use, and the
+OpenAI embedding client is created on first use, so importing this module
+(and the agent) stays cheap.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain.vectorstores import Chroma
+from typing import TYPE_CHECKING
+
+import numpy as np
+from app.config import BM25_MIN_SCORE, RETRIEVAL_HYBRID, VECTOR_BACKEND
+from app.context.bm25 import BM25_NAME, BM25Index, HybridRetriever
+from app.context.numpy_index import META_NAME, NumpyRetriever, NumpyVectorIndex
+from app.context.vector_cache import CachedEmbeddings, VectorCache
 from dotenv import load_dotenv
 load_dotenv()  # loads OPENAI_API_KEY from .env
 
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
 # ────────────────────────────────
 
 
-CHROMA_DIR = Path(__file__).parent.parent.parent / "chroma"
-EMBED_MODEL = OpenAIEmbeddings(model="text-embedding-3-small")
+REPO_ROOT = Path(__file__).parent.parent.parent
+CHROMA_DIR = REPO_ROOT / "chroma"
+CACHE_DIR = REPO_ROOT / ".cache"
+EMBED_MODEL_NAME = "text-embedding-3-small"
+
+
+def normalise_query(text: str) -> str:
+    """Cache key for a question: case- and whitespace-insensitive"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class CachedQueryEmbeddings:
+    """Query embeddings behind an in-memory LRU and an on-disk SQLite cache.
+
+    Keys are (model, normalised question), so repeated or trivially
+    re-worded questions skip the remote embedding call. Document
+    embeddings pass straight through to the wrapped model.
+    """
+
+    def __init__(self, base, model_name: str, maxsize: int = 1024,
+                 path: Path | None = CACHE_DIR / "query_embeddings.sqlite3"):
+        self.base = base
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(model TEXT, query TEXT, vector BLOB, PRIMARY KEY (model, query))"
+            )
+            self._db.commit()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = normalise_query(text)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits["memory"] += 1
+                return self._lru[key]
+            row = self._db.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                (self.model_name, key),
+            ).fetchone() if self._db else None
+        if row:
+            vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+            with self._lock:
+                self.hits["disk"] += 1
+                self._remember(key, vector)
+            return vector
+
+        # Round through float32 so memory and disk hits return identical vectors
+        vector = np.asarray(self.base.embed_query(text), dtype=np.float32).tolist()
+        with self._lock:
+            self.misses += 1
+            self._remember(key, vector)
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?)",
+                    (self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes()),
+                )
+                self._db.commit()
+        return vector
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            total = hits + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+
+_embed_model = None
+_embeddings = None
+_query_embeddings = None
+_store = None
+_numpy_index = None
+_bm25 = None
+_store_lock = threading.Lock()
+
+def get_embed_model():
+    """The OpenAI embedding client, created on first use"""
+    global _embed_model
+    with _store_lock:
+        if _embed_model is None:
+            from langchain_openai import OpenAIEmbeddings
+            _embed_model = OpenAIEmbeddings(model=EMBED_MODEL_NAME)
+        return _embed_model
+
+def __getattr__(name: str):
+    # `EMBED_MODEL` used to be built at import; keep the name, build it lazily
+    if name == "EMBED_MODEL":
+        return get_embed_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_embeddings() -> CachedEmbeddings:
+    """The embedding model behind the process-wide content-addressed vector cache"""
+    global _embeddings
+    model = get_embed_model()
+    with _store_lock:
+        if _embeddings is None:
+            _embeddings = CachedEmbeddings(model, EMBED_MODEL_NAME, VectorCache(CACHE_DIR / "embeddings"))
+        return _embeddings
+
+def get_query_embeddings() -> CachedQueryEmbeddings:
+    """The process-wide cached query embedder"""
+    global _query_embeddings
+    embeddings = get_embeddings()
+    with _store_lock:
+        if _query_embeddings is None:
+            _query_embeddings = CachedQueryEmbeddings(embeddings, model_name=EMBED_MODEL_NAME)
+        return _query_embeddings
+
+def built_query_embeddings() -> CachedQueryEmbeddings | None:
+    """The cached query embedder if something has already built it, else None (never builds it)"""
+    return _query_embeddings
+
+def get_store():
+    """The process-wide Chroma store, opened on first use"""
+    global _store
+    embeddings = get_query_embeddings()
+    with _store_lock:
+        if _store is None:
+            from langchain.vectorstores import Chroma
+            _store = Chroma(
+                embedding_function=embeddings,
+                persist_directory=str(CHROMA_DIR)
+            )
+        return _store
+
+def get_numpy_index() -> NumpyVectorIndex:
+    """The process-wide numpy index, loaded on first use"""
+    global _numpy_index
+    with _store_lock:
+        if _numpy_index is None:
+            _numpy_index = NumpyVectorIndex(CHROMA_DIR)
+        return _numpy_index
+
+def get_bm25_index() -> BM25Index | None:
+    """The process-wide BM25 index, or None before `build_index` has written one"""
+    global _bm25
+    with _store_lock:
+        if _bm25 is None and (CHROMA_DIR / BM25_NAME).exists():
+            _bm25 = BM25Index.load(CHROMA_DIR)
+        return _bm25
+
+
+# Incremental index ────────────────────────────────
+INDEX_ROOTS = ["app/prompts", "app/agents/schema.py"]
+INDEX_EXTS = {".txt", ".md", ".py"}
+MANIFEST_NAME = "index_manifest.json"
+EMBED_BATCH_SIZE = 256  # chunks per embedding request
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def _source_files(roots: list[str] = INDEX_ROOTS, base: Path = REPO_ROOT) -> dict[str, str]:
+    """Indexed files as {path relative to `base`: text}"""
+    files = {}
+    for root in roots:
+        root = base / root
+        paths = [root] if root.is_file() else sorted(root.rglob("*"))
+        for p in paths:
+            if p.is_file() and p.suffix in INDEX_EXTS:
+                files[p.relative_to(base).as_posix()] = p.read_text(encoding="utf8")
+    return files
+
 
 def _load_repo_files() -> list[str]:
-    roots = ["app/prompts", "app/agents/schema.py"]
-    exts  = {".txt", ".md", ".py"}
-    files = [p for r in roots for p in Path(r).rglob("*") if p.suffix in exts]
-    return [p.read_text() for p in files]
-
-def build_index() -> None:
-    docs = _load_repo_files()
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=512, chunk_overlap=64
-    )
-    Chroma.from_documents(
-        splitter.create_documents(docs),
-        EMBED_MODEL,
-        persist_directory=str(CHROMA_DIR)
-    ).persist()
+    return list(_source_files().values())
+
+
+def split_source(source: str, text: str) -> list[tuple[str, str]]:
+    """(chunk id, chunk text) pairs; ids are content hashes, so unchanged chunks keep theirs"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=512, chunk_overlap=64)
+    chunks = {}
+    for chunk in splitter.split_text(text):
+        chunks.setdefault(_sha256(f"{source}\0{chunk}"), chunk)
+    return list(chunks.items())
+
+
+def build_index(roots: list[str] = INDEX_ROOTS, base: Path = REPO_ROOT,
+                persist_dir: Path = CHROMA_DIR, embeddings: Embeddings | None = None) -> dict:
+    """Bring the Chroma index in line with the source files, incrementally.
+
+    A manifest of file and chunk hashes is kept next to the index. Only
+    chunks that are new are embedded (in batches of EMBED_BATCH_SIZE, through
+    the vector cache, so text seen before costs no API call);
+    chunks of changed or deleted files that no longer exist are removed.
+    Returns counts of what changed.
+    """
+    from langchain.vectorstores import Chroma
+
+    started = time.perf_counter()
+    embeddings = embeddings or get_embeddings()
+    persist_dir = Path(persist_dir)
+    manifest_path = persist_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else None
+
+    store = Chroma(embedding_function=embeddings, persist_directory=str(persist_dir))
+    if manifest is None:
+        # Index built before chunks had ids: start over once
+        store.delete_collection()
+        store = Chroma(embedding_function=embeddings, persist_directory=str(persist_dir))
+        manifest = {}
+
+    files = _source_files(roots, base)
+    stats = {"files": len(files), "unchanged": 0, "changed": 0, "removed": 0,
+             "chunks_added": 0, "chunks_deleted": 0}
+    to_add: dict[str, tuple[str, dict]] = {}
+    to_delete: set[str] = set()
+
+    for source, text in files.items():
+        file_hash = _sha256(text)
+        old = manifest.get(source)
+        if old and old["sha256"] == file_hash:
+            stats["unchanged"] += 1
+            continue
+        stats["changed"] += 1
+        chunks = split_source(source, text)
+        old_ids = set(old["chunks"]) if old else set()
+        new_ids = [cid for cid, _ in chunks]
+        to_delete |= old_ids - set(new_ids)
+        for i, (cid, chunk) in enumerate(chunks):
+            if cid not in old_ids:
+                to_add[cid] = (chunk, {"source": source, "chunk": i, "sha256": cid, "file_sha256": file_hash})
+        manifest[source] = {"sha256": file_hash, "chunks": new_ids}
+
+    for source in set(manifest) - set(files):
+        stats["removed"] += 1
+        to_delete |= set(manifest.pop(source)["chunks"])
+
+    collection = store._collection
+    if to_delete:
+        collection.delete(ids=sorted(to_delete))
+    ids = list(to_add)
+    for i in range(0, len(ids), EMBED_BATCH_SIZE):
+        batch = ids[i:i + EMBED_BATCH_SIZE]
+        texts = [to_add[cid][0] for cid in batch]
+        collection.upsert(
+            ids=batch,
+            embeddings=embeddings.embed_documents(texts),
+            documents=texts,
+            metadatas=[to_add[cid][1] for cid in batch],
+        )
+
+    if to_add or to_delete or not (persist_dir / META_NAME).exists() or not (persist_dir / BM25_NAME).exists():
+        # Chroma stays the source of truth; the numpy and BM25 indexes get a fresh export
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        NumpyVectorIndex.write(persist_dir, data["ids"], data["documents"], data["metadatas"],
+                               np.asarray(data["embeddings"] or np.zeros((0, 1)), dtype=np.float32))
+        BM25Index.build(data["documents"], data["metadatas"]).save(persist_dir)
+
+    persist_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    stats.update(chunks_added=len(ids), chunks_deleted=len(to_delete),
+                 seconds=time.perf_counter() - started)
+
+    # Reopen the warm stores so they see the updated index
+    global _store, _numpy_index, _bm25
+    with _store_lock:
+        _store = _numpy_index = _bm25 = None
+    return stats
+
+def get_vector_retriever(k: int = 4):
+    if VECTOR_BACKEND == "numpy":
+        return NumpyRetriever(index=get_numpy_index(), embeddings=get_query_embeddings(), k=k)
+    return get_store().as_retriever(search_kwargs={"k": k})
 
 def get_retriever(k: int = 4):
-    store = Chroma(
-        embedding_function=EMBED_MODEL,
-        persist_directory=str(CHROMA_DIR)
-    )
-    return store.as_retriever(search_kwargs={"k": k})
+    bm25 = get_bm25_index() if RETRIEVAL_HYBRID else None
+    if bm25 is None:
+        return get_vector_retriever(k)
+    return HybridRetriever(bm25=bm25, vector=get_vector_retriever(k), k=k, min_score=BM25_MIN_SCORE)
 
 if __name__ == "__main__":
     import sys
     if "build_index" in sys.argv:
-        build_index()
-        print("✅ Chroma index rebuilt at", CHROMA_DIR)
+        stats = build_index()
+        print("✅ Chroma index updated at", CHROMA_DIR, stats)
@@ -0,0 +1,92 @@
+# app/context/numpy_index.py
+"""
+In-process vector index for small corpora.
+
+`build_index()` exports every chunk's embedding, L2-normalised, into one
+float32 matrix (`vectors.f32`, memory-mapped at query time) with the chunk
+texts and metadata alongside (`vectors.json`). Top-k is one matrix-vector
+product and an `argpartition`; there is no client, server or database in
+the query path.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+MATRIX_NAME = "vectors.f32"
+META_NAME = "vectors.json"
+
+
+def normalise_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class NumpyVectorIndex:
+    def __init__(self, path: Path):
+        path = Path(path)
+        meta = json.loads((path / META_NAME).read_text(encoding="utf8"))
+        self.ids: list[str] = meta["ids"]
+        self.documents: list[str] = meta["documents"]
+        self.metadatas: list[dict] = meta["metadatas"]
+        self.dim: int = meta["dim"]
+        if self.ids:
+            self.matrix = np.memmap(path / MATRIX_NAME, dtype=np.float32, mode="r",
+                                    shape=(len(self.ids), self.dim))
+        else:
+            self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+    @staticmethod
+    def write(path: Path, ids: list[str], documents: list[str], metadatas: list[dict], embeddings) -> None:
+        """Replace the index at `path`; readers holding the old files keep working"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        matrix = normalise_rows(embeddings).reshape(len(ids), -1)
+        tmp = path / (MATRIX_NAME + ".tmp")
+        matrix.tofile(tmp)
+        os.replace(tmp, path / MATRIX_NAME)
+        tmp = path / (META_NAME + ".tmp")
+        tmp.write_text(json.dumps({"ids": ids, "documents": documents, "metadatas": metadatas,
+                                   "dim": int(matrix.shape[1])}), encoding="utf8")
+        os.replace(tmp, path / META_NAME)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, vector, k: int = 4) -> list[tuple[int, float]]:
+        """(row, cosine similarity) of the k nearest chunks, best first"""
+        if not len(self) or k <= 0:
+            return []
+        scores = self.matrix @ normalise_rows(vector)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def document(self, row: int) -> Document:
+        from langchain_core.documents import Document
+        return Document(page_content=self.documents[row], metadata=self.metadatas[row])
+
+
+@dataclass
+class NumpyRetriever:
+    """`get_retriever(k)` over a NumpyVectorIndex"""
+
+    index: Any
+    embeddings: Any
+    k: int = 4
+
+    def get_relevant_documents(self, query: str) -> list[Document]:
+        vector = self.embeddings.embed_query(query)
+        return [self.index.document(row) for row, _ in self.index.search(vector, self.k)]
+
+    invoke = get_relevant_documents
@@ -0,0 +1,198 @@
+# app/context/vector_cache.py
+"""
+Persistent, content-addressed embedding cache.
+
+Vectors are keyed by (model name, sha256 of the text) and stored as rows
+of one memory-mapped float32 matrix per model; a small SQLite table maps
+keys to row numbers. A bulk lookup is one SQL query plus one fancy-index
+into the matrix, so cached vectors come back as a single array.
+
+Rows are allocated inside an immediate SQLite transaction, so several
+processes can share a cache directory.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+_SQL_VARS = 900  # stay under SQLite's bound-parameter limit
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+class VectorCache:
+    """(model, sha256(text)) → float32 vector, on disk"""
+
+    def __init__(self, path: Path, initial_rows: int = 1024):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.initial_rows = initial_rows
+        self._lock = threading.Lock()
+        self._maps: dict[str, np.memmap] = {}
+        self._db = sqlite3.connect(str(self.path / "index.sqlite3"), check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS models "
+            "(model TEXT PRIMARY KEY, dim INTEGER, rows INTEGER, capacity INTEGER)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors "
+            "(model TEXT, sha256 TEXT, row INTEGER, PRIMARY KEY (model, sha256))"
+        )
+
+    def _matrix_path(self, model: str) -> Path:
+        return self.path / (re.sub(r"[^A-Za-z0-9._-]", "_", model) + ".f32")
+
+    def _matrix(self, model: str, dim: int, capacity: int) -> np.memmap:
+        """The model's matrix, (re)mapped if another writer has grown it"""
+        matrix = self._maps.get(model)
+        if matrix is None or matrix.shape[0] < capacity:
+            path = self._matrix_path(model)
+            with open(path, "ab") as f:
+                f.truncate(max(path.stat().st_size, capacity * dim * 4))
+            matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+            self._maps[model] = matrix
+        return matrix
+
+    def _model(self, model: str):
+        return self._db.execute("SELECT dim, rows, capacity FROM models WHERE model = ?", (model,)).fetchone()
+
+    def lookup(self, model: str, keys: list[str]) -> tuple[np.ndarray | None, np.ndarray]:
+        """Cached vectors for `keys` as one (n_found, dim) array, and a mask of which keys were found"""
+        found = np.zeros(len(keys), dtype=bool)
+        with self._lock:
+            info = self._model(model)
+            if info is None or not keys:
+                return None, found
+            dim, _, capacity = info
+            rows: dict[str, int] = {}
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _SQL_VARS):
+                chunk = unique[i:i + _SQL_VARS]
+                rows.update(self._db.execute(
+                    f"SELECT sha256, row FROM vectors WHERE model = ? AND sha256 IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall())
+            found = np.array([k in rows for k in keys], dtype=bool)
+            if not found.any():
+                return None, found
+            matrix = self._matrix(model, dim, capacity)
+            return np.array(matrix[[rows[k] for k, hit in zip(keys, found) if hit]]), found
+
+    def add(self, model: str, keys: list[str], vectors) -> None:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not keys:
+            return
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                info = self._model(model)
+                dim = vectors.shape[1]
+                if info is None:
+                    rows, capacity = 0, self.initial_rows
+                    self._db.execute("INSERT INTO models VALUES (?, ?, 0, ?)", (model, dim, capacity))
+                else:
+                    if info[0] != dim:
+                        raise ValueError(f"{model} vectors have dim {info[0]}, got {dim}")
+                    _, rows, capacity = info
+
+                new = {}
+                for key, vector in zip(keys, vectors):
+                    new.setdefault(key, vector)
+                existing = set()
+                for i in range(0, len(new), _SQL_VARS):
+                    chunk = list(new)[i:i + _SQL_VARS]
+                    existing.update(k for (k,) in self._db.execute(
+                        f"SELECT sha256 FROM vectors WHERE model = ? AND sha256 IN ({','.join('?' * len(chunk))})",
+                        [model, *chunk],
+                    ))
+                new = {k: v for k, v in new.items() if k not in existing}
+                if not new:
+                    self._db.execute("COMMIT")
+                    return
+
+                while rows + len(new) > capacity:
+                    capacity *= 2
+                matrix = self._matrix(model, dim, capacity)
+                matrix[rows:rows + len(new)] = np.stack(list(new.values()))
+                matrix.flush()
+                self._db.executemany(
+                    "INSERT INTO vectors VALUES (?, ?, ?)",
+                    [(model, key, rows + i) for i, key in enumerate(new)],
+                )
+                self._db.execute("UPDATE models SET rows = ?, capacity = ? WHERE model = ?",
+                                 (rows + len(new), capacity, model))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            info = self._model(model)
+        return info[1] if info else 0
+
+
+class CachedEmbeddings:
+    """Embedding model behind a VectorCache; only unseen texts reach `base`.
+
+    All misses of one `embed_documents` call go to the model as a single
+    batch.
+    """
+
+    def __init__(self, base, model_name: str, cache: VectorCache):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Vectors for `texts` as one (n, dim) float32 array"""
+        keys = [text_key(t) for t in texts]
+        cached, found = self.cache.lookup(self.model_name, keys)
+        missing = [i for i, hit in enumerate(found) if not hit]
+        with self._stats_lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return cached
+
+        fresh = np.asarray(self.base.embed_documents([texts[i] for i in missing]), dtype=np.float32)
+        self.cache.add(self.model_name, [keys[i] for i in missing], fresh)
+        out = np.empty((len(texts), fresh.shape[1]), dtype=np.float32)
+        out[missing] = fresh
+        if cached is not None:
+            out[found] = cached
+        return out
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist() if texts else []
+
+    def embed_query(self, text: str) -> list[float]:
+        keys = [text_key(text)]
+        cached, found = self.cache.lookup(self.model_name, keys)
+        with self._stats_lock:
+            self.hits += int(found[0])
+            self.misses += int(not found[0])
+        if found[0]:
+            return cached[0].tolist()
+        vector = np.asarray(self.base.embed_query(text), dtype=np.float32)
+        self.cache.add(self.model_name, keys, vector[None, :])
+        return vector.tolist()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0,
+                    "cached_vectors": self.cache.count(self.model_name)}
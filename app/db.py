@@ -1,23 +1,51 @@
 # app/db.py
 from sqlalchemy import create_engine
-from alembic.config import Config
-from alembic import command
+import importlib.util
 import os
+import threading
 from app.config import POSTGRES_URL, SQL_ECHO
 
 # echo=True will print all SQL; flip via SQL_ECHO
 engine = create_engine(POSTGRES_URL, echo=SQL_ECHO, future=True)
 
-def init_db() -> None:
-    """Run Alembic migrations to ensure database is up to date."""
-    # Get the directory containing this file
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Go up one level to the project root
-    project_root = os.path.dirname(current_dir)
+# Checked without importing: asyncpg is only loaded with the async engine
+ASYNC_DB_AVAILABLE = importlib.util.find_spec("asyncpg") is not None
+
+_async_engine = None
+
+def async_url(url: str) -> str:
+    """The same database addressed through the asyncpg driver"""
+    scheme, rest = url.split("://", 1)
+    return f"postgresql+asyncpg://{rest}" if scheme.startswith("postgres") else url
+
+def get_async_engine():
+    """Process-wide async engine (created on first use); needs asyncpg"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import NullPool
+        # Callers usually wrap each request in asyncio.run(); asyncpg
+        # connections are bound to one event loop, so they are not pooled
+        _async_engine = create_async_engine(async_url(POSTGRES_URL), echo=SQL_ECHO, poolclass=NullPool)
+    return _async_engine
+
+_schema_at_head = False
+_heads = None
+_migrate_lock = threading.Lock()
+
+def _alembic_config():
+    """Alembic config for alembic.ini at the project root, or None without one"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     alembic_cfg_path = os.path.join(project_root, "alembic.ini")
-    
-    if os.path.exists(alembic_cfg_path):
-        alembic_cfg = Config(alembic_cfg_path)
+    if not os.path.exists(alembic_cfg_path):
+        return None
+    from alembic.config import Config
+    return Config(alembic_cfg_path)
+
+def _upgrade() -> None:
+    alembic_cfg = _alembic_config()
+    if alembic_cfg is not None:
+        from alembic import command
         command.upgrade(alembic_cfg, "head")
     else:
         # Fallback to raw DDL if alembic.ini not found (for backwards compatibility)
@@ -34,3 +62,91 @@ def init_db() -> None:
                   volume      NUMERIC
                 )
             """))
+
+def init_db() -> None:
+    """Run Alembic migrations to ensure database is up to date.
+
+    Always migrates; `manage.py migrate` (run by entrypoint.sh) uses this.
+    Everything else should call `ensure_schema()`.
+    """
+    global _schema_at_head
+    with _migrate_lock:
+        _upgrade()
+        _schema_at_head = True
+
+def head_revisions() -> set[str]:
+    """Head revision ids of the migration scripts (read from disk once)"""
+    global _heads
+    if _heads is None:
+        from alembic.script import ScriptDirectory
+        _heads = set(ScriptDirectory.from_config(_alembic_config()).get_heads())
+    return _heads
+
+def current_revisions() -> set[str]:
+    """Revisions recorded in the database: one indexed read, no Alembic"""
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT to_regclass('alembic_version')")).scalar() is None:
+            return set()
+        return set(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+def schema_at_head() -> bool:
+    """Cheap version check: is the database at the newest migration?"""
+    if _schema_at_head:
+        return True
+    return _alembic_config() is not None and current_revisions() == head_revisions()
+
+def ensure_schema() -> None:
+    """Migration gate: migrate at most once per process, then a no-op.
+
+    The first call compares the database's revision with the scripts' head
+    and only runs the upgrade when they differ. Later calls (every
+    Streamlit rerun, every ETL run in the same process) return at once.
+    """
+    global _schema_at_head
+    if _schema_at_head:
+        return
+    with _migrate_lock:
+        if _schema_at_head:
+            return
+        if not schema_at_head():
+            _upgrade()
+        _schema_at_head = True
+
+def get_data_watermark() -> int:
+    """Data-version marker for `prices`; caches keyed on it expire when the ETL loads.
+
+    A primary-key read of the one-row `data_version` counter.
+    """
+    from sqlalchemy import text
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version FROM data_version WHERE name = 'prices'")).scalar() or 0
+
+def refresh_ingest_stats(conn, coins: list[str] | None = None) -> None:
+    """Recount `coins` (all when None) of `prices` into `ingest_stats`.
+
+    Call inside the writer's transaction, so the stats commit with the rows
+    they describe; each coin is one range scan of idx_prices_coin_id_date.
+    """
+    from sqlalchemy import bindparam, text
+    if coins is not None and not coins:
+        return
+    where = "" if coins is None else "WHERE coin_id IN :coins"
+    params = {} if coins is None else {"coins": list(coins)}
+
+    def stmt(sql: str):
+        return text(sql).bindparams(bindparam("coins", expanding=True)) if params else text(sql)
+
+    conn.execute(stmt(f"DELETE FROM ingest_stats {where}"), params)
+    conn.execute(stmt(f"""
+        INSERT INTO ingest_stats (coin_id, row_count, latest_date, last_run_at)
+        SELECT coin_id, COUNT(*), MAX(date), CURRENT_TIMESTAMP FROM prices {where} GROUP BY coin_id
+    """), params)
+
+def bump_data_watermark(conn) -> int:
+    """Advance the `prices` data version inside the writer's transaction"""
+    from sqlalchemy import text
+    return conn.execute(text(
+        "UPDATE data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+        "WHERE name = 'prices' RETURNING version"
+    )).scalar()
@@ -0,0 +1,114 @@
+# app/etl/export.py
+"""
+Streaming export of price history to CSV or partitioned Parquet.
+
+Rows come off a server-side cursor in fixed-size chunks and each chunk is
+written before the next is fetched, so peak memory is bounded by the chunk
+size rather than the size of the `prices` table.
+"""
+import csv
+import os
+import time
+from typing import Iterator
+
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from app.db import engine as default_engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_COLUMNS = ["coin_id", "symbol", "date", "price", "market_cap", "volume"]
+NUMERIC_COLUMNS = ["price", "market_cap", "volume"]
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def iter_price_chunks(coins: list[str] | None = None, start=None, end=None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, engine=None) -> Iterator[pd.DataFrame]:
+    """Yield `prices` rows as DataFrames of at most `chunk_size` rows"""
+    conditions, params = [], {}
+    if coins:
+        conditions.append("coin_id IN :coins")
+        params["coins"] = list(coins)
+    if start:
+        conditions.append("date >= :start")
+        params["start"] = pd.to_datetime(start).date()
+    if end:
+        conditions.append("date <= :end")
+        params["end"] = pd.to_datetime(end).date()
+
+    query = text(f"""
+        SELECT {", ".join(EXPORT_COLUMNS)}
+        FROM prices
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY coin_id, date, id
+    """)
+    if coins:
+        query = query.bindparams(bindparam("coins", expanding=True))
+
+    with (engine or default_engine).connect() as conn:
+        # stream_results opens a named (server-side) cursor on PostgreSQL
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query, params)
+        for rows in result.partitions(chunk_size):
+            chunk = pd.DataFrame(rows, columns=EXPORT_COLUMNS)
+            # NUMERIC arrives as Decimal; keep a stable float schema across chunks
+            chunk[NUMERIC_COLUMNS] = chunk[NUMERIC_COLUMNS].astype(float)
+            yield chunk
+
+
+def write_csv(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    """Append chunks to one CSV file; returns rows written"""
+    rows = 0
+    with open(path, "w", newline="", encoding="utf8") as f:
+        csv.writer(f).writerow(EXPORT_COLUMNS)
+        for chunk in chunks:
+            chunk.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    """Write each chunk as new files of a coin_id-partitioned Parquet dataset"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("coin_id", pa.string()), ("symbol", pa.string()), ("date", pa.date32()),
+        ("price", pa.float64()), ("market_cap", pa.float64()), ("volume", pa.float64()),
+    ])
+    rows = 0
+    for i, chunk in enumerate(chunks):
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pq.write_to_dataset(
+            table, root_path=path, partition_cols=["coin_id"],
+            basename_template=f"part-{i:05d}-{{i}}.parquet",
+        )
+        rows += len(chunk)
+    return rows
+
+
+def export_prices(path: str, fmt: str = "csv", coins: list[str] | None = None, start=None, end=None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, engine=None) -> dict:
+    """Stream filtered price history to `path`; returns row count and throughput"""
+    writers = {"csv": write_csv, "parquet": write_parquet}
+    if fmt not in writers:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(writers)}")
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    t0 = time.perf_counter()
+    chunks = iter_price_chunks(coins=coins, start=start, end=end, chunk_size=chunk_size, engine=engine)
+    rows = writers[fmt](chunks, path)
+    elapsed = time.perf_counter() - t0
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else float("inf"),
+        "path": path,
+        "format": fmt,
+    }
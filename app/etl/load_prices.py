@@ -4,7 +4,8 @@ import time
 import httpx
 import pandas as pd
 from sqlalchemy import text
-from app.db import engine, init_db
+from app.db import bump_data_watermark, engine, ensure_schema, refresh_ingest_stats
+from app.etl.build_features import update_features
 
 COINS = ["bitcoin","ethereum","solana"]  # whatever you like
 API = "https://api.coingecko.com/api/v3/coins/{id}/market_chart"
@@ -36,7 +37,7 @@ def fetch_history(coin_id: str, days: int = 30) -> pd.DataFrame:
 
 def load_prices(days: int = 30):
     # Ensure database is initialized before loading data
-    init_db()
+    ensure_schema()
     
     for coin in COINS:
         df = fetch_history(coin, days=days)
@@ -53,8 +54,17 @@ def load_prices(days: int = 30):
                 """),
                 df.to_dict(orient="records")
             )
+            # Health stats and cached dashboard / tool reads see the new rows
+            # from this commit on
+            refresh_ingest_stats(conn, [coin])
+            bump_data_watermark(conn)
         time.sleep(1)  # throttle
     print("✅ Loaded latest prices")
+    
+    with engine.begin() as conn:
+        rows = update_features(COINS, conn)
+        bump_data_watermark(conn)
+    print(f"✅ Updated {rows} feature rows")
 
 if __name__ == "__main__":
     load_prices(days=30)
@@ -0,0 +1,89 @@
+"""
+Cross-asset correlation, volatility and beta on an aligned return matrix.
+
+Input is a dates × coins close matrix (see `indicators.daily_close_matrix`).
+Missing observations are handled pairwise with masked matrix products, so
+coins with shorter histories still pair up without a Python loop.
+"""
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from app.ml.indicators import rolling_apply
+
+TRADING_DAYS = 365  # crypto trades every day
+
+
+def log_return_matrix(close: pd.DataFrame) -> pd.DataFrame:
+    """Daily log returns, one column per coin"""
+    a = close.to_numpy(dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.diff(np.log(a), axis=0)
+    return pd.DataFrame(returns, index=close.index[1:], columns=close.columns)
+
+
+def _pairwise_moments(x: np.ndarray, y: np.ndarray):
+    """Covariance and variances over rows where both sides are observed"""
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    x0, y0 = np.where(mx, x, 0.0), np.where(my, y, 0.0)
+    mx, my = mx.astype(float), my.astype(float)
+
+    n = mx.T @ my
+    sx, sy = x0.T @ my, mx.T @ y0
+    sxx, syy = (x0 ** 2).T @ my, mx.T @ (y0 ** 2)
+    sxy = x0.T @ y0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sxy - sx * sy / n) / (n - 1)
+        var_x = (sxx - sx ** 2 / n) / (n - 1)
+        var_y = (syy - sy ** 2 / n) / (n - 1)
+    return cov, var_x, var_y, n
+
+
+def correlation_matrix(returns: pd.DataFrame, min_periods: int = 5) -> pd.DataFrame:
+    """Pairwise-complete Pearson correlation of every coin against every other"""
+    r = returns.to_numpy(dtype=float)
+    cov, var_x, var_y, n = _pairwise_moments(r, r)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[n < min_periods] = np.nan
+    np.fill_diagonal(corr, 1.0)
+    return pd.DataFrame(np.clip(corr, -1, 1), index=returns.columns, columns=returns.columns)
+
+
+def rolling_volatility(returns: pd.DataFrame, window: int = 7) -> pd.DataFrame:
+    """Annualised rolling standard deviation of log returns"""
+    r = returns.to_numpy(dtype=float)
+    vol = rolling_apply(r, window, partial(np.std, ddof=1)) * np.sqrt(TRADING_DAYS)
+    return pd.DataFrame(vol, index=returns.index, columns=returns.columns)
+
+
+def beta_against(returns: pd.DataFrame, benchmark: str) -> pd.Series:
+    """Beta of each coin against a benchmark column, e.g. bitcoin"""
+    r = returns.to_numpy(dtype=float)
+    b = returns[benchmark].to_numpy(dtype=float)[:, None]
+    cov, _, var_b, _ = _pairwise_moments(r, b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (cov / var_b)[:, 0]
+    return pd.Series(beta, index=returns.columns, name=f"beta_{benchmark}")
+
+
+def correlation_report(close: pd.DataFrame, benchmark: str = "bitcoin", vol_window: int = 7) -> dict:
+    """Correlation matrix plus per-coin volatility and beta in one pass"""
+    returns = log_return_matrix(close)
+    vol = rolling_volatility(returns, window=vol_window)
+
+    stats = pd.DataFrame(index=returns.columns)
+    stats["volatility"] = vol.ffill().iloc[-1] if len(vol) else np.nan
+    stats["full_period_volatility"] = returns.std() * np.sqrt(TRADING_DAYS)
+    if benchmark in returns.columns:
+        stats["beta"] = beta_against(returns, benchmark)
+    stats.index.name = "coin_id"
+
+    return {
+        "correlation": correlation_matrix(returns),
+        "rolling_volatility": vol,
+        "stats": stats,
+        "benchmark": benchmark,
+        "observations": len(returns),
+    }
@@ -5,16 +5,18 @@ Uses multiple models including ARIMA, Linear Regression, and Moving Averages.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import importlib.util
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
-try:
-    from sklearn.linear_model import LinearRegression
-    from sklearn.metrics import mean_absolute_error, mean_squared_error
-    from sklearn.preprocessing import StandardScaler
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+from app.ml.indicators import FEATURE_COLUMNS
+
+# Quantiles reported for bootstrap prediction bands (90% and 50% intervals)
+INTERVAL_QUANTILES = (0.05, 0.25, 0.75, 0.95)
+
+# sklearn takes over a second to import; load it on the first linear fit
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
 
 class CryptoForecaster:
     """Cryptocurrency price forecasting using multiple ML models"""
@@ -30,6 +32,10 @@ class CryptoForecaster:
         data['date'] = pd.to_datetime(data['date'])
         data = data.sort_values('date').reset_index(drop=True)
         
+        # Rows read from price_features already carry every indicator
+        if set(FEATURE_COLUMNS) <= set(data.columns):
+            return data
+        
         # Technical indicators
         data['sma_7'] = data['price'].rolling(window=7).mean()
         data['sma_21'] = data['price'].rolling(window=21).mean()
@@ -76,6 +82,7 @@ class CryptoForecaster:
             return self.simple_moving_average_forecast(prices, forecast_days=forecast_days)
         
         try:
+            from sklearn.linear_model import LinearRegression
             X = np.arange(len(prices)).reshape(-1, 1)
             y = prices.values
             
@@ -174,6 +181,40 @@ class CryptoForecaster:
             'exp_forecast': exp_forecast
         }
     
+    def bootstrap_prediction_intervals(self, prices, point_forecast, n_paths=10_000,
+                                       quantiles=INTERVAL_QUANTILES, seed=None):
+        """Residual bootstrap prediction bands around a point forecast.
+
+        Daily log-return residuals are resampled with replacement into an
+        (n_paths, horizon) array in one shot; their cumulative sums perturb the
+        point forecast multiplicatively, and quantiles are taken across paths.
+        `prices` indexed by timestamp are first reduced to the last close of
+        each day, so intraday rows don't shrink the bands; a plain sequence
+        is taken to be daily already.
+        """
+        start = time.perf_counter()
+        point = np.asarray(point_forecast, dtype=float)
+        if isinstance(getattr(prices, 'index', None), pd.DatetimeIndex):
+            prices = prices.sort_index().groupby(prices.index.normalize()).last()
+        log_prices = np.log(np.asarray(prices, dtype=float))
+        residuals = np.diff(log_prices)
+        residuals = residuals[np.isfinite(residuals)]
+        if len(residuals) < 2 or len(point) == 0:
+            return {}
+        residuals = residuals - residuals.mean()
+
+        rng = np.random.default_rng(seed)
+        draws = residuals[rng.integers(0, len(residuals), size=(n_paths, len(point)))]
+        paths = point * np.exp(np.cumsum(draws, axis=1))
+        bands = np.quantile(paths, quantiles, axis=0)
+
+        return {
+            'quantiles': list(quantiles),
+            'bands': {f"p{round(q * 100):02d}": band.tolist() for q, band in zip(quantiles, bands)},
+            'n_paths': n_paths,
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+        }
+
     def evaluate_model_performance(self, data, test_size=7):
         """Evaluate model performance on recent data"""
         if len(data) < test_size + 10:
@@ -208,21 +249,33 @@ class CryptoForecaster:
         
         return performance
 
-def get_ml_insights(df, coin_name="Cryptocurrency"):
-    """Main function to get ML insights and forecasts"""
+def get_ml_insights(df, coin_name="Cryptocurrency", progress=None):
+    """Main function to get ML insights and forecasts
+
+    `progress(fraction, stage)`, if given, is called as each stage starts.
+    """
+    report = progress or (lambda fraction, stage: None)
     try:
         forecaster = CryptoForecaster()
         
         # Prepare data with technical indicators
+        report(0.0, "Preparing features")
         data = forecaster.prepare_features(df)
         
         # Generate forecasts
+        report(0.2, "Running the forecast ensemble")
         price_forecast = forecaster.ensemble_forecast(data, forecast_days=7)
+        report(0.4, "Bootstrapping prediction intervals")
+        price_forecast['intervals'] = forecaster.bootstrap_prediction_intervals(
+            data.set_index('date')['price'], price_forecast['forecasts']
+        )
         
         # Calculate technical indicators
+        report(0.7, "Analysing the trend")
         trend_analysis = forecaster.calculate_technical_indicators(data)
         
         # Evaluate model performance
+        report(0.85, "Evaluating models")
         model_performance = forecaster.evaluate_model_performance(data)
         
         return {
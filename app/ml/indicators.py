@@ -0,0 +1,187 @@
+"""
+Vectorised technical indicators over a whole coin universe.
+
+Every function works on a wide frame of daily closes (rows = dates,
+columns = coins), so one numpy pass covers all coins at once instead of
+pandas' column-by-column rolling. Window lengths and formulas mirror
+`CryptoForecaster.prepare_features`.
+"""
+import operator
+import re
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Days of history needed before the slowest indicator (EMA 26 + signal 9) settles
+WARMUP_DAYS = 60
+
+# Indicator columns persisted per coin and day in `price_features`
+FEATURE_COLUMNS = [
+    "sma_7", "sma_21", "ema_12", "ema_26", "price_change", "price_change_7d",
+    "volatility", "rsi", "macd", "macd_signal", "bb_middle", "bb_upper", "bb_lower",
+]
+
+SNAPSHOT_COLUMNS = [
+    "price", "change_1d", "change_7d", "sma_7", "sma_21", "sma_cross",
+    "rsi", "macd", "macd_signal", "macd_hist", "macd_trend", "bb_position",
+]
+
+_CONDITION = re.compile(r"^\s*([a-z_0-9]+)\s*(<=|>=|==|!=|<|>)\s*([\w.\-]+)\s*$")
+_OPS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt,
+    ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+
+
+def daily_close_matrix(df: pd.DataFrame) -> pd.DataFrame:
+    """Pivot long (coin_id, date, price) rows into a dates × coins close matrix"""
+    data = df[["coin_id", "date", "price"]].copy()
+    data["date"] = pd.to_datetime(data["date"])
+    data["price"] = data["price"].astype(float)
+    # Intraday points collapse to the last observation of each day
+    return data.pivot_table(index="date", columns="coin_id", values="price", aggfunc="last").sort_index()
+
+
+def daily_closes(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per date, the last observation of each day, from rows in time order"""
+    return df.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+
+
+def rolling_apply(a: np.ndarray, window: int, fn) -> np.ndarray:
+    """Apply a reduction over a trailing window along the date axis"""
+    out = np.full(a.shape, np.nan)
+    if len(a) >= window:
+        out[window - 1:] = fn(sliding_window_view(a, window, axis=0), axis=-1)
+    return out
+
+
+def _ewm_mean(a: np.ndarray, span: int) -> np.ndarray:
+    """pandas `ewm(span=span).mean()` (adjust=True) for every column at once"""
+    decay = 1 - 2 / (span + 1)
+    out = np.empty(a.shape)
+    num = np.zeros(a.shape[1:])
+    den = np.zeros(a.shape[1:])
+    for t in range(len(a)):
+        valid = ~np.isnan(a[t])
+        num = decay * num + np.where(valid, a[t], 0)
+        den = decay * den + valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[t] = num / den
+    return out
+
+
+def _shift(a: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(a.shape, np.nan)
+    out[periods:] = a[:-periods]
+    return out
+
+
+def compute_indicators(close: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """Compute every indicator for all coins; each value is a dates × coins frame"""
+    a = close.to_numpy(dtype=float)
+    ind = {"price": a}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ind["sma_7"] = rolling_apply(a, 7, np.mean)
+        ind["sma_21"] = rolling_apply(a, 21, np.mean)
+        ind["ema_12"] = _ewm_mean(a, 12)
+        ind["ema_26"] = _ewm_mean(a, 26)
+
+        ind["price_change"] = a / _shift(a, 1) - 1
+        ind["price_change_7d"] = a / _shift(a, 7) - 1
+        ind["volatility"] = rolling_apply(ind["price_change"], 7, partial(np.std, ddof=1))
+
+        delta = a - _shift(a, 1)
+        gain = rolling_apply(np.where(delta > 0, delta, 0), 14, np.mean)
+        loss = rolling_apply(np.where(delta < 0, -delta, 0), 14, np.mean)
+        ind["rsi"] = 100 - (100 / (1 + gain / loss))
+
+        ind["macd"] = ind["ema_12"] - ind["ema_26"]
+        ind["macd_signal"] = _ewm_mean(ind["macd"], 9)
+
+        ind["bb_middle"] = rolling_apply(a, 20, np.mean)
+        bb_std = rolling_apply(a, 20, partial(np.std, ddof=1))
+        ind["bb_upper"] = ind["bb_middle"] + bb_std * 2
+        ind["bb_lower"] = ind["bb_middle"] - bb_std * 2
+    return {name: pd.DataFrame(v, index=close.index, columns=close.columns) for name, v in ind.items()}
+
+
+def feature_rows(close: pd.DataFrame) -> pd.DataFrame:
+    """Long (coin_id, date, price, *FEATURE_COLUMNS) rows for every observed close"""
+    ind = compute_indicators(close)
+    long = pd.DataFrame({
+        name: ind[name].stack(future_stack=True) for name in ["price", *FEATURE_COLUMNS]
+    })
+    long.index.names = ["date", "coin_id"]
+    long = long[long["price"].notna()].reset_index()
+    long["date"] = long["date"].dt.date
+    return long
+
+
+def latest_snapshot(close: pd.DataFrame) -> pd.DataFrame:
+    """One row per coin with the latest value of each screenable indicator"""
+    ind = compute_indicators(close)
+    return _snapshot({name: frame.ffill().iloc[-1] for name, frame in ind.items()})
+
+
+def snapshot_from_features(features: pd.DataFrame) -> pd.DataFrame:
+    """Same snapshot, built from the latest `price_features` row of each coin"""
+    last = features.set_index("coin_id")
+    return _snapshot({name: last[name].astype(float) for name in ["price", *FEATURE_COLUMNS]})
+
+
+def _snapshot(last: dict[str, pd.Series]) -> pd.DataFrame:
+    snap = pd.DataFrame(index=last["price"].index)
+    snap["price"] = last["price"]
+    snap["change_1d"] = last["price_change"] * 100
+    snap["change_7d"] = last["price_change_7d"] * 100
+    snap["sma_7"] = last["sma_7"]
+    snap["sma_21"] = last["sma_21"]
+    snap["sma_cross"] = np.where(last["sma_7"] > last["sma_21"], "bullish",
+                                 np.where(last["sma_7"] < last["sma_21"], "bearish", "sideways"))
+    snap["rsi"] = last["rsi"]
+    snap["macd"] = last["macd"]
+    snap["macd_signal"] = last["macd_signal"]
+    snap["macd_hist"] = last["macd"] - last["macd_signal"]
+    snap["macd_trend"] = np.where(snap["macd_hist"] > 0, "bullish", "bearish")
+    band = last["bb_upper"] - last["bb_lower"]
+    # 0 = on the lower band, 1 = on the upper band
+    snap["bb_position"] = (last["price"] - last["bb_lower"]) / band.replace(0, np.nan)
+    snap.index.name = "coin_id"
+    return snap
+
+
+def apply_filters(snapshot: pd.DataFrame, filters: list[str]) -> pd.DataFrame:
+    """Filter a snapshot with declarative conditions such as "rsi < 30",
+    "macd > macd_signal" or "sma_cross == bullish".
+
+    The right-hand side may be a number, another column or a label.
+    Raises ValueError on an unknown column or malformed condition.
+    """
+    mask = np.ones(len(snapshot), dtype=bool)
+    for cond in filters or []:
+        match = _CONDITION.match(cond.lower())
+        if not match:
+            raise ValueError(f"Cannot parse condition '{cond}'")
+        field, op, rhs = match.groups()
+        if field not in snapshot.columns:
+            raise ValueError(f"Unknown field '{field}'")
+
+        lhs = snapshot[field].to_numpy()
+        if rhs in snapshot.columns:
+            value = snapshot[rhs].to_numpy()
+        else:
+            try:
+                value = float(rhs)
+            except ValueError:
+                value = rhs
+        if isinstance(value, str) or lhs.dtype == object:
+            if op not in ("==", "!="):
+                raise ValueError(f"Operator '{op}' not supported for '{field}'")
+            mask &= _OPS[op](lhs.astype(str), value if isinstance(value, str) else value.astype(str))
+        else:
+            # NaN (not enough history) never satisfies a condition
+            with np.errstate(invalid="ignore"):
+                mask &= _OPS[op](lhs.astype(float), value)
+    return snapshot[mask]
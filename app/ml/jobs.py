@@ -0,0 +1,134 @@
+# app/ml/jobs.py
+"""
+Background runner for ML forecasts.
+
+Forecasts run on a small thread pool instead of the Streamlit script
+thread. Jobs are keyed by (coin, data watermark): a request for a key that
+is queued, running or finished (another click, another session) gets that
+job back, so each coin is trained at most once per data load. A job
+reports (fraction, stage) progress as it goes; the analytics page polls
+it and renders the result when it is done. Failed jobs can be resubmitted.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Hashable
+
+from app.config import FORECAST_JOBS_KEPT, FORECAST_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    key: Hashable
+    status: str = "queued"  # queued | running | done | failed
+    progress: float = 0.0
+    stage: str = "Queued"
+    result: Any = None
+    error: str | None = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    def report(self, progress: float, stage: str) -> None:
+        self.progress, self.stage = min(max(progress, 0.0), 1.0), stage
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = FORECAST_WORKERS, max_jobs: int = FORECAST_JOBS_KEPT):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[Hashable, Job] = OrderedDict()
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.reused = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        return self._pool
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args) -> Job:
+        """Run fn(job, *args) in the background, unless `key` already has a job that has not failed"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "failed":
+                self._jobs.move_to_end(key)
+                self.reused += 1
+                return job
+            job = self._jobs[key] = Job(key)
+            self.submitted += 1
+            self._evict()
+            executor = self._executor()
+        executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, key: Hashable) -> Job | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple) -> None:
+        job.status = "running"
+        try:
+            job.result = fn(job, *args)
+            job.report(1.0, "Done")
+            job.status = "done"
+        except Exception as e:
+            logger.exception(f"Job {job.key!r} failed")
+            job.error = str(e)
+            job.status = "failed"
+        job.finished_at = time.monotonic()
+
+    def _evict(self) -> None:
+        # Oldest finished jobs go first; queued and running ones are kept
+        for key in [k for k, j in self._jobs.items() if j.done][:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [j.status for j in self._jobs.values()]
+            return {"jobs": len(statuses), "submitted": self.submitted, "reused": self.reused,
+                    **{s: statuses.count(s) for s in ("queued", "running", "done", "failed")}}
+
+
+def run_forecast(job: Job, coin: str) -> dict:
+    """Features, ensemble forecast and evaluation for one coin"""
+    import pandas as pd
+    from app.agents.tools import load_price_features
+    from app.ml.forecasting import get_ml_insights
+
+    job.report(0.0, "Loading features")
+    features = load_price_features(coin)
+    if features.empty:
+        return {"features": features, "insights": None}
+
+    insights = get_ml_insights(features, coin.upper(),
+                               progress=lambda fraction, stage: job.report(0.1 + 0.9 * fraction, stage))
+    if "error" in insights:
+        raise RuntimeError(insights["error"])
+    last_date = pd.to_datetime(features["date"].iloc[-1])
+    insights["price_forecast"]["forecast_dates"] = [last_date + timedelta(days=i + 1) for i in range(7)]
+    return {"features": features, "insights": insights}
+
+
+_forecast_runner = JobRunner()
+
+
+def get_forecast_runner() -> JobRunner:
+    return _forecast_runner
+
+
+def submit_forecast(coin: str, watermark: int) -> Job:
+    """The forecast job for `coin` at this data version, started if there is none"""
+    return _forecast_runner.submit((coin, watermark), run_forecast, coin)
@@ -1,5 +1,6 @@
 # app/ui/app_streamlit.py
 import os, sys
+import hashlib
 import json
 import pandas as pd
 from datetime import datetime, timedelta
@@ -10,13 +11,24 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 sys.path.insert(0, ROOT)
 
 import streamlit as st
-from app.agents.insight_agent import ask
-from app.agents.tools import get_top_movers, plot_price
-from app.db import init_db, engine
-from sqlalchemy import text
+from app.agents.insight_agent import ask, ask_stream
+from app.agents.executor import execute_plan
+from app.db import ensure_schema
+from app.ui.chat_results import ChatResults
+from app.ui.health import price_table_stats, show_system_status
 
-# Initialize database
-init_db()
+# Result headings per tool in the chat
+TOOL_TITLES = {
+    "get_top_movers": "📊 Market Analysis Results",
+    "plot_price": "📈 Price Chart",
+    "forecast_price": "🔮 Price Forecast",
+    "screen_market": "🔍 Market Screen",
+    "correlation_matrix": "🔗 Correlation & Risk",
+    "error": "❌ Error",
+}
+
+# Migrate on the first run in this process; later reruns skip the check
+ensure_schema()
 
 # Page configuration
 st.set_page_config(
@@ -105,6 +117,27 @@ if "history" not in st.session_state:
     st.session_state.history = []
 if "show_examples" not in st.session_state:
     st.session_state.show_examples = True
+if "tool_results" not in st.session_state:
+    st.session_state.tool_results = ChatResults()
+
+def _result_key(i: int, user_msg: str, spec: dict) -> str:
+    # Position in the history plus content, so a cleared chat never reuses a result
+    digest = hashlib.sha256(json.dumps([user_msg, spec], sort_keys=True, default=str).encode("utf8")).hexdigest()[:12]
+    return f"{i}-{digest}"
+
+def _run_tools(i: int, user_msg: str, spec: dict) -> None:
+    """Execute a tool call or plan and store its rendered steps with the message"""
+    try:
+        steps = execute_plan(spec, query=user_msg)
+    except Exception as e:
+        steps = [{"function": "error", "parameters": {}, "result": f"Sorry, I encountered an issue: {str(e)}"}]
+    st.session_state.tool_results.put(_result_key(i, user_msg, spec), steps)
+
+def _dispatch(user_msg: str, response) -> None:
+    """Record the agent's answer; tool calls run here, once, not on every rerun"""
+    st.session_state.history[-1] = (user_msg, response)
+    if isinstance(response, dict):
+        _run_tools(len(st.session_state.history) - 1, user_msg, response)
 
 # Import dashboard functions
 try:
@@ -127,30 +160,33 @@ with st.sidebar:
     )
     st.markdown("---")
     
-    # Quick stats
+    # Quick stats (counted once per data load, not on every rerun)
     st.markdown("### 📊 Quick Stats")
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT COUNT(DISTINCT coin_id) as coins, COUNT(*) as total_records FROM prices"))
-            stats = result.fetchone()
-            if stats:
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Coins Tracked", stats[0])
-                with col2:
-                    st.metric("Data Points", stats[1])
+        stats = price_table_stats()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Coins Tracked", stats["unique_coins"] if stats["unique_coins"] is not None else "—")
+        with col2:
+            st.metric("Data Points", f"~{stats['total_records']:,}" if stats["estimated"] else stats["total_records"])
     except Exception as e:
         st.warning("Database not ready")
     
     st.markdown("---")
     
+    # System status and cache hit rates
+    st.markdown("### 🩺 System Status")
+    show_system_status()
+    
+    st.markdown("---")
+    
     # Quick actions
     st.markdown("### ⚡ Quick Actions")
     if st.button("🔥 Top Movers (7d)", use_container_width=True):
         st.session_state.history.append(("Show me the top 5 movers over 7 days", None))
         try:
             response = ask("Show me the top 5 movers over 7 days")
-            st.session_state.history[-1] = ("Show me the top 5 movers over 7 days", response)
+            _dispatch("Show me the top 5 movers over 7 days", response)
         except Exception as e:
             st.session_state.history[-1] = ("Show me the top 5 movers over 7 days", f"Error: {e}")
         st.rerun()
@@ -159,7 +195,7 @@ with st.sidebar:
         st.session_state.history.append(("Plot Bitcoin price for the last 30 days", None))
         try:
             response = ask("Plot Bitcoin price for the last 30 days")
-            st.session_state.history[-1] = ("Plot Bitcoin price for the last 30 days", response)
+            _dispatch("Plot Bitcoin price for the last 30 days", response)
         except Exception as e:
             st.session_state.history[-1] = ("Plot Bitcoin price for the last 30 days", f"Error: {e}")
         st.rerun()
@@ -168,7 +204,7 @@ with st.sidebar:
         st.session_state.history.append(("Give me a market analysis of the top cryptocurrencies", None))
         try:
             response = ask("Give me a market analysis of the top cryptocurrencies")
-            st.session_state.history[-1] = ("Give me a market analysis of the top cryptocurrencies", response)
+            _dispatch("Give me a market analysis of the top cryptocurrencies", response)
         except Exception as e:
             st.session_state.history[-1] = ("Give me a market analysis of the top cryptocurrencies", f"Error: {e}")
         st.rerun()
@@ -179,6 +215,7 @@ with st.sidebar:
     st.markdown("### ⚙️ Settings")
     if st.button("🗑️ Clear Chat", use_container_width=True):
         st.session_state.history = []
+        st.session_state.tool_results.clear()
         st.rerun()
     
     show_examples = st.checkbox("Show Example Queries", value=st.session_state.show_examples)
@@ -249,45 +286,31 @@ else:
         # Agent response
         if bot_msg:
             if isinstance(bot_msg, dict):
-                # Handle tool calls
+                # Handle tool calls and multi-tool plans
+                functions = [step['function'] for step in bot_msg.get('plan', [bot_msg])]
                 st.markdown(f"""
                 <div class="agent-message">
                     <strong>🤖 Crypto Insight Agent:</strong><br>
-                    Let me get that information for you using {bot_msg.get('function', 'tools')}...
+                    Let me get that information for you using {', '.join(dict.fromkeys(functions))}...
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Execute the tool and show results
-                try:
-                    if bot_msg.get('function') == 'get_top_movers':
-                        params = bot_msg.get('parameters', {})
-                        result = get_top_movers(
-                            period=params.get('period', '7d'),
-                            limit=params.get('limit', 5)
-                        )
-                        st.markdown(f"""
-                        <div class="agent-message">
-                            <strong>📊 Market Analysis Results:</strong><br>
-                            {result}
-                        </div>
-                        """, unsafe_allow_html=True)
-                    elif bot_msg.get('function') == 'plot_price':
-                        params = bot_msg.get('parameters', {})
-                        result = plot_price(
-                            coin=params.get('coin', 'bitcoin'),
-                            days=params.get('days', 30)
-                        )
-                        st.markdown(f"""
-                        <div class="agent-message">
-                            <strong>📈 Price Chart:</strong><br>
-                            {result}
-                        </div>
-                        """, unsafe_allow_html=True)
-                except Exception as e:
+                # Results were computed when the answer arrived; only an
+                # explicit refresh re-runs the tools
+                if st.button("🔄 Refresh", key=f"refresh_{i}", help="Re-run with the latest data"):
+                    _run_tools(i, user_msg, bot_msg)
+                steps = st.session_state.tool_results.get(_result_key(i, user_msg, bot_msg))
+                if steps is None:
+                    st.markdown("""
+                    <div class="agent-message">
+                        <em>This result was dropped to save memory. Press Refresh to recompute it.</em>
+                    </div>
+                    """, unsafe_allow_html=True)
+                for step in steps or []:
                     st.markdown(f"""
                     <div class="agent-message">
-                        <strong>❌ Error:</strong><br>
-                        Sorry, I encountered an issue: {str(e)}
+                        <strong>{TOOL_TITLES.get(step['function'], '🛠️ Results')}:</strong><br>
+                        {step['result']}
                     </div>
                     """, unsafe_allow_html=True)
             else:
@@ -321,13 +344,29 @@ if submit and user_input:
     # Add user message
     st.session_state.history.append((user_input, None))
     
-    # Show loading state
-    with st.spinner("🤖 Agent is thinking..."):
-        try:
-            response = ask(user_input)
-            st.session_state.history[-1] = (user_input, response)
-        except Exception as e:
-            st.session_state.history[-1] = (user_input, f"❌ Error: {str(e)}")
+    # Stream the answer: tokens render as they arrive, tool calls arrive whole
+    placeholder = st.empty()
+    placeholder.markdown("""
+    <div class="agent-message">
+        <strong>🤖 Crypto Insight Agent:</strong><br>
+        <em>Thinking... 🤔</em>
+    </div>
+    """, unsafe_allow_html=True)
+    try:
+        streamed = ""
+        for kind, value in ask_stream(user_input):
+            if kind == "token":
+                streamed += value
+                placeholder.markdown(f"""
+                <div class="agent-message">
+                    <strong>🤖 Crypto Insight Agent:</strong><br>
+                    {streamed}▌
+                </div>
+                """, unsafe_allow_html=True)
+            else:
+                _dispatch(user_input, value)
+    except Exception as e:
+        st.session_state.history[-1] = (user_input, f"❌ Error: {str(e)}")
     
     st.rerun()
 
@@ -0,0 +1,87 @@
+# app/ui/chat_results.py
+"""
+Executed tool results for the chat history.
+
+A plan runs once, when the agent's answer arrives, and its rendered steps
+are stored here (one store per Streamlit session) instead of being
+re-executed on every rerun. Base64 PNG charts dominate the size, so the
+store is bounded: results over the per-result limit lose their images at
+once, and when the session total is over budget the oldest results lose
+their images first, then whole results are dropped. Anything dropped can
+be recomputed with an explicit refresh.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from app.config import CHAT_RESULT_MAX_BYTES, CHAT_RESULTS_MAX_BYTES
+
+_IMAGE = re.compile(r"!\[[^\]]*\]\(data:image/[^)]*\)")
+EVICTED_IMAGE = "_(chart dropped to save memory; refresh to redraw)_"
+
+
+def _size(steps: list[dict[str, Any]]) -> int:
+    return sum(len(str(step.get("result", ""))) for step in steps)
+
+
+def _strip_images(steps: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [{**step, "result": _IMAGE.sub(EVICTED_IMAGE, str(step.get("result", "")))} for step in steps]
+
+
+class ChatResults:
+    def __init__(self, max_bytes: int = CHAT_RESULTS_MAX_BYTES, max_result_bytes: int = CHAT_RESULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.max_result_bytes = max_result_bytes
+        self._entries: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+        self._stripped: set[str] = set()
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def put(self, key: str, steps: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Store a message's executed steps (replacing older ones); returns what was kept"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._stripped.discard(key)
+            if _size(steps) > self.max_result_bytes:
+                steps = _strip_images(steps)
+                self._stripped.add(key)
+            self._entries[key] = steps
+            self._evict()
+            return self._entries.get(key, steps)
+
+    def get(self, key: str) -> list[dict[str, Any]] | None:
+        with self._lock:
+            return self._entries.get(key)
+
+    def _evict(self) -> None:
+        # Oldest first: drop their charts, then (still over) the results themselves
+        total = self._total()
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                return
+            if key not in self._stripped:
+                before = _size(self._entries[key])
+                self._entries[key] = _strip_images(self._entries[key])
+                self._stripped.add(key)
+                total -= before - _size(self._entries[key])
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, steps = self._entries.popitem(last=False)
+            self._stripped.discard(key)
+            self.evicted += 1
+            total -= _size(steps)
+
+    def _total(self) -> int:
+        return sum(_size(steps) for steps in self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stripped.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"results": len(self._entries), "bytes": self._total(),
+                    "images_dropped": len(self._stripped), "evicted": self.evicted}
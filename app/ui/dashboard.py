@@ -3,9 +3,62 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy import text
 from app.db import engine
+from app.config import FORECAST_POLL_SECONDS
+from app.ml.jobs import get_forecast_runner, submit_forecast
+from app.ui.query_cache import cached_query, get_query_cache
+
+# Partial reruns for polling; `experimental_fragment` before Streamlit 1.37
+_fragment = getattr(st, "fragment", None) or st.experimental_fragment
+
+# Page reads are cached until the ETL bumps the data watermark, so reruns
+# (chat input, widget changes) do not re-query
+
+@cached_query
+def latest_prices() -> pd.DataFrame:
+    return pd.read_sql(text("""
+        SELECT DISTINCT ON (coin_id) 
+            coin_id, symbol, price, date
+        FROM prices 
+        ORDER BY coin_id, date DESC
+    """), engine)
+
+@cached_query
+def price_history_30d() -> pd.DataFrame:
+    return pd.read_sql(text("""
+        SELECT coin_id, symbol, price, date
+        FROM prices 
+        WHERE date >= CURRENT_DATE - INTERVAL '30 days'
+        ORDER BY coin_id, date
+    """), engine)
+
+@cached_query
+def weekly_price_stats() -> pd.DataFrame:
+    return pd.read_sql(text("""
+        WITH price_changes AS (
+            SELECT 
+                coin_id,
+                symbol,
+                price,
+                date,
+                LAG(price, 1) OVER (PARTITION BY coin_id ORDER BY date) as prev_price
+            FROM prices
+            WHERE date >= CURRENT_DATE - INTERVAL '7 days'
+        )
+        SELECT 
+            symbol,
+            ROUND(AVG(price), 2) as avg_price,
+            ROUND(MIN(price), 2) as min_price,
+            ROUND(MAX(price), 2) as max_price,
+            ROUND(STDDEV(price), 2) as volatility,
+            COUNT(*) as data_points
+        FROM price_changes
+        WHERE prev_price IS NOT NULL
+        GROUP BY symbol
+        ORDER BY avg_price DESC
+    """), engine)
 
 def show_dashboard():
     """Display the crypto dashboard with charts and metrics"""
@@ -13,25 +66,9 @@ def show_dashboard():
     st.markdown("### 📊 Crypto Market Dashboard")
     
     try:
-        # Get latest data
-        with engine.connect() as conn:
-            # Latest prices
-            latest_query = text("""
-                SELECT DISTINCT ON (coin_id) 
-                    coin_id, symbol, price, date
-                FROM prices 
-                ORDER BY coin_id, date DESC
-            """)
-            latest_df = pd.read_sql(latest_query, conn)
-            
-            # Price history for charts
-            history_query = text("""
-                SELECT coin_id, symbol, price, date
-                FROM prices 
-                WHERE date >= CURRENT_DATE - INTERVAL '30 days'
-                ORDER BY coin_id, date
-            """)
-            history_df = pd.read_sql(history_query, conn)
+        # Get latest data (cached per data watermark)
+        latest_df = latest_prices()
+        history_df = price_history_30d()
         
         if latest_df.empty:
             st.warning("No data available. Please load some crypto data first.")
@@ -97,39 +134,140 @@ def show_dashboard():
     except Exception as e:
         st.error(f"Error loading dashboard data: {e}")
 
+def _render_forecast(coin: str, forecast_df: pd.DataFrame, insights: dict):
+    """Metrics, model performance, trend and chart of a finished forecast job"""
+    # Display results
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("#### 📈 Price Forecast (7 days)")
+        if 'price_forecast' in insights and 'forecasts' in insights['price_forecast']:
+            forecasts = insights['price_forecast']['forecasts']
+            current_price = forecast_df['price'].iloc[-1]
+            
+            for i, forecast in enumerate(forecasts[:3], 1):
+                change = ((forecast - current_price) / current_price) * 100
+                st.metric(
+                    f"Day +{i}",
+                    f"${forecast:.2f}",
+                    f"{change:+.2f}%"
+                )
+    
+    with col2:
+        st.markdown("#### 🎯 Model Performance")
+        if 'model_performance' in insights:
+            for model_name, metrics in insights['model_performance'].items():
+                st.write(f"**{model_name.title()}**")
+                st.write(f"MAE: ${metrics['mae']:.2f}")
+                if 'rmse' in metrics:
+                    st.write(f"RMSE: ${metrics['rmse']:.2f}")
+    
+    with col3:
+        st.markdown("#### 📊 Trend Analysis")
+        if 'trend_analysis' in insights:
+            trend = insights['trend_analysis']
+            st.metric(
+                "30-day Trend",
+                trend.get('trend_direction', 'N/A').title(),
+                f"{trend.get('price_change_30d', 0):.2f}%"
+            )
+            st.write(f"**RSI:** {trend.get('rsi', 0):.1f} ({trend.get('rsi_signal', 'N/A')})")
+            st.write(f"**Support:** ${trend.get('support_level', 0):.2f}")
+            st.write(f"**Resistance:** ${trend.get('resistance_level', 0):.2f}")
+    
+    # Forecast chart
+    if 'price_forecast' in insights and 'forecasts' in insights['price_forecast']:
+        st.markdown("#### 📈 Price Forecast Visualization")
+        
+        # Prepare data for plotting
+        historical_dates = pd.to_datetime(forecast_df['date'].tail(30))
+        historical_prices = forecast_df['price'].tail(30)
+        
+        forecast_dates = pd.to_datetime(insights['price_forecast']['forecast_dates'])
+        forecast_prices = insights['price_forecast']['forecasts']
+        
+        # Create forecast chart
+        fig_forecast = go.Figure()
+        
+        # Historical data
+        fig_forecast.add_trace(go.Scatter(
+            x=historical_dates,
+            y=historical_prices,
+            mode='lines',
+            name='Historical Price',
+            line=dict(color='blue')
+        ))
+        
+        # Bootstrap prediction bands (outer 90%, inner 50%)
+        bands = insights['price_forecast'].get('intervals', {}).get('bands', {})
+        for lo, hi, label, fill in (
+            ('p05', 'p95', '90% interval', 'rgba(255, 0, 0, 0.10)'),
+            ('p25', 'p75', '50% interval', 'rgba(255, 0, 0, 0.20)'),
+        ):
+            if lo in bands and hi in bands:
+                fig_forecast.add_trace(go.Scatter(
+                    x=forecast_dates,
+                    y=bands[hi],
+                    mode='lines',
+                    line=dict(width=0),
+                    showlegend=False,
+                    hoverinfo='skip'
+                ))
+                fig_forecast.add_trace(go.Scatter(
+                    x=forecast_dates,
+                    y=bands[lo],
+                    mode='lines',
+                    line=dict(width=0),
+                    fill='tonexty',
+                    fillcolor=fill,
+                    name=label
+                ))
+        
+        # Forecast data
+        fig_forecast.add_trace(go.Scatter(
+            x=forecast_dates,
+            y=forecast_prices,
+            mode='lines+markers',
+            name='ML Forecast',
+            line=dict(color='red', dash='dash')
+        ))
+        
+        fig_forecast.update_layout(
+            title=f"{coin.upper()} Price Forecast",
+            xaxis_title="Date",
+            yaxis_title="Price (USD)",
+            height=400
+        )
+        
+        st.plotly_chart(fig_forecast, use_container_width=True)
+
+
+def _show_forecast_job(key: tuple, polling: bool):
+    """Progress of a forecast job while it runs (re-run by the fragment poll), then its result"""
+    job = get_forecast_runner().get(key)
+    if job is None:
+        return
+    if not job.done:
+        st.progress(job.progress, text=f"🤖 {job.stage}...")
+        return
+    if polling:
+        # Finished since the last poll: rerun the page once so polling stops
+        st.rerun()
+    if job.status == "failed":
+        st.error(f"ML forecasting error: {job.error}")
+    elif job.result["insights"] is None:
+        st.warning(f"No data available for {key[0]}")
+    else:
+        _render_forecast(key[0], job.result["features"], job.result["insights"])
+
 def show_analytics():
     """Show advanced analytics with ML forecasting"""
     
     st.markdown("### 🔍 Advanced Analytics")
     
     try:
-        with engine.connect() as conn:
-            # Calculate price changes
-            change_query = text("""
-                WITH price_changes AS (
-                    SELECT 
-                        coin_id,
-                        symbol,
-                        price,
-                        date,
-                        LAG(price, 1) OVER (PARTITION BY coin_id ORDER BY date) as prev_price
-                    FROM prices
-                    WHERE date >= CURRENT_DATE - INTERVAL '7 days'
-                )
-                SELECT 
-                    symbol,
-                    ROUND(AVG(price), 2) as avg_price,
-                    ROUND(MIN(price), 2) as min_price,
-                    ROUND(MAX(price), 2) as max_price,
-                    ROUND(STDDEV(price), 2) as volatility,
-                    COUNT(*) as data_points
-                FROM price_changes
-                WHERE prev_price IS NOT NULL
-                GROUP BY symbol
-                ORDER BY avg_price DESC
-            """)
-            
-            analytics_df = pd.read_sql(change_query, conn)
+        # Price changes over the last week (cached per data watermark)
+        analytics_df = weekly_price_stats()
         
         if not analytics_df.empty:
             col1, col2 = st.columns(2)
@@ -149,6 +287,40 @@ def show_analytics():
                 )
                 st.plotly_chart(fig_vol, use_container_width=True)
         
+        # Correlation & Risk Section
+        st.markdown("---")
+        st.markdown("### 🔗 Correlation & Risk")
+        
+        window = st.selectbox("Correlation window (days):", [30, 90, 180, 365], index=1)
+        from app.agents.tools import correlation_report
+        report = correlation_report(days=window)
+        
+        if report:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.markdown("#### 🧮 Return Correlation")
+                fig_corr = px.imshow(
+                    report['correlation'],
+                    color_continuous_scale='RdBu',
+                    zmin=-1,
+                    zmax=1,
+                    title=f"Daily Log-Return Correlation ({report['observations']} days)"
+                )
+                st.plotly_chart(fig_corr, use_container_width=True)
+            
+            with col2:
+                st.markdown(f"#### ⚖️ Volatility & Beta vs {report['benchmark'].title()}")
+                st.dataframe(report['stats'].round(3), use_container_width=True)
+                fig_roll = px.line(
+                    report['rolling_volatility'],
+                    title="Rolling 7-day Volatility (annualised)",
+                    labels={'value': 'Volatility', 'index': 'Date'}
+                )
+                st.plotly_chart(fig_roll, use_container_width=True)
+        else:
+            st.info("Not enough data for correlation analysis yet.")
+        
         # ML Forecasting Section
         st.markdown("---")
         st.markdown("### 🤖 Machine Learning Forecasting")
@@ -157,114 +329,15 @@ def show_analytics():
         coin_options = ['bitcoin', 'ethereum', 'solana']
         selected_coin = st.selectbox("Select cryptocurrency for ML analysis:", coin_options)
         
+        # Forecasts train on a background pool, once per coin and data load;
+        # a click (from any session) on a coin already in flight reuses that job
+        key = (selected_coin, get_query_cache().watermark())
         if st.button("Generate ML Forecast", type="primary"):
-            with st.spinner("Training ML models and generating forecasts..."):
-                try:
-                    # Get data for selected coin
-                    forecast_query = text("""
-                        SELECT coin_id, symbol, price, date
-                        FROM prices 
-                        WHERE coin_id = :coin_id
-                        ORDER BY date
-                    """)
-                    
-                    forecast_df = pd.read_sql(forecast_query, conn, params={"coin_id": selected_coin})
-                    
-                    if not forecast_df.empty:
-                        # Import and use ML forecasting
-                        from app.ml.forecasting import get_ml_insights
-                        
-                        insights = get_ml_insights(forecast_df, selected_coin.upper())
-                        
-                        # Generate forecast dates
-                        last_date = pd.to_datetime(forecast_df['date'].iloc[-1])
-                        forecast_dates = [last_date + timedelta(days=i+1) for i in range(7)]
-                        insights['price_forecast']['forecast_dates'] = forecast_dates
-                        
-                        # Display results
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            st.markdown("#### 📈 Price Forecast (7 days)")
-                            if 'price_forecast' in insights and 'forecasts' in insights['price_forecast']:
-                                forecasts = insights['price_forecast']['forecasts']
-                                current_price = forecast_df['price'].iloc[-1]
-                                
-                                for i, forecast in enumerate(forecasts[:3], 1):
-                                    change = ((forecast - current_price) / current_price) * 100
-                                    st.metric(
-                                        f"Day +{i}",
-                                        f"${forecast:.2f}",
-                                        f"{change:+.2f}%"
-                                    )
-                        
-                        with col2:
-                            st.markdown("#### 🎯 Model Performance")
-                            if 'model_performance' in insights:
-                                for model_name, metrics in insights['model_performance'].items():
-                                    st.write(f"**{model_name.title()}**")
-                                    st.write(f"MAE: ${metrics['mae']:.2f}")
-                                    st.write(f"RMSE: ${metrics['rmse']:.2f}")
-                        
-                        with col3:
-                            st.markdown("#### 📊 Trend Analysis")
-                            if 'trend_analysis' in insights:
-                                trend = insights['trend_analysis']
-                                st.metric(
-                                    "30-day Trend",
-                                    trend.get('trend_direction', 'N/A').title(),
-                                    f"{trend.get('price_change_30d', 0):.2f}%"
-                                )
-                                st.write(f"**RSI:** {trend.get('rsi', 0):.1f} ({trend.get('rsi_signal', 'N/A')})")
-                                st.write(f"**Support:** ${trend.get('support_level', 0):.2f}")
-                                st.write(f"**Resistance:** ${trend.get('resistance_level', 0):.2f}")
-                        
-                        # Forecast chart
-                        if 'price_forecast' in insights and 'forecasts' in insights['price_forecast']:
-                            st.markdown("#### 📈 Price Forecast Visualization")
-                            
-                            # Prepare data for plotting
-                            historical_dates = pd.to_datetime(forecast_df['date'].tail(30))
-                            historical_prices = forecast_df['price'].tail(30)
-                            
-                            forecast_dates = pd.to_datetime(insights['price_forecast']['forecast_dates'])
-                            forecast_prices = insights['price_forecast']['forecasts']
-                            
-                            # Create forecast chart
-                            fig_forecast = go.Figure()
-                            
-                            # Historical data
-                            fig_forecast.add_trace(go.Scatter(
-                                x=historical_dates,
-                                y=historical_prices,
-                                mode='lines',
-                                name='Historical Price',
-                                line=dict(color='blue')
-                            ))
-                            
-                            # Forecast data
-                            fig_forecast.add_trace(go.Scatter(
-                                x=forecast_dates,
-                                y=forecast_prices,
-                                mode='lines+markers',
-                                name='ML Forecast',
-                                line=dict(color='red', dash='dash')
-                            ))
-                            
-                            fig_forecast.update_layout(
-                                title=f"{selected_coin.upper()} Price Forecast",
-                                xaxis_title="Date",
-                                yaxis_title="Price (USD)",
-                                height=400
-                            )
-                            
-                            st.plotly_chart(fig_forecast, use_container_width=True)
-                    
-                    else:
-                        st.warning(f"No data available for {selected_coin}")
-                        
-                except Exception as e:
-                    st.error(f"ML forecasting error: {str(e)}")
+            submit_forecast(*key)
+        job = get_forecast_runner().get(key)
+        if job is not None:
+            polling = not job.done
+            _fragment(run_every=FORECAST_POLL_SECONDS if polling else None)(_show_forecast_job)(key, polling)
         
     except Exception as e:
         st.error(f"Error loading analytics: {e}")
\ No newline at end of file
@@ -0,0 +1,100 @@
+# app/ui/query_cache.py
+"""
+Watermark-keyed cache for the Streamlit pages' database reads.
+
+Results are keyed by (query name, arguments, data watermark). The ETL bumps
+the watermark in the same transaction as its writes, so a cached result is
+reused across reruns and sessions until new data lands, then re-queried
+once. The watermark itself is read at most every `watermark_ttl` seconds,
+so one rerun costs a single primary-key lookup.
+
+All sessions of a Streamlit server share one process, and so one cache.
+Cached results are shared objects: callers copy before mutating.
+"""
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from app.db import get_data_watermark
+
+
+class QueryCache:
+    def __init__(self, maxsize: int = 64, watermark_ttl: float = 1.0,
+                 watermark: Callable[[], int] = get_data_watermark):
+        self.maxsize = maxsize
+        self.watermark_ttl = watermark_ttl
+        self._watermark_fn = watermark
+        self._watermark: tuple[float, int] | None = None
+        self._entries: OrderedDict = OrderedDict()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def watermark(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if self._watermark and now - self._watermark[0] < self.watermark_ttl:
+                return self._watermark[1]
+        value = self._watermark_fn()
+        with self._lock:
+            self._watermark = (now, value)
+        return value
+
+    def get(self, name: str, fn: Callable[..., Any], *args) -> Any:
+        """fn(*args), reused until the data watermark moves"""
+        key = (name, args, self.watermark())
+        with self._lock:
+            stats = self._stats.setdefault(name, {"hits": 0, "misses": 0})
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                stats["hits"] += 1
+                return self._entries[key]
+            stats["misses"] += 1
+
+        value = fn(*args)
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._watermark = None
+
+    def stats(self) -> dict:
+        """Hit rates per query and overall"""
+        with self._lock:
+            per_query = {
+                name: {**s, "hit_rate": s["hits"] / (s["hits"] + s["misses"])}
+                for name, s in self._stats.items()
+            }
+            hits = sum(s["hits"] for s in self._stats.values())
+            total = hits + sum(s["misses"] for s in self._stats.values())
+            return {
+                "hits": hits,
+                "misses": total - hits,
+                "hit_rate": hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "watermark": self._watermark[1] if self._watermark else None,
+                "queries": per_query,
+            }
+
+
+_query_cache = QueryCache()
+
+
+def get_query_cache() -> QueryCache:
+    return _query_cache
+
+
+def cached_query(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Serve `fn` from the process-wide QueryCache under its own name"""
+    @functools.wraps(fn)
+    def wrapper(*args):
+        return _query_cache.get(fn.__name__, fn, *args)
+    return wrapper
@@ -5,6 +5,12 @@ Usage:
   python manage.py migrate        # Run database migrations
   python manage.py load-data      # Load crypto price data
   python manage.py load-data 7    # Load 7 days of data
+  python manage.py build-features # Backfill technical-indicator features
+  python manage.py export prices.csv [--format csv|parquet] [--coins bitcoin,ethereum]
+                          [--start 2024-01-01] [--end 2024-12-31] [--chunk-size 50000]
+  python manage.py bench [--record | --scripted] [--seed] [--concurrency 8] [--repeat 3]
+                         [--vector-backend chroma|numpy]
+                         [--llm-latency 0.5] [--embed-latency 0.05]
 """
 import sys
 import os
@@ -13,7 +19,6 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.db import init_db
-from app.etl.load_prices import load_prices
 
 def migrate():
     """Run database migrations"""
@@ -23,10 +28,79 @@ def migrate():
 
 def load_data(days=30):
     """Load crypto price data"""
+    from app.etl.load_prices import load_prices
     print(f"📊 Loading {days} days of crypto price data...")
     load_prices(days=days)
     print("✅ Data loading complete")
 
+def build_features():
+    """Compute missing rows of the price_features table"""
+    from app.etl.build_features import update_features
+    from app.etl.load_prices import COINS
+    print("🧮 Building technical-indicator features...")
+    rows = update_features(COINS)
+    print(f"✅ Wrote {rows} feature rows")
+
+def export(args):
+    """Stream price history to CSV or partitioned Parquet"""
+    import argparse
+    from app.etl.export import export_prices, DEFAULT_CHUNK_SIZE
+    
+    parser = argparse.ArgumentParser(prog="manage.py export")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--coins", help="comma-separated coin ids")
+    parser.add_argument("--start", help="first date, YYYY-MM-DD")
+    parser.add_argument("--end", help="last date, YYYY-MM-DD")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    opts = parser.parse_args(args)
+    
+    print(f"📤 Exporting prices to {opts.path} ({opts.format})...")
+    stats = export_prices(
+        opts.path,
+        fmt=opts.format,
+        coins=opts.coins.split(",") if opts.coins else None,
+        start=opts.start,
+        end=opts.end,
+        chunk_size=opts.chunk_size,
+    )
+    print(f"✅ Exported {stats['rows']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+
+def bench(args):
+    """Offline agent benchmark on recorded LLM/embedding responses"""
+    import argparse
+    from app.bench.harness import run, seed_prices, format_report, write_scripted_fixture
+    
+    parser = argparse.ArgumentParser(prog="manage.py bench")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", action="store_true", help="call OpenAI and (re)write the recordings")
+    mode.add_argument("--scripted", action="store_true", help="rewrite the recordings offline from the eval cases")
+    parser.add_argument("--seed", action="store_true",
+                        help="replace the bench coins' prices with a seeded random walk first")
+    parser.add_argument("--vector-backend", choices=["chroma", "numpy"], help="default: VECTOR_BACKEND")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="run every case this many times")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per replayed LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="seconds per replayed embedding call")
+    opts = parser.parse_args(args)
+    
+    if opts.seed:
+        print(f"🌱 Seeded {seed_prices():,} price rows")
+    if opts.scripted:
+        write_scripted_fixture()
+        print("📝 Wrote scripted recordings")
+    mode = "recording live calls" if opts.record else "replaying recordings"
+    print(f"⏱️ Benchmarking the agent ({mode})...")
+    report = run(
+        concurrency=opts.concurrency,
+        repeat=opts.repeat,
+        llm_latency=opts.llm_latency,
+        embed_latency=opts.embed_latency,
+        record=opts.record,
+        vector_backend=opts.vector_backend,
+    )
+    print(format_report(report))
+
 def main():
     if len(sys.argv) < 2:
         print(__doc__)
@@ -39,6 +113,12 @@ def main():
     elif command == "load-data":
         days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
         load_data(days)
+    elif command == "build-features":
+        build_features()
+    elif command == "export":
+        export(sys.argv[2:])
+    elif command == "bench":
+        bench(sys.argv[2:])
     else:
         print(f"Unknown command: {command}")
         print(__doc__)
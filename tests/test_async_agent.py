@@ -0,0 +1,89 @@
+import asyncio
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from app.agents import async_tools, insight_agent
+from app.agents.llm_router import AllModelsFailedError, ModelRouter, set_router
+from app.agents.response_cache import ResponseCache
+from app.bench.fakes import FakeChatModel, FakeDatabase
+
+TOOL_JSON = '{"function": "get_top_movers", "parameters": {"period": "7d", "limit": 2}}'
+
+
+class _NoDocs:
+    def get_relevant_documents(self, question):
+        return []
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    backend = FakeChatModel(TOOL_JSON)
+    set_router(ModelRouter(models=["fake"], client_factory=lambda model: backend))
+    monkeypatch.setattr(insight_agent, "get_retriever", lambda k=4: _NoDocs())
+    monkeypatch.setattr(insight_agent, "get_response_cache", lambda: None)
+    yield backend
+    set_router(None)
+
+
+def test_aask_matches_ask(fake_llm):
+    fake_llm.reply = "Bitcoin is a decentralised digital currency."
+    assert asyncio.run(insight_agent.aask("What is Bitcoin?")) == insight_agent.ask("What is Bitcoin?")
+
+    fake_llm.reply = TOOL_JSON
+    assert asyncio.run(insight_agent.aask("Give me a market analysis")) == json.loads(TOOL_JSON)
+
+
+def test_aask_cache_hit_skips_retrieval(fake_llm, monkeypatch, tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    cache.put("What is Bitcoin?", insight_agent.PROMPT_VERSION, "cached answer", latency=1.0)
+    monkeypatch.setattr(insight_agent, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(insight_agent, "get_retriever", lambda k=4: pytest.fail("retrieved on a cache hit"))
+
+    assert asyncio.run(insight_agent.aask("What is Bitcoin?")) == "cached answer"
+    assert fake_llm.calls == 0
+
+
+def test_aask_many_overlaps_llm_calls_and_keeps_order(fake_llm):
+    fake_llm.latency = 0.1
+    fake_llm.reply = lambda prompt: prompt.rsplit("User: ", 1)[1]
+    questions = [f"Question {i}?" for i in range(8)]
+
+    t0 = time.perf_counter()
+    answers = asyncio.run(insight_agent.aask_many(questions, concurrency=4))
+    elapsed = time.perf_counter() - t0
+
+    assert answers == questions
+    assert elapsed < 0.6  # two waves of 0.1 s, not eight
+
+
+def test_aask_falls_back_when_all_models_fail(fake_llm):
+    fake_llm.fail = RuntimeError("boom")
+    assert asyncio.run(insight_agent.aask("What is Bitcoin?")) == insight_agent.FALLBACK_REPLY
+
+
+def test_ainvoke_fails_over():
+    bad, good = FakeChatModel(fail=RuntimeError("down")), FakeChatModel("hi")
+    router = ModelRouter(models=["a", "b"], client_factory={"a": bad, "b": good}.get)
+    assert asyncio.run(router.ainvoke("x")) == ("hi", "b")
+    assert router.health["a"].failures == 1
+
+    good.fail = RuntimeError("down too")
+    with pytest.raises(AllModelsFailedError):
+        asyncio.run(router.ainvoke("x"))
+
+
+def test_aexecute_calls_runs_tools_concurrently(monkeypatch):
+    frame = pd.DataFrame({"symbol": ["BTC", "ETH"], "pct_change": [4.2, 3.1]})
+    db = FakeDatabase(lambda query, params: frame, latency=0.1)
+    monkeypatch.setattr(async_tools, "_aread_sql", db.aread)
+
+    calls = [json.loads(TOOL_JSON)] * 5
+    t0 = time.perf_counter()
+    results = asyncio.run(async_tools.aexecute_calls(calls))
+
+    assert time.perf_counter() - t0 < 0.3
+    assert db.calls == 5
+    assert all("BTC" in r and "Top 2 movers" in r for r in results)
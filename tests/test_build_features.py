@@ -0,0 +1,94 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.etl.build_features import update_features
+from app.ml.indicators import FEATURE_COLUMNS
+
+START = dt.date(2024, 1, 1)
+
+
+def _prices(days, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for coin, start in (("bitcoin", 60_000.0), ("ethereum", 3_000.0)):
+        closes = start * np.exp(np.cumsum(rng.normal(0, 0.03, days)))
+        for i, close in enumerate(closes):
+            day = START + dt.timedelta(days=i)
+            # an intraday point before each close; the close is loaded last
+            rows += [{"c": coin, "s": coin.upper(), "d": day, "p": float(close) * 0.99},
+                     {"c": coin, "s": coin.upper(), "d": day, "p": float(close)}]
+    return rows
+
+
+def _engine(rows):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE prices (
+              id INTEGER PRIMARY KEY AUTOINCREMENT, coin_id TEXT, symbol TEXT,
+              date DATE, price NUMERIC, market_cap NUMERIC, volume NUMERIC
+            )
+        """))
+        conn.execute(text(f"""
+            CREATE TABLE price_features (
+              coin_id TEXT, date DATE, symbol TEXT, price FLOAT,
+              {", ".join(f"{c} FLOAT" for c in FEATURE_COLUMNS)},
+              PRIMARY KEY (coin_id, date)
+            )
+        """))
+        _insert(conn, rows)
+    return engine
+
+
+def _insert(conn, rows):
+    conn.execute(text("INSERT INTO prices (coin_id, symbol, date, price) VALUES (:c, :s, :d, :p)"), rows)
+
+
+def _features(engine):
+    return pd.read_sql("SELECT * FROM price_features ORDER BY coin_id, date", engine)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")  # sqlite3's default date adapter
+def test_incremental_update_matches_full_recompute():
+    rows = _prices(300)
+    old, new = [r for r in rows if r["d"] < START + dt.timedelta(days=290)], \
+               [r for r in rows if r["d"] >= START + dt.timedelta(days=290)]
+    # The last stored day gets a later close too: it is rewritten, not kept
+    old_last = [r for r in old if r["d"] == START + dt.timedelta(days=289)]
+    revised = [{**r, "p": r["p"] * 1.01} for r in old_last[1::2]]
+
+    incremental = _engine(old)
+    with incremental.begin() as conn:
+        assert update_features(["bitcoin", "ethereum"], conn) == 2 * 290
+    with incremental.begin() as conn:
+        _insert(conn, revised + new)
+        assert update_features(["bitcoin", "ethereum"], conn) == 2 * 11
+
+    full = _engine(old + revised + new)
+    with full.begin() as conn:
+        update_features(["bitcoin", "ethereum"], conn)
+
+    got, want = _features(incremental), _features(full)
+    assert len(got) == len(want) == 2 * 300
+    assert (got[["coin_id", "date", "symbol"]] == want[["coin_id", "date", "symbol"]]).all().all()
+    # EMAs restart FEATURE_WARMUP_DAYS back; the history they drop weighs under 1e-4
+    scale = want["price"].to_numpy()[:, None]
+    diff = np.abs(got[["price", *FEATURE_COLUMNS]].to_numpy(float) - want[["price", *FEATURE_COLUMNS]].to_numpy(float))
+    assert np.nanmax(diff / scale) < 1e-4
+    assert (got[FEATURE_COLUMNS].isna() == want[FEATURE_COLUMNS].isna()).all().all()
+
+
+def test_raw_price_fallback_is_one_close_per_day(monkeypatch):
+    from app.agents import tools
+
+    intraday = pd.DataFrame([{"coin_id": r["c"], "symbol": r["s"], "date": r["d"], "price": r["p"]}
+                             for r in _prices(40) if r["c"] == "bitcoin"])
+    monkeypatch.setattr(tools, "_read_sql",
+                        lambda query, params: pd.DataFrame() if query is tools.PRICE_FEATURES_SQL else intraday)
+    daily = tools.load_price_features("bitcoin")
+    assert len(daily) == 40 and daily["date"].is_unique
+    assert daily["price"].tolist() == intraday["price"].iloc[1::2].tolist()  # each day's close
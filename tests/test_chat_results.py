@@ -0,0 +1,41 @@
+from app.ui.chat_results import EVICTED_IMAGE, ChatResults
+
+CHART = "![chart](data:image/png;base64," + "A" * 1000 + ")"
+
+
+def step(result, function="plot_price_history"):
+    return {"function": function, "parameters": {}, "result": result}
+
+
+def test_stores_and_refreshes_results():
+    results = ChatResults(max_bytes=10_000, max_result_bytes=10_000)
+    results.put("0-abc", [step("**Top movers**")])
+    assert results.get("0-abc")[0]["result"] == "**Top movers**"
+    assert results.get("1-def") is None
+
+    results.put("0-abc", [step("**Top movers (refreshed)**")])
+    assert results.get("0-abc")[0]["result"] == "**Top movers (refreshed)**"
+    assert results.stats()["results"] == 1
+
+
+def test_oversized_result_loses_its_chart():
+    results = ChatResults(max_bytes=10_000, max_result_bytes=500)
+    kept = results.put("0-abc", [step("Bitcoin, 30 days\n" + CHART)])
+    assert kept[0]["result"] == "Bitcoin, 30 days\n" + EVICTED_IMAGE
+    assert results.stats()["images_dropped"] == 1
+
+
+def test_oldest_charts_go_first_then_oldest_results():
+    results = ChatResults(max_bytes=2_500, max_result_bytes=10_000)
+    results.put("0-a", [step("old " + CHART)])
+    results.put("1-b", [step("new " + CHART)])
+    results.put("2-c", [step("newest " + CHART)])
+    assert results.get("0-a")[0]["result"] == "old " + EVICTED_IMAGE
+    assert results.get("2-c")[0]["result"] == "newest " + CHART
+    assert results.stats()["evicted"] == 0
+
+    tight = ChatResults(max_bytes=1_100, max_result_bytes=10_000)
+    tight.put("0-a", [step("x" * 800)])
+    tight.put("1-b", [step("y" * 800)])
+    assert tight.get("0-a") is None and tight.get("1-b") is not None
+    assert tight.stats()["evicted"] == 1
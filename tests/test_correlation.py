@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml.correlation import beta_against, correlation_matrix, correlation_report, log_return_matrix
+
+
+def _close(n_days=120, n_coins=4, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.02, (n_days, 1))
+    returns = market * np.linspace(0.5, 2.0, n_coins) + rng.normal(0, 0.01, (n_days, n_coins))
+    columns = ["bitcoin"] + [f"coin{i}" for i in range(1, n_coins)]
+    index = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=index, columns=columns)
+
+
+def test_correlation_matches_pandas_with_gaps():
+    close = _close()
+    close.iloc[:30, 2] = np.nan  # shorter history for one coin
+    returns = log_return_matrix(close)
+    np.testing.assert_allclose(correlation_matrix(returns).values, returns.corr().values, atol=1e-10)
+
+
+def test_beta_matches_covariance_ratio():
+    returns = log_return_matrix(_close())
+    beta = beta_against(returns, "bitcoin")
+    expected = returns.cov()["bitcoin"] / returns["bitcoin"].var()
+    np.testing.assert_allclose(beta.values, expected.values, atol=1e-10)
+    assert np.isclose(beta["bitcoin"], 1.0)
+
+
+def test_report_for_large_universe_is_fast():
+    close = _close(n_days=365, n_coins=500)
+    start = time.perf_counter()
+    report = correlation_report(close)
+    assert time.perf_counter() - start < 2.0
+    assert report["correlation"].shape == (500, 500)
+    assert {"volatility", "beta"} <= set(report["stats"].columns)
@@ -0,0 +1,36 @@
+from app.bench.fakes import FakeEmbeddings
+from app.context.embedding import CachedQueryEmbeddings, normalise_query
+
+
+def test_normalise_query():
+    assert normalise_query("  Plot   BTC\n30 days ") == "plot btc 30 days"
+
+
+def test_memory_and_disk_hits(tmp_path):
+    base = FakeEmbeddings()
+    path = tmp_path / "q.sqlite3"
+    cache = CachedQueryEmbeddings(base, "fake", path=path)
+
+    first = cache.embed_query("Top movers this week")
+    assert cache.embed_query("top movers   this week") == first
+    assert base.calls == 1
+    assert cache.stats()["memory_hits"] == 1
+
+    # A fresh process-level cache still hits the on-disk tier
+    reopened = CachedQueryEmbeddings(base, "fake", path=path)
+    assert reopened.embed_query("TOP MOVERS THIS WEEK") == first
+    assert base.calls == 1
+    assert reopened.stats() == {"memory_hits": 0, "disk_hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_lru_eviction_and_model_isolation(tmp_path):
+    base = FakeEmbeddings()
+    cache = CachedQueryEmbeddings(base, "fake", maxsize=2, path=None)
+    for q in ("a", "b", "c", "a"):
+        cache.embed_query(q)
+    assert base.calls == 4  # "a" was evicted by "c"
+
+    path = tmp_path / "q.sqlite3"
+    CachedQueryEmbeddings(base, "model-1", path=path).embed_query("same")
+    CachedQueryEmbeddings(base, "model-2", path=path).embed_query("same")
+    assert base.calls == 6
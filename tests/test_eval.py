@@ -22,7 +22,9 @@ def test_tool_calls(case, tmp_path):
     log_file = tmp_path / "agent.log"
     # 2. Run the query via ask()
     from app.agents.insight_agent import ask
+    from app.agents.tracing import flush_trace_log
     ask(case["query"])
+    flush_trace_log()  # trace lines are written by a background thread
     # 3. Read last line of log
     entry = json.loads(log_file.read_text().splitlines()[-1])
     assert entry["tool_call"]["function"] == case["expected_tool"]
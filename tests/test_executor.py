@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from app.agents import executor
+from app.agents.schema import validate_plan
+
+MOVERS = {"function": "get_top_movers", "parameters": {"period": "7d", "limit": 2}}
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    calls, lock = [], threading.Lock()
+
+    def tool(name, delay=0.1):
+        def run(**params):
+            with lock:
+                calls.append((name, params))
+            time.sleep(delay)
+            return f"{name} {sorted(params.items())}"
+        return run
+
+    def movers(period, limit):
+        tool("get_top_movers")(period=period, limit=limit)
+        return "movers table", ["bitcoin", "ethereum", "solana"][:limit]
+
+    monkeypatch.setattr(executor, "TOOL_REGISTRY", {
+        "plot_price": tool("plot_price"),
+        "forecast_price": tool("forecast_price"),
+    })
+    monkeypatch.setattr(executor, "COIN_SOURCES", {"get_top_movers": movers})
+    return calls
+
+
+def test_validate_plan():
+    assert validate_plan(MOVERS) == [MOVERS]
+    fan_out = {"function": "plot_price", "parameters": {"days": 7}, "for_each": 0}
+    assert validate_plan({"plan": [MOVERS, fan_out]}) == [MOVERS, fan_out]
+
+    assert validate_plan({"plan": []}) is None
+    assert validate_plan({"plan": [MOVERS, {"function": "drop_table", "parameters": {}}]}) is None
+    # for_each must point back at an earlier coin-listing step
+    assert validate_plan({"plan": [fan_out, MOVERS]}) is None
+    assert validate_plan({"plan": [MOVERS, {**fan_out, "function": "correlation_matrix"}]}) is None
+    plot = {"function": "plot_price", "parameters": {"coin": "btc", "days": 7}}
+    assert validate_plan({"plan": [plot, {**fan_out, "for_each": 0}]}) is None
+
+
+def test_independent_steps_run_in_parallel_and_dedupe(fake_tools):
+    plot = {"function": "plot_price", "parameters": {"coin": "bitcoin", "days": 7}}
+    forecast = {"function": "forecast_price", "parameters": {"coin": "bitcoin", "days": 7}}
+
+    t0 = time.perf_counter()
+    results = executor.execute_plan({"plan": [plot, forecast, plot]})
+
+    assert time.perf_counter() - t0 < 0.18
+    assert [r["function"] for r in results] == ["plot_price", "forecast_price"]
+    assert len(fake_tools) == 2
+
+
+def test_for_each_fans_out_over_source_coins(fake_tools):
+    plan = {"plan": [MOVERS, {"function": "plot_price", "parameters": {"days": 7}, "for_each": 0}]}
+    results = executor.execute_plan(plan)
+
+    assert results[0]["result"] == "movers table"
+    assert [r["parameters"].get("coin") for r in results[1:]] == ["bitcoin", "ethereum"]
+    assert all(r["function"] == "plot_price" for r in results[1:])
+
+
+def test_single_call_and_invalid_spec(fake_tools):
+    results = executor.execute_plan({"function": "plot_price", "parameters": {"coin": "eth", "days": 3}})
+    assert len(results) == 1 and results[0]["result"].startswith("plot_price")
+
+    with pytest.raises(ValueError):
+        executor.execute_plan({"function": "plot_price", "parameters": {"coin": "eth"}})
+
+
+def test_tool_errors_become_results(fake_tools, monkeypatch):
+    def broken(**params):
+        raise RuntimeError("db down")
+    monkeypatch.setitem(executor.TOOL_REGISTRY, "plot_price", broken)
+
+    results = executor.execute_plan({"function": "plot_price", "parameters": {"coin": "eth", "days": 3}})
+    assert results[0]["result"] == "Error running plot_price: db down"
@@ -0,0 +1,54 @@
+import datetime as dt
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.etl.export import export_prices, iter_price_chunks
+
+
+@pytest.fixture
+def price_engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE prices (
+              id INTEGER PRIMARY KEY AUTOINCREMENT, coin_id TEXT, symbol TEXT,
+              date DATE, price NUMERIC, market_cap NUMERIC, volume NUMERIC
+            )
+        """))
+        conn.execute(
+            text("INSERT INTO prices (coin_id, symbol, date, price) VALUES (:c, :s, :d, :p)"),
+            [
+                {"c": coin, "s": coin.upper(), "d": dt.date(2024, 1, 1) + dt.timedelta(days=i), "p": 100.0 + i}
+                for coin in ("bitcoin", "ethereum", "solana")
+                for i in range(10)
+            ],
+        )
+    return engine
+
+
+def test_chunks_are_bounded_and_filtered(price_engine):
+    chunks = list(iter_price_chunks(coins=["bitcoin", "solana"], start="2024-01-03", end="2024-01-08",
+                                    chunk_size=4, engine=price_engine))
+    assert all(len(c) <= 4 for c in chunks)
+    rows = pd.concat(chunks)
+    assert len(rows) == 12
+    assert set(rows["coin_id"]) == {"bitcoin", "solana"}
+
+
+def test_csv_export(price_engine, tmp_path):
+    out = tmp_path / "prices.csv"
+    stats = export_prices(str(out), chunk_size=7, engine=price_engine)
+    assert stats["rows"] == 30 and stats["rows_per_sec"] > 0
+    df = pd.read_csv(out)
+    assert len(df) == 30
+    assert df["price"].max() == 109.0
+
+
+def test_parquet_export_is_partitioned(price_engine, tmp_path):
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "prices_parquet"
+    export_prices(str(out), fmt="parquet", chunk_size=7, engine=price_engine)
+    assert {p.name for p in out.iterdir()} == {"coin_id=bitcoin", "coin_id=ethereum", "coin_id=solana"}
+    assert len(pd.read_parquet(out)) == 30
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.ml.jobs import JobRunner, run_forecast
+
+
+def _wait(job, timeout=10):
+    for _ in range(int(timeout / 0.01)):
+        if job.done:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"{job.key} did not finish")
+
+
+def test_identical_requests_share_one_job():
+    release = threading.Event()
+    runs = []
+
+    def slow(job, coin):
+        runs.append(coin)
+        job.report(0.5, "Training")
+        release.wait(5)
+        return f"forecast for {coin}"
+
+    runner = JobRunner(max_workers=2)
+    first = runner.submit(("bitcoin", 7), slow, "bitcoin")
+    again = runner.submit(("bitcoin", 7), slow, "bitcoin")  # a second click while in flight
+    newer = runner.submit(("bitcoin", 8), slow, "bitcoin")  # new data: a new job
+    assert again is first and newer is not first
+
+    release.set()
+    assert _wait(first).result == "forecast for bitcoin" and first.progress == 1.0
+    _wait(newer)
+    assert runs == ["bitcoin", "bitcoin"]
+    assert runner.stats()["reused"] == 1 and runner.stats()["done"] == 2
+
+
+def test_failed_jobs_can_be_resubmitted():
+    runner = JobRunner(max_workers=1)
+    failed = _wait(runner.submit("k", lambda job: 1 / 0))
+    assert failed.status == "failed" and "division" in failed.error
+    assert _wait(runner.submit("k", lambda job: "ok")).result == "ok"
+
+
+def test_only_finished_jobs_are_evicted():
+    runner = JobRunner(max_workers=1, max_jobs=2)
+    for i in range(4):
+        _wait(runner.submit(i, lambda job: None))
+    assert runner.get(0) is None and runner.get(3) is not None
+    assert runner.stats()["jobs"] == 2
+
+
+def test_forecast_job_reports_progress(monkeypatch):
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.03, 60)))
+    features = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=60), "price": prices})
+    monkeypatch.setattr("app.agents.tools.load_price_features", lambda coin: features)
+
+    seen = []
+
+    def recorded(job, coin):
+        report = job.report
+        job.report = lambda progress, stage: seen.append(progress) or report(progress, stage)
+        return run_forecast(job, coin)
+
+    job = _wait(JobRunner().submit(("bitcoin", 1), recorded, "bitcoin"))
+    assert job.status == "done" and job.progress == 1.0
+    assert len(seen) >= 5 and seen == sorted(seen)
+    assert len(job.result["insights"]["price_forecast"]["forecast_dates"]) == 7
@@ -0,0 +1,72 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml.forecasting import CryptoForecaster, get_ml_insights
+
+
+def _price_frame(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    dates = pd.date_range("2024-01-01", periods=n, freq="D")
+    return pd.DataFrame({"date": dates, "price": prices})
+
+
+def test_bootstrap_bands_are_ordered_and_widen():
+    df = _price_frame()
+    point = [df["price"].iloc[-1]] * 30
+    out = CryptoForecaster().bootstrap_prediction_intervals(df["price"], point, seed=1)
+
+    bands = out["bands"]
+    assert set(bands) == {"p05", "p25", "p75", "p95"}
+    p05, p25, p75, p95 = (np.array(bands[k]) for k in ("p05", "p25", "p75", "p95"))
+    assert (p05 <= p25).all() and (p25 <= p75).all() and (p75 <= p95).all()
+    # uncertainty grows with the horizon
+    assert (p95 - p05)[-1] > (p95 - p05)[0]
+
+
+def test_bootstrap_bands_use_daily_residuals_for_intraday_input():
+    rng = np.random.default_rng(2)
+    hours = pd.date_range("2024-01-01", periods=120 * 24, freq="h")
+    hourly = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.03 / np.sqrt(24), len(hours)))), index=hours)
+    daily = hourly.groupby(hourly.index.normalize()).last()
+    point = [daily.iloc[-1]] * 7
+    forecaster = CryptoForecaster()
+
+    def width(prices):
+        bands = forecaster.bootstrap_prediction_intervals(prices, point, seed=1)["bands"]
+        return np.array(bands["p95"]) - np.array(bands["p05"])
+
+    np.testing.assert_allclose(width(hourly), width(daily))
+    # hourly residuals taken as daily would be ~sqrt(24) too narrow
+    assert (width(hourly) / width(hourly.to_numpy()) > 3).all()
+
+    insights = get_ml_insights(hourly.rename("price").rename_axis("date").reset_index(), "TEST")
+    bands = insights["price_forecast"]["intervals"]["bands"]
+    assert bands["p95"][0] - bands["p05"][0] > 0.05 * point[0]
+
+
+def test_bootstrap_latency_budget():
+    df = _price_frame(365)
+    point = [df["price"].iloc[-1]] * 30
+    forecaster = CryptoForecaster()
+    forecaster.bootstrap_prediction_intervals(df["price"], point)  # warm up
+
+    best = min(
+        _timed(lambda: forecaster.bootstrap_prediction_intervals(df["price"], point, n_paths=10_000))
+        for _ in range(5)
+    )
+    assert best < 0.050, f"10k x 30 bootstrap took {best * 1000:.1f} ms"
+
+
+def test_ml_insights_include_intervals():
+    insights = get_ml_insights(_price_frame(), "TEST")
+    intervals = insights["price_forecast"]["intervals"]
+    assert len(intervals["bands"]["p05"]) == len(insights["price_forecast"]["forecasts"])
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
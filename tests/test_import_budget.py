@@ -0,0 +1,21 @@
+import pytest
+
+from app.bench.importtime import IMPORT_BUDGETS_MS, parse, report
+
+
+def test_parse_importtime_lines():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     numpy.core\n"
+        "import time:      2000 |       2120 |   numpy\n"
+    )
+    entries = parse(stderr)
+    assert [e["module"] for e in entries] == ["numpy.core", "numpy"]
+    assert entries[1]["cumulative_ms"] == 2.12 and entries[0]["depth"] == 2
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_cold_start_stays_within_budget(module):
+    r = report(module, runs=3, top=0)
+    assert r["eager_lazy_packages"] == [], f"{module} imports heavy packages eagerly"
+    assert not r["over_budget"], f"{module} took {r['total_ms']:.0f} ms (budget {r['budget_ms']} ms)"
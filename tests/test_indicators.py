@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.forecasting import CryptoForecaster
+from app.ml.indicators import (
+    apply_filters, compute_indicators, daily_close_matrix, feature_rows, latest_snapshot, snapshot_from_features,
+)
+
+
+def _universe(n_coins=3, n_days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, (n_days, n_coins)), axis=0))
+    return pd.DataFrame(prices, index=dates, columns=[f"coin{i}" for i in range(n_coins)])
+
+
+def test_indicators_match_single_coin_features():
+    close = _universe()
+    wide = compute_indicators(close)
+    single = CryptoForecaster().prepare_features(
+        pd.DataFrame({"date": close.index, "price": close["coin1"].values})
+    )
+    for name in ("sma_21", "rsi", "macd", "macd_signal", "bb_upper"):
+        np.testing.assert_allclose(wide[name]["coin1"].values, single[name].values, equal_nan=True)
+
+
+def test_daily_close_matrix_keeps_last_intraday_point():
+    df = pd.DataFrame({
+        "coin_id": ["btc", "btc", "eth"],
+        "date": ["2024-01-01", "2024-01-01", "2024-01-01"],
+        "price": [1.0, 2.0, 3.0],
+    })
+    close = daily_close_matrix(df)
+    assert close.loc["2024-01-01", "btc"] == 2.0
+
+
+def test_apply_filters():
+    snap = latest_snapshot(_universe(n_coins=50))
+    oversold = apply_filters(snap, ["rsi < 50", "macd_trend == bullish"])
+    assert (oversold["rsi"] < 50).all()
+    assert (oversold["macd_trend"] == "bullish").all()
+    assert len(apply_filters(snap, ["macd > macd_signal"])) == (snap["macd_hist"] > 0).sum()
+    with pytest.raises(ValueError):
+        apply_filters(snap, ["volume > 3"])
+    with pytest.raises(ValueError):
+        apply_filters(snap, ["rsi ~ 3"])
+
+
+def test_screen_thousands_of_coins_quickly():
+    close = _universe(n_coins=5000)
+    start = time.perf_counter()
+    apply_filters(latest_snapshot(close), ["rsi < 30", "sma_cross == bullish"])
+    assert time.perf_counter() - start < 1.0
+
+
+def test_snapshot_from_feature_rows_matches_wide_snapshot():
+    close = _universe(n_coins=5)
+    rows = feature_rows(close)
+    latest = rows.sort_values("date").groupby("coin_id").tail(1)
+    pd.testing.assert_frame_equal(
+        snapshot_from_features(latest).sort_index(), latest_snapshot(close).sort_index(), check_freq=False
+    )
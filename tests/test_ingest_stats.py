@@ -0,0 +1,54 @@
+import datetime as dt
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db import refresh_ingest_stats
+from app.ui.health import summarise_ingest
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE prices (coin_id TEXT, symbol TEXT, date DATE, price NUMERIC)"))
+        conn.execute(text(
+            "CREATE TABLE ingest_stats (coin_id TEXT PRIMARY KEY, row_count INTEGER, latest_date DATE, last_run_at TIMESTAMP)"
+        ))
+        conn.execute(
+            text("INSERT INTO prices VALUES (:c, :s, :d, 1.0)"),
+            [{"c": coin, "s": coin.upper(), "d": dt.date(2024, 1, 1) + dt.timedelta(days=i)}
+             for coin, days in (("bitcoin", 10), ("ethereum", 5)) for i in range(days)],
+        )
+        yield conn
+
+
+def _stats(conn):
+    return conn.execute(text("SELECT coin_id, row_count, latest_date FROM ingest_stats ORDER BY coin_id")).fetchall()
+
+
+def test_refresh_recounts_only_the_loaded_coins(conn):
+    refresh_ingest_stats(conn)
+    assert _stats(conn) == [("bitcoin", 10, "2024-01-10"), ("ethereum", 5, "2024-01-05")]
+
+    conn.execute(text("INSERT INTO prices VALUES ('bitcoin', 'BITCOIN', '2024-01-11', 1.0)"))
+    conn.execute(text("DELETE FROM prices WHERE coin_id = 'ethereum'"))
+    refresh_ingest_stats(conn, ["bitcoin"])
+    assert _stats(conn) == [("bitcoin", 11, "2024-01-11"), ("ethereum", 5, "2024-01-05")]
+
+    refresh_ingest_stats(conn, ["ethereum"])  # no rows left: dropped from the stats
+    assert _stats(conn) == [("bitcoin", 11, "2024-01-11")]
+
+
+def test_summary_reports_freshness_lag():
+    now = dt.datetime(2024, 1, 12, 12, 0, tzinfo=dt.timezone.utc)
+    rows = [
+        ("bitcoin", 11, dt.date(2024, 1, 11), now - dt.timedelta(hours=2)),
+        ("ethereum", 5, dt.date(2024, 1, 5), now - dt.timedelta(days=7)),
+    ]
+    summary = summarise_ingest(rows, now)
+    assert summary["total_records"] == 16 and summary["unique_coins"] == 2
+    assert summary["latest_date"] == dt.date(2024, 1, 11)
+    assert summary["lag_days"] == 7 and summary["stale_coins"] == ["ethereum"]
+    assert summary["since_last_run"] == 7200
+    assert summary["coins"]["bitcoin"]["lag_days"] == 1
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from app.agents import insight_agent
+from app.agents.llm_router import ModelRouter, set_router
+from app.agents.tracing import flush_trace_log
+from app.bench.fakes import FakeChatModel
+
+TOOL_JSON = '{"function": "get_top_movers", "parameters": {"period": "7d", "limit": 5}}'
+
+
+class _NoDocs:
+    def get_relevant_documents(self, question):
+        return []
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    backend = FakeChatModel()
+    set_router(ModelRouter(models=["fake"], client_factory=lambda model: backend))
+    monkeypatch.setattr(insight_agent, "get_retriever", lambda k=4: _NoDocs())
+    monkeypatch.setattr(insight_agent, "get_response_cache", lambda: None)
+    yield backend
+    set_router(None)
+
+
+def test_prose_is_streamed_token_by_token(fake_llm):
+    fake_llm.reply = "Bitcoin is a decentralised digital currency."
+    events = list(insight_agent.ask_stream("What is Bitcoin?"))
+
+    tokens = [v for kind, v in events if kind == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == fake_llm.reply
+    assert events[-1] == ("done", fake_llm.reply)
+
+
+def test_tool_call_json_is_buffered(fake_llm):
+    fake_llm.reply = "  " + TOOL_JSON
+    events = list(insight_agent.ask_stream("Give me a market analysis"))
+    assert events == [("done", json.loads(TOOL_JSON))]
+
+
+def test_invalid_json_is_shown_at_the_end(fake_llm):
+    fake_llm.reply = '{"function": "not_a_tool"}'
+    events = list(insight_agent.ask_stream("Give me a market analysis"))
+    assert events == [("token", fake_llm.reply), ("done", fake_llm.reply)]
+
+
+def test_ask_matches_stream_and_logs(fake_llm, tmp_path):
+    fake_llm.reply = TOOL_JSON
+    assert insight_agent.ask("Give me a market analysis") == json.loads(TOOL_JSON)
+    flush_trace_log()
+    entry = json.loads((tmp_path / "agent.log").read_text().splitlines()[-1])
+    assert entry["route"] == "llm" and entry["tool_call"]["function"] == "get_top_movers"
+    assert entry["prompt_tokens"]["total"] > entry["prompt_tokens"]["prefix"] > 0
+    assert "prompt" not in entry and len(entry["prompt_sha256"]) == 16
+    assert {"routing", "cache", "retrieval", "llm", "parse"} <= set(entry["timings_ms"])
+
+
+def test_logging_never_builds_the_embedding_client(fake_llm, monkeypatch, tmp_path):
+    from app.context import embedding
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(embedding, "_query_embeddings", None)
+    fake_llm.reply = TOOL_JSON
+    insight_agent.ask("Give me a market analysis")
+    flush_trace_log()
+    entry = json.loads((tmp_path / "agent.log").read_text().splitlines()[-1])
+    assert "embedding_cache" not in entry and embedding.built_query_embeddings() is None
+
+def test_fast_path_skips_the_llm(fake_llm):
+    events = list(insight_agent.ask_stream("top 3 movers 1d"))
+    assert events == [("done", {"function": "get_top_movers", "parameters": {"period": "1d", "limit": 3}})]
+    assert fake_llm.calls == 0
+
+
+def test_multi_tool_plan_is_returned_whole(fake_llm):
+    plan = {"plan": [json.loads(TOOL_JSON),
+                     {"function": "plot_price", "parameters": {"days": 7}, "for_each": 0}]}
+    fake_llm.reply = json.dumps(plan)
+    assert insight_agent.ask("Show the top movers and chart each one") == plan
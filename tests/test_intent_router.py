@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from app.agents.intent_router import route
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("plot_price coin=ETH days=5", {"function": "plot_price", "parameters": {"coin": "ETH", "days": 5}}),
+    ("get_top_movers period=1d limit=3", {"function": "get_top_movers", "parameters": {"period": "1d", "limit": 3}}),
+    ("screen_market filters=rsi<30 limit=3", {"function": "screen_market", "parameters": {"filters": ["rsi<30"], "limit": 3}}),
+    ("top 5 movers 7d", {"function": "get_top_movers", "parameters": {"period": "7d", "limit": 5}}),
+    ("Show me the top 3 movers over 30 days", {"function": "get_top_movers", "parameters": {"period": "30d", "limit": 3}}),
+    ("biggest gainers today", {"function": "get_top_movers", "parameters": {"period": "1d", "limit": 5}}),
+    # limit is clamped to the documented 1-20
+    ("top 0 movers", {"function": "get_top_movers", "parameters": {"period": "7d", "limit": 1}}),
+    ("get_top_movers period=7d limit=9999", {"function": "get_top_movers", "parameters": {"period": "7d", "limit": 20}}),
+    ("chart eth 90 days", {"function": "plot_price", "parameters": {"coin": "ethereum", "days": 90}}),
+    ("Plot Bitcoin price for the last 30 days", {"function": "plot_price", "parameters": {"coin": "bitcoin", "days": 30}}),
+    ("Chart Solana's performance this month", {"function": "plot_price", "parameters": {"coin": "solana", "days": 30}}),
+    ("forecast btc 14 days", {"function": "forecast_price", "parameters": {"coin": "bitcoin", "days": 14}}),
+])
+def test_confident_routes(query, expected):
+    assert route(query) == expected
+
+
+@pytest.mark.parametrize("query", [
+    "What arguments does plot_price take?",
+    "Tell me something about Bitcoin.",
+    "plot_price coin=ETH days=five",        # bad type
+    "plot_price coin=ETH",                  # missing required parameter
+    "get_top_movers period=2w limit=3",     # not an allowed literal
+    "top 5 movers over 14 days",            # no matching period
+    "chart dogecoin 30 days",               # unknown coin
+    "Why did the top movers fall this week?",
+    "Show the top 3 movers and chart each one",  # needs a multi-tool plan
+])
+def test_falls_back_to_llm(query):
+    assert route(query) is None
+
+
+def test_routing_is_sub_millisecond():
+    start = time.perf_counter()
+    for _ in range(1000):
+        route("top 5 movers 7d")
+    assert (time.perf_counter() - start) / 1000 < 0.001
@@ -0,0 +1,113 @@
+import pytest
+
+from app.agents.llm_router import CLOSED, HALF_OPEN, OPEN, AllModelsFailedError, ModelRouter
+from app.bench.fakes import FakeChatModel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _router(backends, clock=None, **kwargs):
+    return ModelRouter(models=list(backends), client_factory=backends.__getitem__,
+                       clock=clock or FakeClock(), **kwargs)
+
+
+def test_happy_path_is_a_single_call():
+    primary, backup = FakeChatModel("primary"), FakeChatModel("backup")
+    router = _router({"a": primary, "b": backup})
+    assert router.invoke("hi") == ("primary", "a")
+    assert router.invoke("hi") == ("primary", "a")
+    assert (primary.calls, backup.calls) == (2, 0)
+
+
+def test_fails_over_immediately_and_opens_circuit():
+    broken, backup = FakeChatModel(fail=TimeoutError("down")), FakeChatModel("backup")
+    router = _router({"a": broken, "b": backup}, failure_threshold=2)
+
+    for _ in range(2):
+        assert router.invoke("hi") == ("backup", "b")
+    assert router.health["a"].state == OPEN
+
+    # While open, the broken model is skipped entirely
+    router.invoke("hi")
+    assert broken.calls == 2
+
+
+def test_half_open_trial_recovers_or_reopens():
+    clock = FakeClock()
+    outcome = {"error": TimeoutError("down")}
+    flaky = FakeChatModel("flaky", fail=lambda: outcome["error"])
+    router = _router({"a": flaky, "b": FakeChatModel("backup")}, clock=clock,
+                     failure_threshold=1, cooldown=30)
+
+    router.invoke("hi")
+    assert router.health["a"].state == OPEN
+
+    clock.now = 31  # cooldown elapsed: one trial call, which fails again
+    router.invoke("hi")
+    assert router.health["a"].state == OPEN and flaky.calls == 2
+
+    clock.now = 62
+    outcome["error"] = None
+    assert router.invoke("hi") == ("flaky", "a")
+    assert router.health["a"].state == CLOSED
+
+
+def test_latency_ewma_and_clients_are_reused():
+    clock = FakeClock()
+    created = []
+
+    def factory(model):
+        created.append(model)
+        return FakeChatModel(lambda prompt: clock.__setattr__("now", clock.now + 0.5) or "ok")
+
+    router = ModelRouter(models=["a"], client_factory=factory, clock=clock, ewma_alpha=0.5)
+    router.invoke("x")
+    router.invoke("y")
+    assert created == ["a"]
+    assert router.stats()["a"]["latency_ewma_ms"] == pytest.approx(500)
+
+
+def test_all_models_down_raises():
+    router = _router({"a": FakeChatModel(fail=ValueError("no")), "b": FakeChatModel(fail=ValueError("no"))},
+                     failure_threshold=1)
+    with pytest.raises(AllModelsFailedError):
+        router.invoke("hi")
+    with pytest.raises(AllModelsFailedError, match="circuit-open"):
+        router.invoke("hi")
+    assert router.health["a"].state != HALF_OPEN
+
+
+class _BreaksMidStream(FakeChatModel):
+    def stream(self, prompt, token_latency=0.0):
+        yield from list(super().stream(prompt))[:1]
+        raise ConnectionError("reset")
+
+
+def test_stream_fails_over_before_the_first_token_only():
+    broken, backup = FakeChatModel(fail=TimeoutError("down")), FakeChatModel("two words")
+    router = _router({"a": broken, "b": backup})
+    assert list(router.stream("hi")) == [("two ", "b"), ("words", "b")]
+    assert router.health["a"].consecutive_failures == 1
+
+    router = _router({"a": _BreaksMidStream("two words"), "b": backup}, failure_threshold=1)
+    tokens = router.stream("hi")
+    assert next(tokens) == ("two ", "a")
+    with pytest.raises(ConnectionError, match="reset"):
+        next(tokens)
+    assert router.health["a"].state == OPEN
+    assert backup.calls == 1
+
+
+def test_stream_closed_early_counts_as_success():
+    router = _router({"a": FakeChatModel("two words")}, failure_threshold=1)
+    tokens = router.stream("hi")
+    next(tokens)
+    tokens.close()
+    assert router.health["a"].state == CLOSED
+    assert router.stats()["a"]["calls"] == 1
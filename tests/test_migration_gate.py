@@ -0,0 +1,30 @@
+from app import db
+
+
+def _gate(monkeypatch, at_head: bool) -> list:
+    upgrades = []
+    monkeypatch.setattr(db, "_schema_at_head", False)
+    monkeypatch.setattr(db, "_upgrade", lambda: upgrades.append(1))
+    monkeypatch.setattr(db, "current_revisions", lambda: {"a3f1c9d27b40"} if at_head else set())
+    monkeypatch.setattr(db, "head_revisions", lambda: {"a3f1c9d27b40"})
+    return upgrades
+
+
+def test_migrates_once_per_process(monkeypatch):
+    upgrades = _gate(monkeypatch, at_head=False)
+    for _ in range(5):  # Streamlit reruns
+        db.ensure_schema()
+    assert upgrades == [1] and db.schema_at_head()
+
+
+def test_schema_at_head_skips_upgrade(monkeypatch):
+    upgrades = _gate(monkeypatch, at_head=True)
+    db.ensure_schema()
+    assert upgrades == []
+
+
+def test_manage_migrate_always_upgrades(monkeypatch):
+    upgrades = _gate(monkeypatch, at_head=True)
+    db.ensure_schema()
+    db.init_db()
+    assert upgrades == [1]
@@ -0,0 +1,40 @@
+from app.agents.prompt_builder import STATIC_PREFIX, build_prompt, count_tokens, dedupe_snippets, prefix_tokens
+
+SNIPPETS = [f"Snippet {i}: " + "bitcoin halving supply schedule miners " * 20 for i in range(10)]
+
+
+def test_static_prefix_is_byte_identical():
+    a = build_prompt("What is Bitcoin?", SNIPPETS[:2], budget=4000)
+    b = build_prompt("Explain staking", SNIPPETS[5:], budget=2500)
+    assert a.text.startswith(STATIC_PREFIX) and b.text.startswith(STATIC_PREFIX)
+    assert a.text.endswith("User: What is Bitcoin?")
+
+
+def test_context_fits_the_budget_in_relevance_order():
+    budget = prefix_tokens() + 400
+    prompt = build_prompt("What is Bitcoin?", SNIPPETS, budget=budget)
+
+    assert prompt.total_tokens <= budget
+    assert count_tokens(prompt.text) <= budget + 2
+    assert 0 < prompt.snippets_used < len(SNIPPETS)
+    assert prompt.snippets_dropped == len(SNIPPETS) - prompt.snippets_used
+    assert prompt.snippets[0].startswith("- Snippet 0:")
+
+
+def test_snippets_are_capped_and_truncated():
+    prompt = build_prompt("q", SNIPPETS[:3], budget=100_000, snippet_max_tokens=50)
+    assert prompt.snippets_used == 3 and prompt.truncated
+    assert all(count_tokens(s) <= 50 for s in prompt.snippets)
+
+
+def test_no_budget_left_means_no_context():
+    prompt = build_prompt("What is Bitcoin?", SNIPPETS, budget=prefix_tokens())
+    assert prompt.snippets_used == 0
+    assert "User: What is Bitcoin?" in prompt.text
+    assert prompt.token_counts()["snippets_dropped"] == len(SNIPPETS)
+
+
+def test_dedupe_keeps_the_more_relevant_copy():
+    assert dedupe_snippets(["Bitcoin  is\nscarce.", "bitcoin is scarce.", "", "scarce", "ETH"]) == [
+        "Bitcoin  is\nscarce.", "ETH",
+    ]
@@ -0,0 +1,36 @@
+from app.ui.query_cache import QueryCache
+
+
+def test_reuses_results_until_the_watermark_moves():
+    version = [1]
+    cache = QueryCache(watermark=lambda: version[0], watermark_ttl=0)
+    runs = []
+    query = lambda days: runs.append(days) or f"rows for {days}"
+
+    for _ in range(3):  # Streamlit reruns
+        assert cache.get("history", query, 30) == "rows for 30"
+    cache.get("history", query, 7)
+    assert runs == [30, 7]
+
+    version[0] = 2  # the ETL loaded new data
+    cache.get("history", query, 30)
+    assert runs == [30, 7, 30]
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["queries"]["history"]["hit_rate"] == 0.4 and stats["watermark"] == 2
+
+
+def test_watermark_is_read_once_per_ttl():
+    reads = []
+    cache = QueryCache(watermark=lambda: reads.append(1) or 1, watermark_ttl=60)
+    for _ in range(5):
+        cache.get("count", lambda: 42)
+    assert len(reads) == 1
+
+
+def test_lru_bound():
+    cache = QueryCache(maxsize=2, watermark=lambda: 1)
+    for days in (1, 2, 3):
+        cache.get("q", lambda d: d, days)
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,118 @@
+import numpy as np
+from langchain.vectorstores import Chroma
+from langchain_core.documents import Document
+
+from app.bench.fakes import FakeEmbeddings
+from app.context import embedding
+from app.context.embedding import MANIFEST_NAME, build_index
+from app.context.bm25 import BM25Index, HybridRetriever, reciprocal_rank_fusion
+from app.context.numpy_index import NumpyRetriever, NumpyVectorIndex
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.texts = 0
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+
+def _write_sources(root, **files):
+    (root / "docs").mkdir(exist_ok=True)
+    for name, text in files.items():
+        (root / "docs" / name).write_text(text)
+
+
+def _paragraphs(tag, n):
+    return "\n\n".join(f"{tag} paragraph {i}: " + "lorem ipsum " * 30 for i in range(n))
+
+
+def _index(tmp_path, emb):
+    return build_index(roots=["docs"], base=tmp_path, persist_dir=tmp_path / "chroma", embeddings=emb)
+
+
+def test_rebuild_embeds_only_the_diff(tmp_path):
+    _write_sources(tmp_path, **{"a.md": _paragraphs("a", 6), "b.md": _paragraphs("b", 6)})
+    emb = CountingEmbeddings()
+    first = _index(tmp_path, emb)
+    assert first["changed"] == 2 and first["chunks_added"] == emb.texts > 0
+    assert (tmp_path / "chroma" / MANIFEST_NAME).exists()
+
+    emb = CountingEmbeddings()
+    again = _index(tmp_path, emb)
+    assert again["unchanged"] == 2 and emb.texts == 0
+
+    # Change one paragraph of one file: only its chunk is re-embedded
+    text = (tmp_path / "docs" / "a.md").read_text().replace("a paragraph 3", "a paragraph three")
+    (tmp_path / "docs" / "a.md").write_text(text)
+    emb = CountingEmbeddings()
+    edited = _index(tmp_path, emb)
+    assert edited["changed"] == 1 and edited["unchanged"] == 1
+    assert 0 < emb.texts < first["chunks_added"] / 2
+    assert edited["chunks_deleted"] == edited["chunks_added"]
+
+
+def test_deleted_sources_lose_their_chunks(tmp_path):
+    _write_sources(tmp_path, **{"a.md": _paragraphs("a", 3), "b.md": _paragraphs("b", 3)})
+    _index(tmp_path, CountingEmbeddings())
+    (tmp_path / "docs" / "b.md").unlink()
+
+    stats = _index(tmp_path, CountingEmbeddings())
+    assert stats["removed"] == 1 and stats["chunks_deleted"] > 0
+
+    store = Chroma(embedding_function=CountingEmbeddings(), persist_directory=str(tmp_path / "chroma"))
+    sources = {m["source"] for m in store.get()["metadatas"]}
+    assert sources == {"docs/a.md"}
+
+
+def test_default_corpus_is_prompts_and_tool_schema():
+    sources = embedding._source_files()
+    assert "app/agents/schema.py" in sources
+    assert not any(path.startswith("app/agents/prompt_builder") for path in sources)
+
+
+def test_numpy_backend_matches_exact_search(tmp_path, monkeypatch):
+    _write_sources(tmp_path, **{"a.md": _paragraphs("a", 8), "b.md": _paragraphs("b", 8)})
+    emb = CountingEmbeddings()
+    _index(tmp_path, emb)
+
+    index = NumpyVectorIndex(tmp_path / "chroma")
+    query = emb.embed_query("a paragraph 5")
+    expected = np.argsort(-(index.matrix @ np.asarray(query, dtype=np.float32)))[:3]
+    assert [row for row, _ in index.search(query, 3)] == expected.tolist()
+
+    monkeypatch.setattr(embedding, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(embedding, "get_numpy_index", lambda: index)
+    monkeypatch.setattr(embedding, "get_query_embeddings", lambda: emb)
+    docs = embedding.get_retriever(k=3).get_relevant_documents("a paragraph 5")
+    assert [d.page_content for d in docs] == [index.documents[i] for i in expected]
+    assert docs[0].metadata["source"].startswith("docs/")
+
+
+def test_hybrid_skips_embedding_on_decisive_keyword_hits(tmp_path, monkeypatch):
+    _write_sources(tmp_path, **{
+        "tools.md": "plot_price draws a price chart for one coin over days.\n\n" + _paragraphs("x", 4),
+        "other.md": _paragraphs("y", 6),
+    })
+    emb = CountingEmbeddings()
+    _index(tmp_path, emb)
+    bm25 = BM25Index.load(tmp_path / "chroma")
+    vector = NumpyRetriever(index=NumpyVectorIndex(tmp_path / "chroma"), embeddings=emb, k=2)
+    retriever = HybridRetriever(bm25=bm25, vector=vector, k=1, min_score=1.0)
+
+    emb.texts = 0
+    docs = retriever.get_relevant_documents("How does plot_price work?")
+    assert "plot_price" in docs[0].page_content and emb.texts == 0
+
+    # Nothing lexical to go on: falls back to (fused) vector search
+    docs = retriever.get_relevant_documents("zzz qqq")
+    assert len(docs) == 1 and emb.texts == 1
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    a, b, c = (Document(page_content=t, metadata={"sha256": t}) for t in "abc")
+    assert [d.page_content for d in reciprocal_rank_fusion([[a, b], [b, c]], k=2)] == ["b", "a"]
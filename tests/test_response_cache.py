@@ -0,0 +1,57 @@
+import time
+
+from app.agents.response_cache import ResponseCache
+from app.bench.fakes import FakeEmbeddings
+
+CALL = {"function": "get_top_movers", "parameters": {"period": "7d", "limit": 5}}
+
+
+def test_exact_hit_is_normalised_and_versioned(tmp_path):
+    cache = ResponseCache(tmp_path / "r.sqlite3")
+    cache.put("Top movers this week", "v1", CALL, latency=1.5)
+
+    assert cache.get("  top MOVERS this week", "v1") == CALL
+    assert cache.get("Top movers this week", "v2") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["saved_latency"]) == (1, 1, 1.5)
+
+
+def test_entries_expire(tmp_path):
+    cache = ResponseCache(tmp_path / "r.sqlite3", ttl=1)
+    cache.put("What is Bitcoin?", "v1", "A cryptocurrency.", latency=2.0)
+    assert cache.get("what is bitcoin?", "v1") == "A cryptocurrency."
+    time.sleep(1.1)
+    assert cache.get("what is bitcoin?", "v1") is None
+
+
+def test_similarity_match_above_threshold(tmp_path):
+    class Embedder(FakeEmbeddings):
+        def embed_query(self, text):
+            # "chart"/"plot" phrasings share a vector in this fake
+            return super().embed_query("plot" if "btc" in text.lower() else text)
+
+    cache = ResponseCache(tmp_path / "r.sqlite3", similarity_threshold=0.95, embedder=Embedder())
+    cache.put("plot BTC 30 days", "v1", CALL, latency=1.0)
+    assert cache.get("chart btc for a month", "v1") == CALL
+    assert cache.get("what is solana", "v1") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_entries_are_shared_between_instances(tmp_path):
+    ResponseCache(tmp_path / "r.sqlite3").put("q", "v1", "answer", latency=0.5)
+    assert ResponseCache(tmp_path / "r.sqlite3").get("q", "v1") == "answer"
+
+
+def test_exact_match_cache_builds_no_embedding_client(monkeypatch):
+    from app.agents import insight_agent
+
+    def no_client():
+        raise AssertionError("embedding client built for an exact-match cache")
+
+    monkeypatch.setattr(insight_agent, "_response_cache", None)
+    monkeypatch.setattr(insight_agent, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(insight_agent, "RESPONSE_CACHE_SIMILARITY", None)
+    monkeypatch.setattr(insight_agent, "get_query_embeddings", no_client)
+    monkeypatch.setattr(insight_agent, "ResponseCache", lambda **kwargs: kwargs)
+    assert insight_agent.get_response_cache()["embedder"] is None
@@ -0,0 +1,60 @@
+import gzip
+import json
+import time
+
+from app.agents import tracing
+from app.agents.tracing import Trace, TraceLogger
+
+
+def test_lines_are_batched_and_flushed(tmp_path):
+    log = TraceLogger(tmp_path / "agent.log")
+    for i in range(200):
+        log.log({"i": i})
+    assert log.flush()
+
+    lines = (tmp_path / "agent.log").read_text().splitlines()
+    assert [json.loads(line)["i"] for line in lines] == list(range(200))
+    assert log.stats()["batches"] < 200
+    log.close()
+
+
+def test_rotation_keeps_backups_and_compresses(tmp_path):
+    log = TraceLogger(tmp_path / "agent.log", max_bytes=500, backup_count=2, compress=True)
+    for i in range(100):
+        log.log({"i": i, "pad": "x" * 40})
+        log.flush()
+    log.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["agent.log", "agent.log.1.gz", "agent.log.2.gz"]
+    newest_backup = gzip.open(tmp_path / "agent.log.1.gz", "rt").read().splitlines()
+    current = (tmp_path / "agent.log").read_text().splitlines()
+    assert json.loads(newest_backup[-1])["i"] + 1 == json.loads(current[0])["i"]
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    log = TraceLogger(tmp_path / "agent.log", max_queue=1)
+    slow_write = log._write
+    monkeypatch.setattr(log, "_write", lambda lines: (time.sleep(0.2), slow_write(lines)))
+
+    t0 = time.perf_counter()
+    for i in range(50):
+        log.log({"i": i})
+        time.sleep(0.001)
+    assert time.perf_counter() - t0 < 0.2
+    assert log.dropped > 0
+    log.close()
+
+
+def test_trace_records_stage_timings(tmp_path):
+    trace = Trace(query="q")
+    with trace.stage("retrieval"):
+        time.sleep(0.01)
+    trace.add("llm", 0.5)
+    trace.emit(route="llm")
+    tracing.flush_trace_log()
+
+    entry = json.loads((tmp_path / "agent.log").read_text().splitlines()[-1])
+    assert entry["query"] == "q" and entry["route"] == "llm"
+    assert entry["timings_ms"]["retrieval"] >= 10
+    assert entry["timings_ms"]["llm"] == 500
+    assert entry["total_ms"] >= entry["timings_ms"]["retrieval"]
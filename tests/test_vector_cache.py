@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.bench.fakes import FakeEmbeddings
+from app.context.vector_cache import CachedEmbeddings, VectorCache, text_key
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts += texts
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.texts.append(text)
+        return super().embed_query(text)
+
+
+def test_only_unseen_texts_are_embedded(tmp_path):
+    base = CountingEmbeddings()
+    emb = CachedEmbeddings(base, "fake", VectorCache(tmp_path))
+    first = emb.embed_documents(["a", "b", "c"])
+    again = emb.embed_documents(["c", "d", "a"])
+
+    assert base.texts == ["a", "b", "c", "d"]
+    assert again[0] == pytest.approx(first[2]) and again[2] == pytest.approx(first[0])
+    assert emb.embed_query("b") == pytest.approx(first[1])
+    assert emb.stats()["hits"] == 3 and emb.stats()["cached_vectors"] == 4
+
+
+def test_bulk_lookup_returns_one_array_and_survives_reopen(tmp_path):
+    cache = VectorCache(tmp_path, initial_rows=2)
+    vectors = np.arange(40, dtype=np.float32).reshape(5, 8)
+    cache.add("fake", [text_key(str(i)) for i in range(5)], vectors)  # grows past initial_rows
+
+    reopened = VectorCache(tmp_path)
+    found_vectors, found = reopened.lookup("fake", [text_key(t) for t in ["4", "x", "1"]])
+    assert found.tolist() == [True, False, True]
+    assert isinstance(found_vectors, np.ndarray) and found_vectors.dtype == np.float32
+    np.testing.assert_array_equal(found_vectors, vectors[[4, 1]])
+
+
+def test_models_do_not_share_vectors(tmp_path):
+    cache = VectorCache(tmp_path)
+    cache.add("model-1", [text_key("same")], np.ones((1, 8)))
+    assert cache.lookup("model-2", [text_key("same")])[1].tolist() == [False]
+    with pytest.raises(ValueError):
+        cache.add("model-1", [text_key("other")], np.ones((1, 4)))